@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+catalog.py
+
+Set-based catalog snapshot loader for MSSQL and PostgreSQL.
+
+Instead of one INFORMATION_SCHEMA query per table (plus correlated sub-queries for
+column counts and foreign keys), a whole schema is read with three queries per
+database - columns, foreign keys, indexes - straight from sys.* / pg_catalog:
+
+    catalog = load_catalog(conn, 'mssql', 'dbo')
+    table = catalog.table('TBL_EVENTMASTER')
+    for col in table.columns:
+        print(col.name, col.data_type, col.nullable, table.fk_label(col.name))
+
+Pass `tables=[...]` to load only some tables (same queries, filtered server-side).
+Views (and PostgreSQL materialized views) are loaded too, flagged is_view: name
+lookups find them, as INFORMATION_SCHEMA.COLUMNS did, while table_names() and
+columns_by_table() list base tables only unless asked for views.
+Data types are reported the way INFORMATION_SCHEMA.COLUMNS.DATA_TYPE does
+('nvarchar', 'character varying', 'timestamp without time zone', ...), so the
+tools' output does not change.
+"""
+
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from db_utils import fetchall
+
+DEFAULT_SCHEMAS = {'mssql': 'dbo', 'postgres': 'public'}
+
+# SQL Server allows at most 2100 parameters per statement
+_MAX_FILTER_PARAMS = 1000
+
+
+@dataclass
+class ColumnInfo:
+    name: str
+    data_type: str
+    ordinal: int
+    nullable: bool = True
+    max_length: Optional[int] = None
+    default: Optional[str] = None
+    is_primary_key: bool = False
+
+
+@dataclass
+class ForeignKeyInfo:
+    name: str
+    columns: List[str]
+    ref_schema: str
+    ref_table: str
+    ref_columns: List[str]
+
+
+@dataclass
+class IndexInfo:
+    name: str
+    columns: List[str]
+    is_unique: bool = False
+    is_primary: bool = False
+
+
+@dataclass
+class TableInfo:
+    schema: str
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    foreign_keys: List[ForeignKeyInfo] = field(default_factory=list)
+    indexes: List[IndexInfo] = field(default_factory=list)
+    is_view: bool = False
+
+    @property
+    def primary_key(self) -> List[str]:
+        for idx in self.indexes:
+            if idx.is_primary:
+                return list(idx.columns)
+        return []
+
+    def column(self, name: str) -> Optional[ColumnInfo]:
+        low = name.lower()
+        for col in self.columns:
+            if col.name == name:
+                return col
+        for col in self.columns:
+            if col.name.lower() == low:
+                return col
+        return None
+
+    def fk_label(self, column: str) -> str:
+        """'ref_table(ref_column)' for the first foreign key on `column`, '' if none."""
+        for fk in self.foreign_keys:
+            if column in fk.columns:
+                return f"{fk.ref_table}({fk.ref_columns[fk.columns.index(column)]})"
+        return ''
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TableInfo':
+        return cls(
+            schema=data['schema'],
+            name=data['name'],
+            columns=[ColumnInfo(**c) for c in data.get('columns', [])],
+            foreign_keys=[ForeignKeyInfo(**fk) for fk in data.get('foreign_keys', [])],
+            indexes=[IndexInfo(**idx) for idx in data.get('indexes', [])],
+            is_view=data.get('is_view', False),
+        )
+
+
+@dataclass
+class Catalog:
+    db_type: str
+    schema: str
+    tables: Dict[str, TableInfo] = field(default_factory=dict)
+
+    def table(self, name: str) -> Optional[TableInfo]:
+        """Exact lookup first, then case-insensitive (MSSQL names usually are)."""
+        if name in self.tables:
+            return self.tables[name]
+        low = name.lower()
+        for tname, tinfo in self.tables.items():
+            if tname.lower() == low:
+                return tinfo
+        return None
+
+    def table_names(self, views: bool = False) -> List[str]:
+        return sorted((t.name for t in self.tables.values() if views or not t.is_view), key=str.lower)
+
+    def columns_by_table(self, views: bool = False) -> Dict[str, List[str]]:
+        return {t.name: [c.name for c in t.columns] for t in self.tables.values() if views or not t.is_view}
+
+
+# -------------------------
+# MSSQL (sys.*)
+# -------------------------
+MSSQL_COLUMNS_SQL = """
+    SELECT t.name, c.name, c.column_id,
+           CASE WHEN ty.is_assembly_type = 1 THEN ty.name ELSE TYPE_NAME(c.system_type_id) END,
+           CASE WHEN TYPE_NAME(c.system_type_id) IN ('nchar', 'nvarchar') AND c.max_length > 0 THEN c.max_length / 2
+                WHEN TYPE_NAME(c.system_type_id) IN ('char', 'varchar', 'nchar', 'nvarchar', 'binary', 'varbinary') THEN c.max_length
+           END,
+           c.is_nullable,
+           OBJECT_DEFINITION(c.default_object_id),
+           CASE WHEN t.type = 'V' THEN 1 ELSE 0 END
+    FROM sys.objects t
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.columns c ON c.object_id = t.object_id
+    JOIN sys.types ty ON ty.user_type_id = c.user_type_id
+    WHERE s.name = ? AND t.type IN ('U', 'V') {filter}
+    ORDER BY t.name, c.column_id
+"""
+
+MSSQL_FOREIGN_KEYS_SQL = """
+    SELECT t.name, fk.name, cp.name, sr.name, tr.name, cr.name
+    FROM sys.foreign_keys fk
+    JOIN sys.tables t ON t.object_id = fk.parent_object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+    JOIN sys.columns cp ON cp.object_id = fkc.parent_object_id AND cp.column_id = fkc.parent_column_id
+    JOIN sys.tables tr ON tr.object_id = fk.referenced_object_id
+    JOIN sys.schemas sr ON sr.schema_id = tr.schema_id
+    JOIN sys.columns cr ON cr.object_id = fkc.referenced_object_id AND cr.column_id = fkc.referenced_column_id
+    WHERE s.name = ? {filter}
+    ORDER BY t.name, fk.name, fkc.constraint_column_id
+"""
+
+MSSQL_INDEXES_SQL = """
+    SELECT t.name, i.name, i.is_unique, i.is_primary_key, c.name
+    FROM sys.indexes i
+    JOIN sys.objects t ON t.object_id = i.object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    WHERE s.name = ? AND t.type IN ('U', 'V') AND i.index_id > 0 AND ic.is_included_column = 0 {filter}
+    ORDER BY t.name, i.name, ic.key_ordinal
+"""
+
+# -------------------------
+# PostgreSQL (pg_catalog)
+# -------------------------
+PG_COLUMNS_SQL = """
+    SELECT c.relname, a.attname, a.attnum,
+           CASE WHEN t.typtype = 'd' THEN format_type(t.typbasetype, t.typtypmod)
+                ELSE format_type(a.atttypid, a.atttypmod) END,
+           t.typtype = 'd' OR tn.nspname = 'pg_catalog', t.typcategory,
+           CASE WHEN a.atttypid IN (1042, 1043) AND a.atttypmod > 0 THEN a.atttypmod - 4 END,
+           NOT a.attnotnull,
+           pg_get_expr(d.adbin, d.adrelid),
+           c.relkind IN ('v', 'm')
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    JOIN pg_type t ON t.oid = a.atttypid
+    JOIN pg_namespace tn ON tn.oid = t.typnamespace
+    LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm') {filter}
+    ORDER BY c.relname, a.attnum
+"""
+
+PG_FOREIGN_KEYS_SQL = """
+    SELECT c.relname, con.conname, a.attname, rn.nspname, rc.relname, ra.attname
+    FROM pg_constraint con
+    JOIN pg_class c ON c.oid = con.conrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_class rc ON rc.oid = con.confrelid
+    JOIN pg_namespace rn ON rn.oid = rc.relnamespace
+    CROSS JOIN LATERAL unnest(con.conkey, con.confkey) WITH ORDINALITY AS k(attnum, refattnum, ord)
+    JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+    JOIN pg_attribute ra ON ra.attrelid = con.confrelid AND ra.attnum = k.refattnum
+    WHERE con.contype = 'f' AND n.nspname = %s {filter}
+    ORDER BY c.relname, con.conname, k.ord
+"""
+
+PG_INDEXES_SQL = """
+    SELECT c.relname, i.relname, x.indisunique, x.indisprimary,
+           ARRAY(SELECT a.attname
+                 FROM unnest(x.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord)
+                 JOIN pg_attribute a ON a.attrelid = x.indrelid AND a.attnum = k.attnum
+                 WHERE k.ord <= x.indnkeyatts
+                 ORDER BY k.ord)
+    FROM pg_index x
+    JOIN pg_class c ON c.oid = x.indrelid
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'm') {filter}
+    ORDER BY c.relname, i.relname
+"""
+
+RE_TYPMOD = re.compile(r'\([^)]*\)')
+
+
+def _pg_data_type(formatted: str, builtin: bool, typcategory: str) -> str:
+    """format_type() output -> information_schema.columns.data_type spelling."""
+    if typcategory == 'A':
+        return 'ARRAY'
+    if not builtin:
+        return 'USER-DEFINED'
+    return ' '.join(RE_TYPMOD.sub('', formatted).split())
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _query_mssql(conn, sql: str, schema: str, tables: Optional[List[str]]) -> list:
+    if tables is None:
+        return fetchall(conn, sql.format(filter=''), (schema,))
+    rows = []
+    for part in _chunks(tables, _MAX_FILTER_PARAMS):
+        flt = f"AND t.name IN ({', '.join('?' for _ in part)})"
+        rows.extend(fetchall(conn, sql.format(filter=flt), (schema, *part)))
+    return rows
+
+
+def _query_postgres(conn, sql: str, schema: str, tables: Optional[List[str]]) -> list:
+    if tables is None:
+        return fetchall(conn, sql.format(filter=''), (schema,))
+    return fetchall(conn, sql.format(filter='AND c.relname = ANY(%s)'), (schema, list(tables)))
+
+
+def query_catalog(conn, db_type: str, sql: str, schema: str, tables: Optional[List[str]] = None) -> list:
+    """Rows of a catalog query with a {filter} slot, limited to `tables` (IN lists chunked on MSSQL)."""
+    query = _query_mssql if db_type == 'mssql' else _query_postgres
+    return query(conn, sql, schema, tables)
+
+
+def _apply_keys_and_indexes(catalog: Catalog, fk_rows: list, index_rows: list):
+    fks = {}
+    for table, fk_name, col, ref_schema, ref_table, ref_col in fk_rows:
+        tinfo = catalog.tables.get(table)
+        if tinfo is None:
+            continue
+        fk = fks.get((table, fk_name))
+        if fk is None:
+            fk = fks[(table, fk_name)] = ForeignKeyInfo(fk_name, [], ref_schema, ref_table, [])
+            tinfo.foreign_keys.append(fk)
+        fk.columns.append(col)
+        fk.ref_columns.append(ref_col)
+
+    idxs = {}
+    for row in index_rows:
+        table, idx_name, is_unique, is_primary, cols = row
+        tinfo = catalog.tables.get(table)
+        if tinfo is None:
+            continue
+        idx = idxs.get((table, idx_name))
+        if idx is None:
+            idx = idxs[(table, idx_name)] = IndexInfo(idx_name, [], bool(is_unique), bool(is_primary))
+            tinfo.indexes.append(idx)
+        # MSSQL returns one row per index column, PostgreSQL one array per index
+        idx.columns.extend(cols if isinstance(cols, list) else [cols])
+
+    for tinfo in catalog.tables.values():
+        pk = set(tinfo.primary_key)
+        for col in tinfo.columns:
+            col.is_primary_key = col.name in pk
+
+
+def load_mssql_catalog(conn, schema: str = 'dbo', tables: Optional[List[str]] = None) -> Catalog:
+    catalog = Catalog('mssql', schema)
+    rows = _query_mssql(conn, MSSQL_COLUMNS_SQL, schema, tables)
+    for table, name, ordinal, data_type, max_length, nullable, default, is_view in rows:
+        tinfo = catalog.tables.get(table)
+        if tinfo is None:
+            tinfo = catalog.tables[table] = TableInfo(schema, table, is_view=bool(is_view))
+        tinfo.columns.append(ColumnInfo(
+            name=name,
+            data_type=data_type,
+            ordinal=int(ordinal),
+            nullable=bool(nullable),
+            max_length=int(max_length) if max_length is not None else None,
+            default=default,
+        ))
+    _apply_keys_and_indexes(
+        catalog,
+        _query_mssql(conn, MSSQL_FOREIGN_KEYS_SQL, schema, tables),
+        _query_mssql(conn, MSSQL_INDEXES_SQL, schema, tables),
+    )
+    return catalog
+
+
+def load_postgres_catalog(conn, schema: str = 'public', tables: Optional[List[str]] = None) -> Catalog:
+    catalog = Catalog('postgres', schema)
+    rows = _query_postgres(conn, PG_COLUMNS_SQL, schema, tables)
+    for table, name, ordinal, formatted, builtin, typcategory, max_length, nullable, default, is_view in rows:
+        tinfo = catalog.tables.get(table)
+        if tinfo is None:
+            tinfo = catalog.tables[table] = TableInfo(schema, table, is_view=bool(is_view))
+        tinfo.columns.append(ColumnInfo(
+            name=name,
+            data_type=_pg_data_type(formatted, builtin, typcategory),
+            ordinal=int(ordinal),
+            nullable=bool(nullable),
+            max_length=int(max_length) if max_length is not None else None,
+            default=default,
+        ))
+    _apply_keys_and_indexes(
+        catalog,
+        _query_postgres(conn, PG_FOREIGN_KEYS_SQL, schema, tables),
+        _query_postgres(conn, PG_INDEXES_SQL, schema, tables),
+    )
+    return catalog
+
+
+def load_catalog(conn, db_type: str, schema: Optional[str] = None, tables: Optional[List[str]] = None) -> Catalog:
+    """Load a schema (or some of its tables) from a 'mssql' or 'postgres' connection."""
+    schema = schema or DEFAULT_SCHEMAS[db_type]
+    if db_type == 'mssql':
+        return load_mssql_catalog(conn, schema, tables)
+    if db_type == 'postgres':
+        return load_postgres_catalog(conn, schema, tables)
+    raise ValueError(f"Unknown db_type: {db_type!r} (expected 'mssql' or 'postgres')")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+catalog_async.py
+
+Fetch catalog snapshots from MSSQL and PostgreSQL at the same time.
+
+Connecting and reading the catalog are mostly network round trips, so running the
+two databases one after another costs the sum of both; overlapped it costs roughly
+the slower one. pyodbc and psycopg2 are blocking drivers, so each side runs in the
+event loop's thread executor with its own pooled connection (db_session.py):
+
+    m_info, p_info = fetch_table_pair('dbo', 'TBL_EVENTMASTER', 'public', 'event_master')
+
+    # inside async code
+    m_cat, p_cat = await fetch_catalogs_async([('mssql', 'dbo', None), ('postgres', 'public', None)])
+
+Snapshots go through cached_catalog, so unchanged tables still come from the on-disk
+cache (catalog_cache.py).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from catalog import Catalog, TableInfo
+from catalog_cache import cached_catalog
+from db_session import connection
+
+DB_LABELS = {'mssql': 'MSSQL', 'postgres': 'PostgreSQL'}
+
+
+def _load(db_type: str, schema: str, tables: Optional[List[str]]) -> Tuple[Catalog, float]:
+    started = time.perf_counter()
+    with connection(db_type) as conn:
+        catalog = cached_catalog(conn, db_type, schema, tables=tables)
+    return catalog, time.perf_counter() - started
+
+
+async def fetch_catalogs_async(requests: List[Tuple[str, str, Optional[List[str]]]],
+                               verbose: bool = True) -> List[Catalog]:
+    """Catalogs for (db_type, schema, tables) requests, fetched concurrently; same order as `requests`."""
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(requests) or 1) as executor:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(executor, _load, db_type, schema, tables)
+            for db_type, schema, tables in requests
+        ))
+    if verbose:
+        sides = ", ".join(f"{DB_LABELS.get(db_type, db_type)} {elapsed:.1f}s"
+                          for (db_type, _, _), (_, elapsed) in zip(requests, results))
+        print(f"✓ Metadata fetched ({sides}; {time.perf_counter() - started:.1f}s total)")
+    return [catalog for catalog, _ in results]
+
+
+def fetch_catalogs(requests: List[Tuple[str, str, Optional[List[str]]]], verbose: bool = True) -> List[Catalog]:
+    """Blocking wrapper around fetch_catalogs_async for the (synchronous) tools."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(fetch_catalogs_async(requests, verbose))
+    raise RuntimeError("fetch_catalogs() called from a running event loop; await fetch_catalogs_async() instead")
+
+
+def fetch_table_pair(m_schema: str, m_table: str, p_schema: str,
+                     p_table: str) -> Tuple[Optional[TableInfo], Optional[TableInfo]]:
+    """One MSSQL and one PostgreSQL table snapshot, fetched concurrently (None if not found)."""
+    m_catalog, p_catalog = fetch_catalogs([('mssql', m_schema, [m_table]), ('postgres', p_schema, [p_table])])
+    return m_catalog.table(m_table), p_catalog.table(p_table)
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+catalog_cache.py
+
+Persistent on-disk cache for catalog snapshots (see catalog.py).
+
+Snapshots are stored per table in a local SQLite file, keyed by
+db_type/server/database/schema. Before serving a cached table it is validated with
+one cheap "stamp" query for the whole schema:
+
+ - MSSQL      : sys.tables.modify_date (changes on ALTER TABLE and on index changes)
+ - PostgreSQL : md5 over the table's pg_class row version and its pg_attribute,
+                pg_attrdef, pg_index and pg_constraint entries
+
+Only tables whose stamp changed (or that are new) are re-read with load_catalog;
+dropped tables are evicted. With a max_age (seconds) tables validated recently are
+served straight from disk with no query at all.
+
+The same file also keeps the most recently used column-name features of the
+name matcher (name_matching.NameFeatureIndex), so a new run does not re-tokenize
+the names it scored last time, the sampled-value sketches of value_sketches.py and
+the key sketches and confirmed foreign keys of fk_inference.py.
+
+Environment:
+    CATALOG_CACHE          set to 0 to disable the cache
+    CATALOG_CACHE_PATH     SQLite file (default ~/.cache/datamigration/catalog_cache.sqlite3)
+    CATALOG_CACHE_MAX_AGE  seconds a validated table is trusted without re-checking (default 0)
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+from catalog import DEFAULT_SCHEMAS, Catalog, TableInfo, load_catalog, query_catalog
+from name_matching import feature_signature
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'datamigration', 'catalog_cache.sqlite3')
+
+MSSQL_STAMPS_SQL = """
+    SELECT t.name, CONVERT(varchar(33), t.modify_date, 126)
+    FROM sys.objects t
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE s.name = ? AND t.type IN ('U', 'V') {filter}
+"""
+
+PG_STAMPS_SQL = """
+    SELECT c.relname,
+           md5(c.xmin::text || '|' || c.relnatts::text || '|' ||
+               COALESCE((SELECT string_agg(a.attname || ':' || a.atttypid || ':' || a.atttypmod || ':' ||
+                                           a.attnotnull || ':' || COALESCE(d.oid::text, ''), ',' ORDER BY a.attnum)
+                         FROM pg_attribute a
+                         LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+                         WHERE a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped), '') || '|' ||
+               COALESCE((SELECT string_agg(x.indexrelid::text, ',' ORDER BY x.indexrelid)
+                         FROM pg_index x WHERE x.indrelid = c.oid), '') || '|' ||
+               COALESCE((SELECT string_agg(con.oid::text, ',' ORDER BY con.oid)
+                         FROM pg_constraint con WHERE con.conrelid = c.oid), ''))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p', 'v', 'm') {filter}
+"""
+
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS catalog_tables (
+        cache_key  TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        stamp      TEXT NOT NULL,
+        checked_at REAL NOT NULL,
+        payload    TEXT NOT NULL,
+        PRIMARY KEY (cache_key, table_name)
+    );
+    CREATE TABLE IF NOT EXISTS name_features (
+        signature TEXT NOT NULL,
+        name      TEXT NOT NULL,
+        used_at   REAL NOT NULL,
+        payload   TEXT NOT NULL,
+        PRIMARY KEY (signature, name)
+    );
+    CREATE TABLE IF NOT EXISTS value_sketches (
+        cache_key  TEXT NOT NULL,
+        table_name TEXT NOT NULL,
+        stamp      TEXT NOT NULL,
+        sampled_at REAL NOT NULL,
+        payload    TEXT NOT NULL,
+        PRIMARY KEY (cache_key, table_name)
+    );
+    CREATE TABLE IF NOT EXISTS inferred_fks (
+        cache_key    TEXT NOT NULL,
+        table_name   TEXT NOT NULL,
+        column_name  TEXT NOT NULL,
+        ref_schema   TEXT NOT NULL,
+        ref_table    TEXT NOT NULL,
+        ref_column   TEXT NOT NULL,
+        confirmed_at REAL NOT NULL,
+        PRIMARY KEY (cache_key, table_name, column_name, ref_schema, ref_table, ref_column)
+    );
+"""
+
+
+def cache_enabled() -> bool:
+    return os.environ.get('CATALOG_CACHE', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def connection_identity(conn, db_type: str) -> str:
+    """'server/database' of an open connection, taken from the driver where possible."""
+    if db_type == 'postgres':
+        info = getattr(conn, 'info', None)
+        if info is not None and getattr(info, 'dbname', None):
+            return f"{info.host or 'local'}:{info.port}/{info.dbname}"
+        sql = "SELECT COALESCE(inet_server_addr()::text, 'local') || ':' || current_setting('port'), current_database()"
+    else:
+        try:
+            import pyodbc
+            return f"{conn.getinfo(pyodbc.SQL_SERVER_NAME)}/{conn.getinfo(pyodbc.SQL_DATABASE_NAME)}"
+        except Exception:
+            pass
+        sql = "SELECT @@SERVERNAME, DB_NAME()"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        server, database = cursor.fetchone()
+    finally:
+        cursor.close()
+    return f"{server}/{database}"
+
+
+class CatalogCache:
+    """SQLite-backed store of per-table catalog snapshots."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.environ.get('CATALOG_CACHE_PATH') or DEFAULT_CACHE_PATH
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(_SCHEMA_SQL)
+
+    def close(self):
+        self.db.close()
+
+    def load(self, cache_key: str) -> Dict[str, tuple]:
+        """{table_name: (stamp, checked_at, TableInfo)} for one cache key."""
+        rows = self.db.execute(
+            "SELECT table_name, stamp, checked_at, payload FROM catalog_tables WHERE cache_key = ?", (cache_key,)
+        ).fetchall()
+        return {name: (stamp, checked_at, TableInfo.from_dict(json.loads(payload))) for name, stamp, checked_at, payload in rows}
+
+    def store(self, cache_key: str, entries: Dict[str, tuple]):
+        """entries: {table_name: (stamp, TableInfo)}"""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO catalog_tables (cache_key, table_name, stamp, checked_at, payload) VALUES (?, ?, ?, ?, ?)",
+            [(cache_key, name, stamp, now, json.dumps(info.to_dict())) for name, (stamp, info) in entries.items()],
+        )
+        self.db.commit()
+
+    def touch(self, cache_key: str, tables: List[str]):
+        now = time.time()
+        self.db.executemany(
+            "UPDATE catalog_tables SET checked_at = ? WHERE cache_key = ? AND table_name = ?",
+            [(now, cache_key, t) for t in tables],
+        )
+        self.db.commit()
+
+    def evict(self, cache_key: str, tables: List[str]):
+        self.db.executemany(
+            "DELETE FROM catalog_tables WHERE cache_key = ? AND table_name = ?",
+            [(cache_key, t) for t in tables],
+        )
+        self.db.commit()
+
+    def clear(self, cache_key: Optional[str] = None):
+        for table in ('catalog_tables', 'value_sketches', 'inferred_fks'):
+            if cache_key is None:
+                self.db.execute(f"DELETE FROM {table}")
+            else:
+                self.db.execute(f"DELETE FROM {table} WHERE cache_key = ?", (cache_key,))
+        self.db.commit()
+
+    def load_name_features(self, signature: str, limit: int) -> List[tuple]:
+        """The `limit` most recently used (name, row) feature entries, least recent first."""
+        rows = self.db.execute(
+            "SELECT name, payload FROM name_features WHERE signature = ? ORDER BY used_at DESC LIMIT ?",
+            (signature, limit),
+        ).fetchall()
+        return [(name, json.loads(payload)) for name, payload in reversed(rows)]
+
+    def store_name_features(self, signature: str, rows: List[tuple], keep: int):
+        """Upsert (name, row) entries as used now; drop other signatures and all but the `keep` newest."""
+        now = time.time()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO name_features (signature, name, used_at, payload) VALUES (?, ?, ?, ?)",
+            [(signature, name, now, json.dumps(row)) for name, row in rows],
+        )
+        self.db.execute("DELETE FROM name_features WHERE signature <> ?", (signature,))
+        self.db.execute(
+            "DELETE FROM name_features WHERE signature = ? AND name NOT IN "
+            "(SELECT name FROM name_features WHERE signature = ? ORDER BY used_at DESC LIMIT ?)",
+            (signature, signature, keep),
+        )
+        self.db.commit()
+
+    def load_sketches(self, cache_key: str, table: str) -> Optional[tuple]:
+        """(stamp, sampled_at, payload) of a table's value sketches, or None."""
+        row = self.db.execute(
+            "SELECT stamp, sampled_at, payload FROM value_sketches WHERE cache_key = ? AND table_name = ?",
+            (cache_key, table),
+        ).fetchone()
+        return None if row is None else (row[0], row[1], json.loads(row[2]))
+
+    def store_sketches(self, cache_key: str, table: str, stamp: str, payload: dict):
+        self.db.execute(
+            "INSERT OR REPLACE INTO value_sketches (cache_key, table_name, stamp, sampled_at, payload) VALUES (?, ?, ?, ?, ?)",
+            (cache_key, table, stamp, time.time(), json.dumps(payload)),
+        )
+        self.db.commit()
+
+    def load_inferred_fks(self, cache_key: str, table: str) -> List[tuple]:
+        """(column, ref_schema, ref_table, ref_column) of the confirmed inferred foreign keys of a table."""
+        return self.db.execute(
+            "SELECT column_name, ref_schema, ref_table, ref_column FROM inferred_fks "
+            "WHERE cache_key = ? AND lower(table_name) = lower(?) ORDER BY column_name",
+            (cache_key, table),
+        ).fetchall()
+
+    def store_inferred_fks(self, cache_key: str, rows: List[tuple]):
+        """Replace the schema's inferred foreign keys with (table, column, ref_schema, ref_table, ref_column) rows."""
+        now = time.time()
+        self.db.execute("DELETE FROM inferred_fks WHERE cache_key = ?", (cache_key,))
+        self.db.executemany(
+            "INSERT OR REPLACE INTO inferred_fks (cache_key, table_name, column_name, ref_schema, ref_table, "
+            "ref_column, confirmed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(cache_key, *row, now) for row in rows],
+        )
+        self.db.commit()
+
+
+def load_name_features(index, limit: int):
+    """Warm a name_matching.NameFeatureIndex from the cache file (silently skipped if unavailable)."""
+    if not cache_enabled() or limit <= 0:
+        return
+    try:
+        cache = CatalogCache()
+        try:
+            rows = cache.load_name_features(feature_signature(), min(limit, index.max_entries))
+        finally:
+            cache.close()
+    except (sqlite3.Error, OSError, ValueError):
+        return
+    index.load_rows(rows)
+
+
+def store_name_features(index):
+    """Persist the entries of a NameFeatureIndex used since its last flush."""
+    if not cache_enabled():
+        return
+    rows = index.take_used()
+    if not rows:
+        return
+    try:
+        cache = CatalogCache()
+        try:
+            cache.store_name_features(feature_signature(), rows, index.max_entries)
+        finally:
+            cache.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def fetch_stamps(conn, db_type: str, schema: str, tables: Optional[List[str]] = None) -> Dict[str, str]:
+    """{table_name: stamp} for the schema (or just `tables`) - a single cheap catalog query."""
+    sql = MSSQL_STAMPS_SQL if db_type == 'mssql' else PG_STAMPS_SQL
+    return {name: str(stamp) for name, stamp in query_catalog(conn, db_type, sql, schema, tables)}
+
+
+def cached_catalog(conn, db_type: str, schema: Optional[str] = None, tables: Optional[List[str]] = None,
+                   max_age: Optional[float] = None, cache: Optional[CatalogCache] = None) -> Catalog:
+    """
+    Drop-in replacement for catalog.load_catalog that serves unchanged tables from
+    the on-disk cache and re-reads only new or changed ones.
+    """
+    schema = schema or DEFAULT_SCHEMAS[db_type]
+    if not cache_enabled():
+        return load_catalog(conn, db_type, schema, tables)
+    if max_age is None:
+        max_age = float(os.environ.get('CATALOG_CACHE_MAX_AGE', '0') or 0)
+
+    own_cache = cache is None
+    cache = cache or CatalogCache()
+    try:
+        cache_key = f"{db_type}|{connection_identity(conn, db_type)}|{schema}"
+        cached = cache.load(cache_key)
+
+        # recently validated tables are trusted as-is (partial requests only:
+        # a whole-schema request must also learn about new and dropped tables)
+        if tables is not None and max_age > 0:
+            by_lower = {name.lower(): name for name in cached}
+            hits = [by_lower.get(t.lower()) for t in tables]
+            now = time.time()
+            if all(h and now - cached[h][1] < max_age for h in hits):
+                return Catalog(db_type, schema, {h: cached[h][2] for h in hits})
+
+        stamps = fetch_stamps(conn, db_type, schema, tables)
+        changed = [name for name, stamp in stamps.items() if name not in cached or cached[name][0] != stamp]
+        unchanged = [name for name in stamps if name not in changed]
+        if tables is None:
+            dropped = [name for name in cached if name not in stamps]
+            if dropped:
+                cache.evict(cache_key, dropped)
+
+        result = Catalog(db_type, schema, {name: cached[name][2] for name in unchanged})
+        if changed:
+            fresh = load_catalog(conn, db_type, schema, tables=changed)
+            cache.store(cache_key, {name: (stamps[name], info) for name, info in fresh.tables.items()})
+            result.tables.update(fresh.tables)
+        if unchanged:
+            cache.touch(cache_key, unchanged)
+        result.tables = {name: result.tables[name] for name in sorted(result.tables, key=str.lower)}
+        return result
+    finally:
+        if own_cache:
+            cache.close()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+checksum_diff.py
+
+Hierarchical (Merkle-style) checksum comparison of a MSSQL table and its PostgreSQL
+target, for daily verification over a slow link.
+
+Instead of shipping rows, each database hashes its own rows and returns one
+(row count, checksum) pair per key-range bucket:
+
+    row text  = the mapped columns rendered to the same canonical text on both sides
+    row hash  = first 4 bytes of MD5(row text as UTF-8), as an unsigned integer
+                (HASHBYTES on MSSQL, md5() on PostgreSQL)
+    bucket    = COUNT(*), SUM(row hash) GROUP BY (key - lo) / width
+
+Buckets whose (count, sum) agree are done. Differing buckets are split again
+(FANOUT sub-buckets) until they hold at most LEAF_ROWS rows; only those leaves are
+pulled and diffed row by row with data_diff, so the transfer scales with the size
+of the discrepancy rather than the table.
+
+The checksum is only a filter: leaves are decided by data_diff's exact comparison.
+Where the two servers cannot render a value identically (floats beyond 6 decimals,
+non-ASCII text on SQL Server < 2019 without UTF-8 collations, differing numeric
+scales) a bucket merely looks different and gets pulled - never a wrong result.
+
+Requirements: a single integer key column (the primary key by default); SQL Server
+2016+ (DATEDIFF_BIG). Table pairs and column mappings come from the auto-mapping
+reports, as in data_diff.py.
+
+Usage:
+    python checksum_diff.py --mssql dbo.TBL_EVENTMASTER --pg public.event_master [--mapping report.xlsx]
+    python checksum_diff.py --mapping Batch_AutoMapping.xlsx        # every pair in a batch report
+"""
+
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from db_config import print_header, get_output_path
+from db_session import get_mssql_connection, get_postgres_connection
+from catalog import ColumnInfo, TableInfo
+from catalog_cache import cached_catalog
+from data_diff import (
+    DiffResult,
+    compared_columns,
+    diff_tables,
+    format_details,
+    key_pairs,
+    load_column_mapping,
+    load_table_mappings,
+    resolve_mapping,
+    suggest_column_mapping,
+)
+from export_writers import make_writer
+from key_ranges import INTEGER_TYPES, key_bounds
+
+FANOUT = 32          # sub-buckets per differing bucket
+LEAF_ROWS = 2_000    # buckets this small are diffed row by row
+NULL_TEXT = '\\N'    # rendering of NULL inside the row text
+
+UTF8_COLLATION = 'Latin1_General_100_BIN2_UTF8'
+
+
+# -------------------------
+# Canonical row text, pushed down
+# -------------------------
+def _mssql_text(col: ColumnInfo, trim: bool) -> str:
+    c, t = f"[{col.name}]", col.data_type
+    if t in ('tinyint', 'smallint', 'int', 'bigint', 'bit', 'decimal', 'numeric'):
+        expr = f"CONVERT(varchar(50), {c})"
+    elif t in ('money', 'smallmoney'):
+        expr = f"CONVERT(varchar(50), {c}, 2)"
+    elif t in ('float', 'real'):
+        expr = f"CONVERT(varchar(50), CAST({c} AS decimal(38, 6)))"
+    elif t == 'date':
+        expr = f"CONVERT(char(10), {c}, 23)"
+    elif t in ('datetime', 'smalldatetime'):
+        # datetime ticks are 1/300 s; migrated values carry milliseconds
+        expr = f"CONVERT(varchar(20), DATEDIFF_BIG(microsecond, CAST('19700101' AS datetime2), CAST({c} AS datetime2(3))))"
+    elif t == 'datetime2':
+        expr = f"CONVERT(varchar(20), DATEDIFF_BIG(microsecond, CAST('19700101' AS datetime2), {c}))"
+    elif t == 'datetimeoffset':
+        expr = f"CONVERT(varchar(20), DATEDIFF_BIG(microsecond, CAST('19700101' AS datetimeoffset), {c}))"
+    elif t == 'time':
+        expr = f"CONVERT(varchar(20), DATEDIFF_BIG(microsecond, CAST('00:00' AS time), {c}))"
+    elif t == 'uniqueidentifier':
+        expr = f"LOWER(CONVERT(char(36), {c}))"
+    elif t in ('binary', 'varbinary', 'image', 'timestamp', 'rowversion'):
+        expr = f"LOWER(CONVERT(varchar(max), CONVERT(varbinary(max), {c}), 2))"
+    elif t in ('hierarchyid', 'geometry', 'geography'):
+        expr = f"{c}.ToString()"
+    elif t in ('char', 'nchar', 'varchar', 'nvarchar'):
+        expr = f"RTRIM({c})" if trim else c
+    else:
+        expr = f"CONVERT(nvarchar(max), {c})"
+    return f"ISNULL(CONVERT(nvarchar(max), {expr}), N'{NULL_TEXT}')"
+
+
+def _pg_text(col: ColumnInfo, trim: bool) -> str:
+    c, t = f'"{col.name}"', col.data_type
+    if t == 'boolean':
+        expr = f"CASE WHEN {c} THEN '1' ELSE '0' END"
+    elif t in ('real', 'double precision'):
+        expr = f"CAST({c} AS numeric(38, 6))::text"
+    elif t == 'date':
+        expr = f"to_char({c}, 'YYYY-MM-DD')"
+    elif t in ('timestamp without time zone', 'timestamp with time zone', 'time without time zone'):
+        expr = f"round(extract(epoch from {c}) * 1000000)::bigint::text"
+    elif t == 'bytea':
+        expr = f"encode({c}, 'hex')"
+    elif t in ('character', 'character varying', 'text') and trim:
+        expr = f"rtrim({c})"
+    else:
+        expr = f"{c}::text"
+    return f"COALESCE({expr}, '{NULL_TEXT}')"
+
+
+def _needs_trim(m: ColumnInfo, p: ColumnInfo) -> bool:
+    return bool({m.data_type, p.data_type} & {'char', 'nchar', 'character'})
+
+
+def mssql_row_hash(pairs: List[Tuple[ColumnInfo, ColumnInfo]], utf8: bool) -> str:
+    parts = []
+    for m, p in pairs:
+        parts.append(_mssql_text(m, _needs_trim(m, p)))
+        parts.append("NCHAR(31)")
+    text = f"CONCAT({', '.join(parts[:-1])}, N'')"
+    if utf8:
+        text = f"CAST({text} COLLATE {UTF8_COLLATION} AS varchar(max))"
+    else:
+        # without UTF-8 collations non-ASCII text hashes differently: those buckets get pulled
+        text = f"CAST({text} AS varchar(max))"
+    return f"CONVERT(bigint, SUBSTRING(HASHBYTES('MD5', {text}), 1, 4))"
+
+
+def pg_row_hash(pairs: List[Tuple[ColumnInfo, ColumnInfo]]) -> str:
+    text = f"concat_ws(chr(31), {', '.join(_pg_text(p, _needs_trim(m, p)) for m, p in pairs)})"
+    return f"('x' || substr(md5({text}), 1, 8))::bit(32)::bigint"
+
+
+def bucket_query(db_type: str, table: TableInfo, key: ColumnInfo, row_hash: str,
+                 lo: int, hi: int, width: int) -> str:
+    """(bucket, row count, checksum) for lo <= key < hi, bucket = (key - lo) // width."""
+    if db_type == 'mssql':
+        k, source = f"[{key.name}]", f"[{table.schema}].[{table.name}]"
+        return (f"SELECT (k - {lo}) / {width}, COUNT_BIG(*), SUM(h) "
+                f"FROM (SELECT CONVERT(bigint, {k}) AS k, {row_hash} AS h FROM {source} "
+                f"WHERE {k} >= {lo} AND {k} < {hi}) x GROUP BY (k - {lo}) / {width}")
+    k, source = f'"{key.name}"', f'"{table.schema}"."{table.name}"'
+    return (f"SELECT (k - {lo}) / {width}, count(*), sum(h) "
+            f"FROM (SELECT {k}::bigint AS k, {row_hash} AS h FROM {source} "
+            f"WHERE {k} >= {lo} AND {k} < {hi}) x GROUP BY 1")
+
+
+def _fetch_buckets(conn, sql: str) -> Dict[int, Tuple[int, int]]:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        return {int(b): (int(n), int(s or 0)) for b, n, s in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def mssql_supports_utf8(conn) -> bool:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT CONVERT(int, SERVERPROPERTY('ProductMajorVersion'))")
+        return int(cursor.fetchone()[0] or 0) >= 15
+    except Exception:
+        return False
+    finally:
+        cursor.close()
+
+
+# -------------------------
+# Recursive comparison
+# -------------------------
+@dataclass
+class ChecksumStats:
+    source_rows: int = 0
+    target_rows: int = 0
+    bucket_queries: int = 0
+    buckets_compared: int = 0
+    buckets_differing: int = 0
+    leaves: int = 0
+    rows_pulled: int = 0
+
+
+def checksum_compare(mssql_conn, pg_conn, m_info: TableInfo, p_info: TableInfo,
+                     mapping: List[Tuple[ColumnInfo, ColumnInfo]], key: Tuple[ColumnInfo, ColumnInfo],
+                     on_diff=None, fanout: int = FANOUT, leaf_rows: int = LEAF_ROWS,
+                     utf8: bool = None) -> Tuple[DiffResult, ChecksumStats]:
+    """
+    Compare two tables by bucket checksums, recursing into differing buckets and
+    diffing rows only at the leaves. Both databases are queried concurrently.
+    """
+    m_key, p_key = key
+    if m_key.data_type not in INTEGER_TYPES or p_key.data_type not in INTEGER_TYPES:
+        raise ValueError(f"Checksum comparison needs an integer key; {m_key.name} is {m_key.data_type}. "
+                         f"Use data_diff.py for this table.")
+    if utf8 is None:
+        utf8 = mssql_supports_utf8(mssql_conn)
+
+    pairs = compared_columns(mapping, [key])
+    m_hash = mssql_row_hash(pairs, utf8)
+    p_hash = pg_row_hash(pairs)
+    result, stats = DiffResult(), ChecksumStats()
+
+    m_lo, m_hi = key_bounds(mssql_conn, 'mssql', m_info.schema, m_info.name, m_key.name)
+    p_lo, p_hi = key_bounds(pg_conn, 'postgres', p_info.schema, p_info.name, p_key.name)
+    bounds = [int(v) for v in (m_lo, m_hi, p_lo, p_hi) if v is not None]
+    if not bounds:
+        return result, stats
+    lo, hi = min(bounds), max(bounds) + 1
+
+    def leaf(a: int, b: int):
+        stats.leaves += 1
+        before = result.source_rows + result.target_rows
+        diff_tables(mssql_conn, pg_conn, m_info, p_info, mapping, [key], on_diff, key_range=(a, b), result=result)
+        stats.rows_pulled += result.source_rows + result.target_rows - before
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        pending = [(lo, hi, True)]
+        while pending:
+            a, b, top = pending.pop(0)
+            width = max(1, -(-(b - a) // fanout))
+            m_future = pool.submit(_fetch_buckets, mssql_conn, bucket_query('mssql', m_info, m_key, m_hash, a, b, width))
+            p_buckets = _fetch_buckets(pg_conn, bucket_query('postgres', p_info, p_key, p_hash, a, b, width))
+            m_buckets = m_future.result()
+            stats.bucket_queries += 2
+            if top:
+                stats.source_rows = sum(n for n, _ in m_buckets.values())
+                stats.target_rows = sum(n for n, _ in p_buckets.values())
+            for bucket in sorted(set(m_buckets) | set(p_buckets)):
+                stats.buckets_compared += 1
+                m_sum, p_sum = m_buckets.get(bucket, (0, 0)), p_buckets.get(bucket, (0, 0))
+                if m_sum == p_sum:
+                    continue
+                stats.buckets_differing += 1
+                sub_lo = a + bucket * width
+                sub_hi = min(sub_lo + width, b)
+                if max(m_sum[0], p_sum[0]) <= leaf_rows or width <= 1:
+                    leaf(sub_lo, sub_hi)
+                else:
+                    pending.append((sub_lo, sub_hi, False))
+    finally:
+        pool.shutdown(wait=True)
+
+    # rows in matching buckets were never pulled: they matched
+    result.matched = stats.source_rows - result.missing - result.changed
+    result.source_rows, result.target_rows = stats.source_rows, stats.target_rows
+    return result, stats
+
+
+# -------------------------
+# Runner
+# -------------------------
+def _resolve_pair(mssql_conn, pg_conn, mssql_table: str, pg_table: str, pairs=None, key: List[str] = None):
+    from compare_tables_powerful_auto_mapping import split_qualified
+    m_schema, m_table = split_qualified(mssql_table, 'dbo')
+    p_schema, p_table = split_qualified(pg_table, 'public')
+    m_info = cached_catalog(mssql_conn, 'mssql', m_schema, tables=[m_table]).table(m_table)
+    p_info = cached_catalog(pg_conn, 'postgres', p_schema, tables=[p_table]).table(p_table)
+    if m_info is None:
+        raise ValueError(f"MSSQL table '{m_schema}.{m_table}' not found")
+    if p_info is None:
+        raise ValueError(f"PostgreSQL table '{p_schema}.{p_table}' not found")
+    if pairs is None:
+        pairs = suggest_column_mapping(m_info, p_info)
+    mapping = resolve_mapping(m_info, p_info, pairs)
+    keys = key_pairs(m_info, p_info, mapping, key)
+    if len(keys) != 1:
+        raise ValueError("Checksum comparison needs a single-column key; use data_diff.py for composite keys.")
+    return m_info, p_info, mapping, keys[0]
+
+
+def run_checksum_diff(mssql_table: str = None, pg_table: str = None, mapping_file: str = None,
+                      key: List[str] = None, output_file: str = None) -> List[dict]:
+    """
+    Checksum-compare one table pair, or every pair of a batch auto-mapping report when
+    no tables are given. Differences go to one xlsx/csv report; returns summary rows.
+    """
+    print_header("MSSQL -> PostgreSQL Checksum Compare")
+    if mssql_table and pg_table:
+        pairs = {(mssql_table, pg_table): load_column_mapping(mapping_file, mssql_table, pg_table) if mapping_file else None}
+    elif mapping_file:
+        pairs = load_table_mappings(mapping_file)
+        print(f"✓ {len(pairs)} table pairs read from {mapping_file}")
+    else:
+        raise ValueError("Give a table pair, or a batch auto-mapping report.")
+
+    if not output_file:
+        output_file = get_output_path(f"ChecksumDiff_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    fmt = 'csv' if output_file.lower().endswith('.csv') else 'xlsx'
+
+    mssql_conn = None
+    pg_conn = None
+    writer = None
+    summary = []
+    try:
+        mssql_conn = get_mssql_connection()
+        pg_conn = get_postgres_connection()
+        utf8 = mssql_supports_utf8(mssql_conn)
+        if not utf8:
+            print("  (SQL Server < 2019: non-ASCII text is verified at the leaves only)")
+
+        writer = make_writer(fmt, output_file, 'ChecksumDiff', 'mssql')
+        writer.open([(c,) for c in ('MSSQL_TABLE', 'PG_TABLE', 'STATUS', 'KEY', 'CHANGED_COLUMNS', 'DETAILS')])
+
+        for (m_name, p_name), column_pairs in pairs.items():
+            print(f"\n{m_name} -> {p_name}")
+            try:
+                m_info, p_info, mapping, key_pair = _resolve_pair(mssql_conn, pg_conn, m_name, p_name, column_pairs, key)
+            except ValueError as e:
+                print(f"  ✗ Skipped: {e}")
+                summary.append({'MSSQL_TABLE': m_name, 'PG_TABLE': p_name, 'STATUS': f'skipped: {e}'})
+                continue
+            columns = [m.name for m, _ in compared_columns(mapping, [key_pair])]
+
+            def on_diff(status, key_values, changed, source_values, target_values, m_name=m_name, p_name=p_name):
+                details = format_details(columns, changed, source_values, target_values) if changed else ''
+                writer.write_rows([(m_name, p_name, status, str(key_values[0]),
+                                    ', '.join(columns[i] for i in changed), details)])
+
+            started = datetime.now()
+            result, stats = checksum_compare(mssql_conn, pg_conn, m_info, p_info, mapping, key_pair, on_diff, utf8=utf8)
+            elapsed = (datetime.now() - started).total_seconds()
+            status = 'identical' if result.differences == 0 else 'different'
+            print(f"  {'✓' if status == 'identical' else '✗'} {stats.source_rows:,} / {stats.target_rows:,} rows, "
+                  f"{stats.buckets_differing} of {stats.buckets_compared} buckets differ, "
+                  f"{stats.rows_pulled:,} rows pulled in {elapsed:.1f}s")
+            if result.differences:
+                print(f"    missing in PG: {result.missing:,}   extra in PG: {result.extra:,}   changed: {result.changed:,}")
+            summary.append({
+                'MSSQL_TABLE': m_name, 'PG_TABLE': p_name, 'STATUS': status,
+                'MSSQL_ROWS': stats.source_rows, 'PG_ROWS': stats.target_rows,
+                'MISSING_IN_PG': result.missing, 'EXTRA_IN_PG': result.extra, 'CHANGED': result.changed,
+                'ROWS_PULLED': stats.rows_pulled, 'BUCKET_QUERIES': stats.bucket_queries,
+            })
+
+        writer.close({
+            "compared_at": datetime.now().isoformat(),
+            "table_pairs": len(summary),
+            "different": sum(1 for s in summary if s['STATUS'] == 'different'),
+            "summary": "; ".join(f"{s['MSSQL_TABLE']}->{s['PG_TABLE']}: {s['STATUS']}" for s in summary),
+        })
+        writer = None
+        print(f"\nReport saved: {output_file}")
+        return summary
+    finally:
+        if writer is not None:
+            # compare failed or was interrupted before the report was closed
+            writer.abort()
+        for conn in (mssql_conn, pg_conn):
+            try:
+                if conn:
+                    conn.close()
+            except Exception:
+                pass
+
+
+def main():
+    print("\n" + "=" * 80)
+    mapping_file = input("Auto-mapping report (xlsx/csv), or Enter to suggest mappings: ").strip() or None
+    m_input = input("MSSQL table (schema.table), or Enter for every pair in a batch report: ").strip()
+    p_input = input("PostgreSQL table (schema.table): ").strip() if m_input else ''
+    print("=" * 80)
+    try:
+        run_checksum_diff(m_input or None, p_input or None, mapping_file)
+    except Exception as e:
+        print("✗ Failed:", e)
+        traceback.print_exc()
+
+
+def cli(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Checksum-bucket comparison MSSQL -> PostgreSQL")
+    parser.add_argument('--mssql', help="MSSQL table (schema.table)")
+    parser.add_argument('--pg', help="PostgreSQL table (schema.table)")
+    parser.add_argument('--mapping', help="auto-mapping report; a batch report compares every pair in it")
+    parser.add_argument('--key', help="MSSQL key column (default: primary key)")
+    parser.add_argument('--output', help="report path (.xlsx or .csv)")
+    args = parser.parse_args(argv)
+
+    if not (args.mssql or args.pg or args.mapping):
+        main()
+        return
+    if bool(args.mssql) != bool(args.pg):
+        parser.error("--mssql and --pg go together")
+    summary = run_checksum_diff(args.mssql, args.pg, args.mapping, [args.key] if args.key else None, args.output)
+    raise SystemExit(1 if any(s['STATUS'] != 'identical' for s in summary) else 0)
+
+
+if __name__ == '__main__':
+    cli()
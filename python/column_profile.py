@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+column_profile.py
+
+Column profiles for table_details.py: per column NULL %, distinct count, min/max,
+maximum length and the most frequent values - for MSSQL and PostgreSQL tables.
+
+Instead of a handful of queries per column, all columns of a table are profiled
+by one aggregate query (a single scan):
+
+    SELECT COUNT(*),
+           SUM(CASE WHEN c IS NULL THEN 1 ELSE 0 END), <distinct>(c), MIN(c), MAX(c), MAX(<length>(c)),
+           ...                                                   -- every column
+    FROM t [TABLESAMPLE ...]
+
+ - distinct : APPROX_COUNT_DISTINCT on MSSQL (SQL Server 2019+; older servers fall
+              back to COUNT(DISTINCT)), COUNT(DISTINCT) on PostgreSQL
+ - min/max  : on the column's own type, so numbers and dates order naturally;
+              bit/boolean as 0/1, uuid/json/xml/... as text
+ - length   : characters for text columns, bytes for binary columns
+ Binary columns are only counted (NULLs and length).
+
+Top values need a GROUP BY, so they take one more query per table: GROUPING SETS
+with one set per column, and ROW_NUMBER() keeps the top_values most frequent
+non-NULL values of every column on the server.
+
+With sample_percent both queries read TABLESAMPLE ... REPEATABLE (the same pages)
+and every count describes the sample. Very wide tables are split into queries of
+MAX_COLUMNS_PER_QUERY columns (select lists are limited on both servers).
+
+profile_tables() profiles many tables concurrently, one pooled connection per worker.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from catalog import ColumnInfo, TableInfo
+from data_diff import select_expr, canonical_value
+from db_utils import fetchall, quote_ident, sampled_table
+from type_compat import type_family
+
+TOP_VALUES = 5
+PROFILE_WORKERS = 4
+SAMPLE_SEED = 42
+MAX_COLUMNS_PER_QUERY = 300   # 5 select items per column; PG allows 1664, MSSQL 4096
+TOP_VALUE_CHARS = 4000
+
+PROFILE_COLUMNS = ['DATABASE', 'SCHEMA', 'TABLE', 'COLUMN', 'DATA_TYPE', 'ROWS', 'NULLS', 'NULL_PCT',
+                   'DISTINCT', 'MIN', 'MAX', 'MAX_LENGTH', 'TOP_VALUES', 'SAMPLE_PCT']
+
+# MSSQL LOB types that neither aggregate nor group; their (max) equivalents do
+MSSQL_LOB_CASTS = {'text': 'varchar(max)', 'ntext': 'nvarchar(max)', 'xml': 'nvarchar(max)'}
+# PostgreSQL types without MIN/MAX (or equality) that are profiled as text
+PG_TEXT_TYPES = {'json', 'jsonb', 'xml'}
+
+# APPROX_COUNT_DISTINCT needs SQL Server 2019; cleared on the first server without it
+_mssql_approx = True
+_approx_lock = threading.Lock()
+
+
+@dataclass
+class ColumnProfile:
+    name: str
+    data_type: str
+    rows: int = 0
+    nulls: int = 0
+    distinct: Optional[int] = None
+    min: Optional[str] = None
+    max: Optional[str] = None
+    max_length: Optional[int] = None
+    top_values: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def null_pct(self) -> float:
+        return round(100.0 * self.nulls / self.rows, 2) if self.rows else 0.0
+
+
+@dataclass
+class TableProfile:
+    db_type: str
+    schema: str
+    table: str
+    rows: int = 0
+    sample_percent: Optional[float] = None
+    columns: List[ColumnProfile] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+# -------------------------
+# Queries
+# -------------------------
+def _value_expr(db_type: str, col: ColumnInfo) -> Optional[str]:
+    """Expression profiled for distinct / min / max / top values; None for binary columns."""
+    family = type_family(db_type, col.data_type)
+    if family == 'binary':
+        return None
+    name = quote_ident(db_type, col.name)
+    if db_type == 'mssql':
+        if col.data_type in MSSQL_LOB_CASTS:
+            return f"CAST({name} AS {MSSQL_LOB_CASTS[col.data_type]})"
+        if family == 'boolean':
+            return f"CAST({name} AS tinyint)"
+        return select_expr(db_type, col)
+    if family == 'boolean':
+        return f"{name}::int"
+    if family in (None, 'uuid') or col.data_type in PG_TEXT_TYPES:
+        return f"{name}::text"
+    return select_expr(db_type, col)
+
+
+def _length_expr(db_type: str, col: ColumnInfo, value: Optional[str]) -> Optional[str]:
+    family = type_family(db_type, col.data_type)
+    name = quote_ident(db_type, col.name)
+    if db_type == 'mssql':
+        if family == 'binary':
+            return f"DATALENGTH({name})"
+        return f"LEN({value})" if family == 'string' else None
+    if family == 'binary':
+        return f"octet_length({name})"
+    return f"char_length(({value})::text)" if family == 'string' else None
+
+
+def _text_expr(db_type: str, col: ColumnInfo, value: str) -> str:
+    """Top values as text (dates in ISO form on MSSQL)."""
+    if db_type == 'mssql':
+        if type_family(db_type, col.data_type) in ('datetime', 'date', 'time'):
+            return f"CONVERT(nvarchar({TOP_VALUE_CHARS}), {value}, 121)"
+        return f"CAST({value} AS nvarchar({TOP_VALUE_CHARS}))"
+    return f"({value})::text"
+
+
+def profile_query(db_type: str, table: TableInfo, columns: List[ColumnInfo],
+                  sample_percent: Optional[float] = None, approx: bool = True) -> str:
+    """One aggregate query: COUNT(*), then nulls, distinct, min, max, max length per column."""
+    items = ['COUNT(*)']
+    for col in columns:
+        value = _value_expr(db_type, col)
+        length = _length_expr(db_type, col, value)
+        items.append(f"SUM(CASE WHEN {quote_ident(db_type, col.name)} IS NULL THEN 1 ELSE 0 END)")
+        if value is None:
+            items += ['NULL', 'NULL', 'NULL']
+        else:
+            distinct = (f"APPROX_COUNT_DISTINCT({value})" if db_type == 'mssql' and approx
+                        else f"COUNT(DISTINCT {value})")
+            items += [distinct, f"MIN({value})", f"MAX({value})"]
+        items.append(f"MAX({length})" if length else 'NULL')
+    source = sampled_table(db_type, table.schema, table.name, sample_percent, SAMPLE_SEED)
+    return f"SELECT {', '.join(items)} FROM {source}"
+
+
+def top_values_query(db_type: str, table: TableInfo, columns: List[ColumnInfo], top: int = TOP_VALUES,
+                     sample_percent: Optional[float] = None) -> Optional[str]:
+    """(column index, value text, count) rows: the `top` most frequent values of every column."""
+    values = [(k, _value_expr(db_type, col)) for k, col in enumerate(columns)]
+    values = [(k, v) for k, v in values if v is not None]
+    if not values or top <= 0:
+        return None
+    inner = ', '.join(f"{v} AS v{k}" for k, v in values)
+    sets = ', '.join(f"(v{k})" for k, _ in values)
+    col_no = ' '.join(f"WHEN GROUPING(v{k}) = 0 THEN {k}" for k, _ in values)
+    text = ' '.join(f"WHEN GROUPING(v{k}) = 0 THEN {_text_expr(db_type, columns[k], f'v{k}')}" for k, _ in values)
+    source = sampled_table(db_type, table.schema, table.name, sample_percent, SAMPLE_SEED)
+    return (f"SELECT col_no, value, n FROM ("
+            f"SELECT col_no, value, n, ROW_NUMBER() OVER (PARTITION BY col_no ORDER BY n DESC, value) AS rn "
+            f"FROM (SELECT CASE {col_no} END AS col_no, CASE {text} END AS value, COUNT(*) AS n "
+            f"FROM (SELECT {inner} FROM {source}) s GROUP BY GROUPING SETS ({sets})) g "
+            f"WHERE value IS NOT NULL) r WHERE rn <= {int(top)} ORDER BY col_no, rn")
+
+
+# -------------------------
+# Profiling
+# -------------------------
+def _int(v) -> Optional[int]:
+    return None if v is None else int(v)
+
+
+def _aggregate(conn, db_type: str, table: TableInfo, columns: List[ColumnInfo],
+               sample_percent: Optional[float]) -> tuple:
+    global _mssql_approx
+    if db_type == 'mssql' and _mssql_approx:
+        try:
+            return fetchall(conn, profile_query(db_type, table, columns, sample_percent, approx=True))[0]
+        except Exception as e:
+            if 'APPROX_COUNT_DISTINCT' not in str(e).upper():
+                raise
+            with _approx_lock:
+                _mssql_approx = False
+            print("  APPROX_COUNT_DISTINCT not available on this server, counting distinct values exactly")
+    return fetchall(conn, profile_query(db_type, table, columns, sample_percent, approx=False))[0]
+
+
+def profile_table(conn, db_type: str, table: TableInfo, sample_percent: Optional[float] = None,
+                  top: int = TOP_VALUES) -> TableProfile:
+    """Profile every column of a table (one aggregate query + one top-values query per column chunk)."""
+    started = time.perf_counter()
+    result = TableProfile(db_type, table.schema, table.name, sample_percent=sample_percent)
+    for start in range(0, len(table.columns), MAX_COLUMNS_PER_QUERY):
+        columns = table.columns[start:start + MAX_COLUMNS_PER_QUERY]
+        row = _aggregate(conn, db_type, table, columns, sample_percent)
+        result.rows = int(row[0] or 0)
+        chunk = []
+        for k, col in enumerate(columns):
+            nulls, distinct, lo, hi, length = row[1 + 5 * k:6 + 5 * k]
+            chunk.append(ColumnProfile(col.name, col.data_type, rows=result.rows, nulls=_int(nulls) or 0,
+                                       distinct=_int(distinct), min=canonical_value(lo), max=canonical_value(hi),
+                                       max_length=_int(length)))
+        sql = top_values_query(db_type, table, columns, top, sample_percent) if result.rows else None
+        if sql:
+            for col_no, value, n in fetchall(conn, sql):
+                chunk[int(col_no)].top_values.append((value, int(n)))
+        result.columns += chunk
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def profile_tables(requests: List[Tuple[str, TableInfo]], sample_percent: Optional[float] = None,
+                   top: int = TOP_VALUES, workers: int = PROFILE_WORKERS) -> List[TableProfile]:
+    """Profiles for (db_type, TableInfo) requests, run concurrently; same order as `requests`."""
+    from db_session import connection, pool_size
+
+    def run(request):
+        db_type, table = request
+        try:
+            with connection(db_type) as conn:
+                profile = profile_table(conn, db_type, table, sample_percent, top)
+            print(f"  ✓ {table.schema}.{table.name}: {len(profile.columns)} columns, "
+                  f"{profile.rows:,} rows ({profile.seconds:.1f}s)")
+            return profile
+        except Exception as e:
+            print(f"  ✗ {table.schema}.{table.name}: {e}")
+            return TableProfile(db_type, table.schema, table.name, sample_percent=sample_percent, error=str(e))
+
+    # one executor per database: both profile at the same time, neither exceeds its pool
+    db_types = sorted({db_type for db_type, _ in requests})
+    executors = {db_type: ThreadPoolExecutor(max_workers=max(1, min(workers, pool_size(db_type))))
+                 for db_type in db_types}
+    try:
+        futures = [executors[request[0]].submit(run, request) for request in requests]
+        return [f.result() for f in futures]
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+
+# -------------------------
+# Report
+# -------------------------
+def format_top_values(top_values: List[Tuple[str, int]]) -> str:
+    return '; '.join(f"{value} ({n:,})" for value, n in top_values)
+
+
+def profile_frame(profiles: List[TableProfile]) -> 'pd.DataFrame':
+    import pandas as pd
+    records = []
+    for p in profiles:
+        for c in p.columns:
+            records.append({
+                'DATABASE': p.db_type, 'SCHEMA': p.schema, 'TABLE': p.table, 'COLUMN': c.name,
+                'DATA_TYPE': c.data_type, 'ROWS': c.rows, 'NULLS': c.nulls, 'NULL_PCT': c.null_pct,
+                'DISTINCT': c.distinct, 'MIN': c.min, 'MAX': c.max, 'MAX_LENGTH': c.max_length,
+                'TOP_VALUES': format_top_values(c.top_values), 'SAMPLE_PCT': p.sample_percent,
+            })
+    df = pd.DataFrame(records, columns=PROFILE_COLUMNS)
+    for col in ('DISTINCT', 'MAX_LENGTH'):
+        df[col] = df[col].astype('Int64')
+    df['SAMPLE_PCT'] = df['SAMPLE_PCT'].astype('float64')
+    return df
+
+
+def write_profile_sheet(report, df: 'pd.DataFrame'):
+    """Column_Profile sheet of an excel_report.ExcelReport."""
+    from excel_report import INT_FORMAT
+    report.frame_sheet('Column_Profile', df, widths=[10, 12, 35, 35, 25, 14, 12, 10, 12, 30, 30, 12, 60, 12],
+                       freeze='E2', formats={col: INT_FORMAT for col in (6, 7, 9, 12)})
+
+
+def write_profile(df: 'pd.DataFrame', output_file: str):
+    """Profile report as .xlsx (Column_Profile sheet) or .parquet."""
+    import os
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    if output_file.lower().endswith('.parquet'):
+        from export_writers import require_pyarrow
+        require_pyarrow()
+        df.to_parquet(output_file, index=False, compression='zstd')
+        return
+    from excel_report import ExcelReport
+    with ExcelReport(output_file) as report:
+        write_profile_sheet(report, df)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+column_scoring.py
+
+Batch (vectorized) column-name scoring engine for the auto-mapper.
+
+`name_matching.score_pair` scores one PG/MSSQL column pair
+at a time. For wide tables that means tens of thousands of pure-Python calls, each
+re-normalizing, re-tokenizing and re-building n-gram sets for names it has already
+seen. This module takes every column name's features from the shared index
+(name_matching.NameFeatureIndex) once and then builds the whole PG x MSSQL score
+matrix with NumPy:
+
+ - exact / underscore-removed matches   -> id equality on interned normalized forms
+ - token overlap and 3-gram jaccard     -> intersection counts from 0/1 incidence
+                                           matrices over the items both sides share
+                                           (one float32 matrix product each)
+ - token partial / abbreviation score   -> computed once per *distinct token pair*
+                                           and max-reduced per column pair
+ - numeric suffix bonus                 -> suffix id equality
+ - sequence ratio on the full names     -> one batched similarity.ratios call over
+                                           the distinct pairs (difflib or indel kernel)
+
+Every component follows the exact arithmetic of `score_pair`, so the resulting
+scores (and the detail dicts rebuilt by `ScoreMatrix.detail`) are identical to the
+per-pair implementation.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from name_matching import name_features
+from similarity import ratios
+
+# Same weights as score_pair
+W_TOKEN_OVERLAP = 0.35
+W_TOKEN_SUB = 0.20
+W_SEQ = 0.18
+W_NGRAM = 0.12
+W_SUBSTR = 0.10
+NUM_BONUS = 0.05
+
+
+# -------------------------
+# Featurization
+# -------------------------
+class ColumnFeatures:
+    """Features of a list of column names, taken from the shared name feature index."""
+
+    def __init__(self, names: Sequence[str]):
+        self.names = [str(n) for n in names]
+        self.valid = np.array([bool(n) for n in self.names], dtype=bool)
+        feats = [name_features(n) for n in self.names]
+        self.norms = [f.norm for f in feats]
+        self.compact = [f.compact for f in feats]
+        self.tokens = [f.tokens for f in feats]
+        self.ngrams = [f.ngrams for f in feats]
+        self.suffixes = [f.suffix for f in feats]
+
+
+def _intern_ids(values: List, vocab: Dict) -> np.ndarray:
+    """Map hashable values to dense integer ids (None -> -1)."""
+    out = np.empty(len(values), dtype=np.int64)
+    for i, v in enumerate(values):
+        if v is None:
+            out[i] = -1
+        else:
+            out[i] = vocab.setdefault(v, len(vocab))
+    return out
+
+
+def _incidence(sets: List, vocab: Dict) -> np.ndarray:
+    """
+    0/1 incidence matrix (rows = names, cols = vocabulary entries; items outside
+    vocab are skipped). float32 keeps the product on BLAS at half the memory of
+    float64, and stays exact for counts below 2^24.
+    """
+    mat = np.zeros((len(sets), len(vocab)), dtype=np.float32)
+    for i, s in enumerate(sets):
+        for item in s:
+            k = vocab.get(item)
+            if k is not None:
+                mat[i, k] = 1.0
+    return mat
+
+
+def _set_intersections(a_sets: List, b_sets: List):
+    """Return (|A_i & B_j| matrix, |A_i| vector, |B_j| vector)."""
+    a_len = np.array([len(s) for s in a_sets], dtype=np.float64)
+    b_len = np.array([len(s) for s in b_sets], dtype=np.float64)
+    # only items found on both sides can intersect
+    shared = set().union(*a_sets) & set().union(*b_sets)
+    if not shared:
+        return np.zeros((len(a_sets), len(b_sets))), a_len, b_len
+    vocab = {item: k for k, item in enumerate(shared)}
+    inter = _incidence(a_sets, vocab) @ _incidence(b_sets, vocab).T
+    return inter.astype(np.float64), a_len, b_len
+
+
+def _token_subscores(pg_tokens: List[List[str]], m_tokens: List[List[str]]) -> np.ndarray:
+    """Max token-pair score for every column pair (0.0 when either side has no tokens)."""
+    out = np.zeros((len(pg_tokens), len(m_tokens)), dtype=np.float64)
+    pg_vocab = {}
+    m_vocab = {}
+    for toks in pg_tokens:
+        for t in toks:
+            pg_vocab.setdefault(t, len(pg_vocab))
+    for toks in m_tokens:
+        for t in toks:
+            m_vocab.setdefault(t, len(m_vocab))
+    if not pg_vocab or not m_vocab:
+        return out
+
+    # score every distinct token pair once: 1.0 equal, 0.8 contained, else 0.6 * ratio
+    pair = np.empty((len(pg_vocab), len(m_vocab)), dtype=np.float64)
+    fuzzy = []
+    for bt, j in m_vocab.items():
+        for at, i in pg_vocab.items():
+            if at == bt:
+                pair[i, j] = 1.0
+            elif at in bt or bt in at:
+                pair[i, j] = 0.8
+            else:
+                fuzzy.append((i, j, at, bt))
+    if fuzzy:
+        rows, cols, a_toks, b_toks = zip(*fuzzy)
+        pair[list(rows), list(cols)] = ratios(a_toks, b_toks) * 0.6
+
+    pg_rows = [i for i, toks in enumerate(pg_tokens) if toks]
+    m_rows = [j for j, toks in enumerate(m_tokens) if toks]
+    if not pg_rows or not m_rows:
+        return out
+
+    # max over each pg column's tokens, then over each mssql column's tokens
+    pg_flat = [pg_vocab[t] for i in pg_rows for t in pg_tokens[i]]
+    pg_starts = np.cumsum([0] + [len(pg_tokens[i]) for i in pg_rows[:-1]])
+    per_pg = np.maximum.reduceat(pair[pg_flat], pg_starts, axis=0)
+    m_flat = [m_vocab[t] for j in m_rows for t in m_tokens[j]]
+    m_starts = np.cumsum([0] + [len(m_tokens[j]) for j in m_rows[:-1]])
+    per_pair = np.maximum.reduceat(per_pg[:, m_flat], m_starts, axis=1)
+    out[np.ix_(pg_rows, m_rows)] = per_pair
+    return out
+
+
+def _seq_ratios(pg_norms: List[str], m_norms: List[str], skip: np.ndarray) -> np.ndarray:
+    """Sequence ratio for every pair not masked by `skip`, computed once per distinct pair."""
+    out = np.zeros((len(pg_norms), len(m_norms)), dtype=np.float64)
+    rows, cols = np.nonzero(~skip)
+    if not rows.size:
+        return out
+    distinct = {}
+    slots = [distinct.setdefault((pg_norms[i], m_norms[j]), len(distinct))
+             for i, j in zip(rows.tolist(), cols.tolist())]
+    values = ratios([a for a, _ in distinct], [b for _, b in distinct])
+    out[rows, cols] = values[slots]
+    return out
+
+
+# -------------------------
+# Score matrix
+# -------------------------
+class ScoreMatrix:
+    """
+    Full PG x MSSQL score matrix plus the component matrices needed to rebuild
+    the `score_pair` detail dict for any cell on demand.
+    """
+
+    def __init__(self, pg_names: List[str], m_names: List[str], scores: np.ndarray, components: Dict[str, np.ndarray]):
+        self.pg_names = pg_names
+        self.m_names = m_names
+        self.scores = scores
+        self.components = components
+
+    @property
+    def shape(self):
+        return self.scores.shape
+
+    def detail(self, i: int, j: int) -> Dict:
+        """Rebuild the exact detail dict `score_pair` returns for (pg_names[i], m_names[j])."""
+        c = self.components
+        if not c['valid'][i, j] or not c['candidate'][i, j]:
+            return {}
+        if c['exact'][i, j]:
+            return {'method': 'Exact', 'components': {'exact': 1.0}}
+        if c['underscore'][i, j]:
+            return {'method': 'UnderscoreRemoved', 'components': {'underscore_removed': 0.98}}
+
+        tok_overlap = float(c['tok_overlap'][i, j])
+        ng_jacc = float(c['ngram_jacc'][i, j])
+        seq_ratio = float(c['seq_ratio'][i, j])
+        token_subscore = float(c['token_subscore'][i, j])
+        substr_flag = 0.75 if c['substr'][i, j] else 0
+        num_bonus = NUM_BONUS if c['num_bonus'][i, j] else 0.0
+
+        if tok_overlap >= 0.8 or token_subscore >= 0.95:
+            method = f"TokenStrong({tok_overlap:.2f})"
+        elif tok_overlap >= 0.4:
+            method = f"Token({tok_overlap:.2f})"
+        elif ng_jacc >= 0.45:
+            method = f"NGram({ng_jacc:.2f})"
+        elif seq_ratio >= 0.75:
+            method = f"Fuzzy({seq_ratio:.2f})"
+        elif substr_flag:
+            method = "Substring"
+        else:
+            method = f"FuzzyLow({seq_ratio:.2f})"
+
+        return {
+            'tok_overlap': tok_overlap,
+            'ngram_jaccard': ng_jacc,
+            'seq_ratio': seq_ratio,
+            'token_subscore': token_subscore,
+            'method': method,
+            'components': {
+                'token_overlap': tok_overlap,
+                'token_subscore': token_subscore,
+                'seq_ratio': seq_ratio,
+                'ngram_jacc': ng_jacc,
+                'substr_flag': substr_flag,
+                'num_bonus': num_bonus,
+            },
+        }
+
+
+def score_matrix(pg_names: Sequence[str], m_names: Sequence[str], candidates=None) -> ScoreMatrix:
+    """
+    Score every (pg, mssql) column pair at once; equivalent to calling score_pair on each.
+
+    With `candidates` (name_blocking.CandidatePairs) the per-pair Python work
+    (substring checks, difflib) runs only on candidate pairs; the others score 0.
+    """
+    pg = ColumnFeatures(pg_names)
+    ms = ColumnFeatures(m_names)
+    shape = (len(pg.names), len(ms.names))
+
+    valid = pg.valid[:, None] & ms.valid[None, :]
+    if candidates is None:
+        candidate = np.ones(shape, dtype=bool)
+    else:
+        candidate = np.zeros(shape, dtype=bool)
+        for i, cols in enumerate(candidates.rows):
+            candidate[i, cols] = True
+
+    norm_vocab = {}
+    pg_norm_ids = _intern_ids(pg.norms, norm_vocab)
+    m_norm_ids = _intern_ids(ms.norms, norm_vocab)
+    exact = pg_norm_ids[:, None] == m_norm_ids[None, :]
+
+    compact_vocab = {}
+    pg_compact_ids = _intern_ids(pg.compact, compact_vocab)
+    m_compact_ids = _intern_ids(ms.compact, compact_vocab)
+    underscore = (pg_compact_ids[:, None] == m_compact_ids[None, :]) & ~exact
+
+    fuzzy = valid & candidate & ~exact & ~underscore
+
+    # token overlap: |A & B| / ((|A| + |B|) / 2)
+    tok_inter, tok_a, tok_b = _set_intersections(pg.tokens, ms.tokens)
+    avg_len = (tok_a[:, None] + tok_b[None, :]) / 2.0
+    has_tokens = (tok_a[:, None] > 0) & (tok_b[None, :] > 0)
+    tok_overlap = np.zeros(shape, dtype=np.float64)
+    np.divide(tok_inter, avg_len, out=tok_overlap, where=has_tokens)
+
+    # numeric suffix
+    suffix_vocab = {}
+    pg_suffix_ids = _intern_ids(pg.suffixes, suffix_vocab)
+    m_suffix_ids = _intern_ids(ms.suffixes, suffix_vocab)
+    num_bonus = (pg_suffix_ids[:, None] >= 0) & (pg_suffix_ids[:, None] == m_suffix_ids[None, :])
+
+    # substring in either direction
+    substr = np.zeros(shape, dtype=bool)
+    for i, j in zip(*(ix.tolist() for ix in np.nonzero(fuzzy))):
+        a = pg.norms[i]
+        b = ms.norms[j]
+        if a in b or b in a:
+            substr[i, j] = True
+
+    # 3-gram jaccard: |A & B| / |A | B|
+    ng_inter, ng_a, ng_b = _set_intersections(pg.ngrams, ms.ngrams)
+    union = ng_a[:, None] + ng_b[None, :] - ng_inter
+    has_ngrams = (ng_a[:, None] > 0) & (ng_b[None, :] > 0) & (union > 0)
+    ngram_jacc = np.zeros(shape, dtype=np.float64)
+    np.divide(ng_inter, union, out=ngram_jacc, where=has_ngrams)
+
+    seq_ratio = _seq_ratios(pg.norms, ms.norms, ~fuzzy)
+    token_subscore = _token_subscores(pg.tokens, ms.tokens)
+
+    base = (
+        W_TOKEN_OVERLAP * tok_overlap
+        + W_TOKEN_SUB * token_subscore
+        + W_SEQ * seq_ratio
+        + W_NGRAM * ngram_jacc
+        + W_SUBSTR * substr.astype(np.float64)
+    )
+    base = np.minimum(1.0, base + np.where(num_bonus, NUM_BONUS, 0.0))
+
+    # Python's round() (correctly rounded) rather than np.round, to match score_pair exactly
+    scores = np.zeros(shape, dtype=np.float64)
+    rows, cols = np.nonzero(fuzzy)
+    if rows.size:
+        scores[rows, cols] = [round(x, 4) for x in base[rows, cols].tolist()]
+    scores[valid & underscore] = 0.98
+    scores[valid & exact] = 1.0
+    scores[~candidate] = 0.0
+
+    components = {
+        'valid': valid,
+        'candidate': candidate,
+        'exact': exact,
+        'underscore': underscore,
+        'tok_overlap': tok_overlap,
+        'token_subscore': token_subscore,
+        'seq_ratio': seq_ratio,
+        'ngram_jacc': ngram_jacc,
+        'substr': substr,
+        'num_bonus': num_bonus,
+    }
+    return ScoreMatrix(pg.names, ms.names, scores, components)
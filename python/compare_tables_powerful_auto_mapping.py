@@ -1,284 +1,214 @@
 #!/usr/bin/env python3
 """
-compare_tables_powerful_auto_mapping_fixed.py
-
-Fix for AttributeError: 'MergedCell' object has no attribute 'column_letter'
-that occurred when writing/styling the Excel workbook.
-
-What I changed:
-- Replaced uses of `cell.column_letter` (which raises on MergedCell objects)
-  with a small, safe helper that extracts the column letters from `cell.coordinate`.
-  This works for normal Cell and MergedCell objects.
-- Applied the helper everywhere the code previously referenced `cell.column_letter`.
-- Kept all other logic and scoring identical to the previous powerful mapper.
-
-Save/replace your existing compare_tables_powerful_auto_mapping.py with this file
-(or run this file directly). It should no longer raise the MergedCell AttributeError.
+compare_tables_powerful_auto_mapping.py
+
+Suggests a MSSQL column for every PostgreSQL column of a migrated table pair.
+
+ - Scoring    : every PG x MSSQL column pair gets a name score (name_matching.py),
+                per pair (engine='python') or as one matrix (column_scoring.py).
+                Blocking (name_blocking.py) skips pairs without a shared name key,
+                type compatibility (type_compat.py) prunes and weights the rest,
+                and with --values sampled-value overlap (value_sketches.py) is
+                added on top.
+ - Assignment : greedy best-first, or the optimal one-to-one assignment with the
+                highest total score (mapping_assignment.py).
+ - Modes      : interactive for one table pair; batch (--pairs file or
+                --auto-pairs via table_matcher.py) maps a whole schema in a
+                process pool from one catalog read per schema.
+ - Output     : the comparison and suggested mappings as an .xlsx report
+                (excel_report.py); batch mode writes one combined .xlsx or .csv.
 """
 
 import os
-import re
-import difflib
-import math
 import traceback
 from typing import List, Tuple, Dict
-import pandas as pd
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from db_config import get_mssql_connection, get_postgres_connection, print_header, get_output_path
+from db_config import print_header, get_output_path
+from catalog_async import fetch_catalogs, fetch_table_pair
 
 # -------------------------
-# Matching utilities
+# Matching utilities (name_matching.py)
 # -------------------------
-RE_NON_ALNUM_UNDERSCORE = re.compile(r'[^0-9a-zA-Z_]+')
-RE_DIGITS = re.compile(r'\d+$')
-RE_COL_LETTERS = re.compile(r'^([A-Z]+)')  # for extracting column letters from coordinate
-
-COMMON_PREFIXES = ('is_', 'has_', 'the_', 'tbl_', 'fk_')
-COMMON_SUFFIXES = ('_flag', '_yn')
-
-# small mapping of token synonyms that often occur across systems
-TOKEN_EQUIV = {
-    'desc': 'description',
-    'descr': 'description',
-    'code': 'code',
-    'cd': 'code',
-    'id': 'id',
-    'pk': 'id',
-    'uid': 'id',
-    'name': 'name',
-    'nm': 'name',
-    'created': 'created',
-    'createdby': 'created_by',
-    'created_on': 'created_date',
-    'modified': 'modified',
-    'modifiedby': 'modified_by',
-    'deleted': 'deleted',
-    'company': 'company',
-    'client': 'client',
-    'sap': 'sap',
-    'inco': 'incoterm',
-}
-
-def normalize(name: str) -> str:
-    """Lowercase, replace non-alnum with underscore, collapse repeated underscores."""
-    if not name:
-        return ""
-    s = RE_NON_ALNUM_UNDERSCORE.sub('_', name.strip()).lower()
-    s = re.sub(r'__+', '_', s)
-    s = s.strip('_')
-    return s
-
-def remove_underscores(s: str) -> str:
-    return s.replace('_', '') if s else ''
-
-def strip_common_affixes(s: str) -> str:
-    if not s:
-        return ''
-    for p in COMMON_PREFIXES:
-        if s.startswith(p):
-            s = s[len(p):]
-    for suf in COMMON_SUFFIXES:
-        if s.endswith(suf):
-            s = s[:-len(suf)]
-    return s
-
-def split_tokens(name: str) -> List[str]:
-    """Split on underscores, digits boundaries and camelCase; return normalized tokens."""
-    if not name:
-        return []
-    s = normalize(name)
-    # split underscores
-    parts = [p for p in s.split('_') if p]
-    tokens = []
-    for part in parts:
-        # split alpha/digit boundaries
-        subparts = re.findall(r'[A-Za-z]+|\d+', part)
-        for sp in subparts:
-            tokens.append(TOKEN_EQUIV.get(sp, sp))
-    return tokens
-
-def token_overlap_score(a_tokens: List[str], b_tokens: List[str]) -> float:
-    if not a_tokens or not b_tokens:
-        return 0.0
-    set_a = set(a_tokens)
-    set_b = set(b_tokens)
-    inter = set_a.intersection(set_b)
-    avg_len = (len(set_a) + len(set_b)) / 2.0
-    if avg_len == 0:
-        return 0.0
-    return len(inter) / avg_len
-
-def ngram_set(s: str, n: int = 3) -> set:
-    s2 = re.sub(r'[^a-z0-9]', '', s.lower())
-    if len(s2) < n:
-        return {s2} if s2 else set()
-    return {s2[i:i+n] for i in range(len(s2)-n+1)}
-
-def jaccard(a: set, b: set) -> float:
-    if not a or not b:
-        return 0.0
-    inter = len(a.intersection(b))
-    union = len(a.union(b))
-    return inter / union if union > 0 else 0.0
+# re-exported for scripts that import them from here
+from name_matching import (
+    RE_NON_ALNUM_UNDERSCORE,
+    RE_DIGITS,
+    COMMON_PREFIXES,
+    COMMON_SUFFIXES,
+    TOKEN_EQUIV,
+    normalize,
+    remove_underscores,
+    strip_common_affixes,
+    split_tokens,
+    token_overlap_score,
+    ngram_set,
+    jaccard,
+    score_pair,
+    interpret_note,
+    feature_persistence,
+    flush_feature_index,
+    load_feature_index,
+    persisted_features,
+)
+from similarity import KERNELS, get_kernel, set_kernel
+
+# content matching: weight of sampled-value overlap, and the overlap that makes a pair a candidate
+W_VALUE = 0.5
+VALUE_CANDIDATE_MIN = 0.3
 
 # -------------------------
-# Composite scoring
+# Mapping orchestration
 # -------------------------
-def score_pair(pg_name: str, m_name: str) -> Tuple[float, Dict]:
-    detail = {}
-    if not pg_name or not m_name:
-        return 0.0, detail
-
-    pg_norm = normalize(pg_name)
-    m_norm = normalize(m_name)
-
-    # early exacts
-    if pg_norm == m_norm:
-        detail['method'] = 'Exact'
-        detail['components'] = {'exact': 1.0}
-        return 1.0, detail
-
-    if remove_underscores(pg_norm) == remove_underscores(m_norm):
-        detail['method'] = 'UnderscoreRemoved'
-        detail['components'] = {'underscore_removed': 0.98}
-        return 0.98, detail
-
-    # tokens
-    pg_tokens = split_tokens(pg_name)
-    m_tokens = split_tokens(m_name)
-    tok_overlap = token_overlap_score(pg_tokens, m_tokens)
-    detail['tok_overlap'] = tok_overlap
-
-    # numeric-suffix awareness
-    pg_num = RE_DIGITS.search(pg_norm)
-    m_num = RE_DIGITS.search(m_norm)
-    num_bonus = 0.0
-    if pg_num and m_num and pg_num.group() == m_num.group():
-        num_bonus = 0.05
-
-    # substring / prefix / suffix
-    substr_flag = 0
-    if pg_norm in m_norm or m_norm in pg_norm:
-        substr_flag = 0.75
-
-    # n-gram jaccard (3-gram)
-    pg_ngrams = ngram_set(pg_norm, 3)
-    m_ngrams = ngram_set(m_norm, 3)
-    ng_jacc = jaccard(pg_ngrams, m_ngrams)
-    detail['ngram_jaccard'] = ng_jacc
-
-    # difflib ratio (sequence)
-    seq_ratio = difflib.SequenceMatcher(None, pg_norm, m_norm).ratio()
-    detail['seq_ratio'] = seq_ratio
-
-    # token partial / abbreviation handling:
-    token_subscore = 0.0
-    for at in pg_tokens:
-        for bt in m_tokens:
-            if at == bt:
-                token_subscore = max(token_subscore, 1.0)
-            elif at in bt or bt in at:
-                token_subscore = max(token_subscore, 0.8)
-            else:
-                token_subscore = max(token_subscore, difflib.SequenceMatcher(None, at, bt).ratio() * 0.6)
-
-    detail['token_subscore'] = token_subscore
-
-    # Weighted combination
-    w_token_overlap = 0.35
-    w_token_sub = 0.20
-    w_seq = 0.18
-    w_ngram = 0.12
-    w_substr = 0.10
-    base_score = (
-        w_token_overlap * tok_overlap
-        + w_token_sub * token_subscore
-        + w_seq * seq_ratio
-        + w_ngram * ng_jacc
-        + w_substr * (1.0 if substr_flag else 0.0)
-    )
-
-    base_score = min(1.0, base_score + num_bonus)
-    score = round(base_score, 4)
-
-    if tok_overlap >= 0.8 or token_subscore >= 0.95:
-        method = f"TokenStrong({tok_overlap:.2f})"
-    elif tok_overlap >= 0.4:
-        method = f"Token({tok_overlap:.2f})"
-    elif ng_jacc >= 0.45:
-        method = f"NGram({ng_jacc:.2f})"
-    elif seq_ratio >= 0.75:
-        method = f"Fuzzy({seq_ratio:.2f})"
-    elif substr_flag:
-        method = "Substring"
+def _pair_scores(pg_cols: List[str], m_cols: List[str], engine: str, blocking: bool = True, compat=None,
+                 value_sim=None):
+    """
+    Return (scores, detail_of) for every PG x MSSQL pair.
+
+    engine='python' calls score_pair per pair; engine='vectorized' builds the whole
+    matrix at once with column_scoring (identical scores, much faster on wide tables).
+    With blocking only pairs sharing a name key (name_blocking) are scored; the
+    rest score 0. With a type compatibility matrix (type_compat) incompatible pairs
+    are pruned too, and the remaining scores are scaled by type_weight. With a value
+    similarity matrix (value_sketches) pairs whose sampled values overlap are
+    scored even without a shared name key, and every candidate score is raised by
+    W_VALUE * overlap of the way to 1. Pairs blocking or the type check dropped
+    stay at 0 whatever their values.
+    """
+    import numpy as np
+    from name_blocking import CandidatePairs, candidate_pairs
+
+    candidates = None
+    if blocking:
+        candidates = candidate_pairs(pg_cols, m_cols)
+        if value_sim is not None:
+            candidates = candidates.union(value_sim >= VALUE_CANDIDATE_MIN)
+    if compat is not None:
+        # incompatible types are never a mapping - unless it is the same column with a changed type
+        from name_matching import name_features
+        if candidates is None:
+            candidates = CandidatePairs.full(len(pg_cols), len(m_cols))
+        allowed = compat > 0
+        pg_compact = [name_features(p).compact for p in pg_cols]
+        m_compact = [name_features(m).compact for m in m_cols]
+        candidates = candidates.filter(lambda i, j: allowed[i, j] or pg_compact[i] == m_compact[j])
+
+    if engine == 'vectorized':
+        from column_scoring import score_matrix
+        matrix = score_matrix(pg_cols, m_cols, candidates=candidates)
+        scores, detail_of = matrix.scores, matrix.detail
+    elif engine == 'python':
+        scores = np.zeros((len(pg_cols), len(m_cols)), dtype=np.float64)
+        details = {}
+        if candidates is None:
+            pairs = ((i, j) for i in range(len(pg_cols)) for j in range(len(m_cols)))
+        else:
+            pairs = iter(candidates)
+        for i, j in pairs:
+            sc, detail = score_pair(pg_cols[i], m_cols[j])
+            scores[i, j] = sc
+            details[(i, j)] = detail
+        detail_of = lambda i, j: details.get((i, j), {})
     else:
-        method = f"FuzzyLow({seq_ratio:.2f})"
-
-    detail['method'] = method
-    detail['components'] = {
-        'token_overlap': tok_overlap,
-        'token_subscore': token_subscore,
-        'seq_ratio': seq_ratio,
-        'ngram_jacc': ng_jacc,
-        'substr_flag': substr_flag,
-        'num_bonus': num_bonus,
-    }
-    return score, detail
-
-def interpret_note(score: float) -> str:
-    if score >= 0.95:
-        return "High-confidence match"
-    if score >= 0.75:
-        return "Probable match — please review"
-    if score >= 0.35:
-        return "Low confidence — manual review recommended"
-    return ""
+        raise ValueError(f"Unknown scoring engine: {engine!r} (expected 'python' or 'vectorized')")
+
+    if compat is None and value_sim is None:
+        return scores, detail_of
+
+    name_detail_of = detail_of
+    if value_sim is not None:
+        scores = scores + W_VALUE * value_sim * (1.0 - scores)
+    if compat is not None:
+        from type_compat import type_weight
+        scores = scores * type_weight(compat)
+    if candidates is not None:
+        # the value boost must not revive pruned pairs
+        keep = np.zeros(scores.shape, dtype=bool)
+        for i, cols in enumerate(candidates.rows):
+            keep[i, cols] = True
+        scores = np.where(keep, scores, 0.0)
+
+    def detail_of(i, j):
+        detail = name_detail_of(i, j)
+        if not detail:
+            return detail
+        detail = dict(detail)
+        if compat is not None:
+            detail['type_compat'] = float(compat[i, j])
+        if value_sim is not None and value_sim[i, j] > 0:
+            detail['value_overlap'] = float(value_sim[i, j])
+            detail['method'] = f"{detail.get('method', '')}+Values({value_sim[i, j]:.2f})"
+        return detail
+
+    return np.round(scores, 4), detail_of
+
+def _type_note(note: str, detail: dict, m_type, pg_type) -> str:
+    """Append the type change to a mapping note when the types are not the same family."""
+    if detail and detail.get('type_compat', 1.0) < 1.0:
+        return f"{note} (type {m_type} -> {pg_type})"
+    return note
+
+def suggest_mappings(pg_df: 'pd.DataFrame', mssql_df: 'pd.DataFrame', threshold: float = 0.35, one_to_one: bool = True,
+                     engine: str = 'python', assignment: str = 'greedy', blocking: bool = True,
+                     type_aware: bool = True, value_sketches: Tuple[dict, dict] = None):
+    """
+    Suggest a MSSQL column for every PG column.
+
+    engine     : 'python' (score_pair per pair) or 'vectorized' (column_scoring matrix)
+    assignment : with one_to_one, 'greedy' (best-first walk) or 'optimal'
+                 (Hungarian/Jonker-Volgenant, maximum total score) - see mapping_assignment
+    blocking   : score only candidate pairs sharing a token, 3-gram or exact form
+                 (name_blocking); False scores all pairs
+    type_aware : with DATA_TYPE / data_type columns in the frames, prune type-incompatible
+                 pairs and weight the scores by type compatibility (type_compat)
+    value_sketches : optional ({pg column: ColumnSketch}, {mssql column: ColumnSketch}) from
+                 value_sketches.py; sampled-value overlap is added to the name score
+    """
+    import numpy as np
+    from mapping_assignment import assign
 
-# -------------------------
-# Mapping orchestration
-# -------------------------
-def suggest_mappings(pg_df: pd.DataFrame, mssql_df: pd.DataFrame, threshold: float = 0.35, one_to_one: bool = True):
     pg_cols = [str(x) for x in pg_df['column_name'].tolist()]
     m_cols = [str(x) for x in mssql_df['COLUMN_NAME'].tolist()]
+    pg_types = dict(zip(pg_cols, pg_df['data_type'].tolist())) if 'data_type' in pg_df.columns else {}
+    m_types = dict(zip(m_cols, mssql_df['DATA_TYPE'].tolist())) if 'DATA_TYPE' in mssql_df.columns else {}
+
+    compat = None
+    if type_aware and pg_types and m_types:
+        from type_compat import compatibility_matrix
+        compat = compatibility_matrix([pg_types[p] for p in pg_cols], [m_types[m] for m in m_cols])
+
+    value_sim = None
+    if value_sketches is not None:
+        from value_sketches import similarity_matrix
+        pg_sketches, m_sketches = value_sketches
+        value_sim = similarity_matrix([pg_sketches.get(p) for p in pg_cols], [m_sketches.get(m) for m in m_cols])
 
     # Precompute all pair scores
-    all_scores = {}
-    for p in pg_cols:
-        all_scores[p] = {}
-        for m in m_cols:
-            sc, detail = score_pair(p, m)
-            all_scores[p][m] = (sc, detail)
+    scores, detail_of = _pair_scores(pg_cols, m_cols, engine, blocking, compat, value_sim)
 
     chosen_m_for_p = {p: ('', 0.0, {}) for p in pg_cols}
 
     if one_to_one:
-        flat = []
-        for p in pg_cols:
-            for m in m_cols:
-                sc, det = all_scores[p][m]
-                if sc > 0:
-                    flat.append((p, m, sc, det))
-        flat.sort(key=lambda x: x[2], reverse=True)
-        used_m = set()
-        for p, m, sc, det in flat:
-            if chosen_m_for_p[p][1] >= sc:
-                continue
-            if m in used_m:
-                continue
-            chosen_m_for_p[p] = (m, sc, det)
-            used_m.add(m)
+        # pairs below threshold are pruned before solving
+        pairs = assign(scores, threshold, method=assignment)
+        used_j = sorted(set(pairs.values()))
+        for i, p in enumerate(pg_cols):
+            j = pairs.get(i)
+            if j is None:
+                # unmatched: report the best still-unused candidate for diagnostics
+                if not m_cols:
+                    continue
+                row = scores[i].copy()
+                row[used_j] = 0.0
+                j = int(np.argmax(row))
+                if row[j] <= 0:
+                    continue
+            chosen_m_for_p[p] = (m_cols[j], float(scores[i, j]), detail_of(i, j))
     else:
-        for p in pg_cols:
-            best_m = ''
-            best_sc = 0.0
-            best_det = {}
-            for m in m_cols:
-                sc, det = all_scores[p][m]
-                if sc > best_sc:
-                    best_sc = sc
-                    best_m = m
-                    best_det = det
-            chosen_m_for_p[p] = (best_m, best_sc, best_det)
+        for i, p in enumerate(pg_cols):
+            if not m_cols:
+                continue
+            j = int(np.argmax(scores[i]))
+            if scores[i, j] > 0:
+                chosen_m_for_p[p] = (m_cols[j], float(scores[i, j]), detail_of(i, j))
 
     mapping_rows = []
     diagnostics = {}
@@ -290,7 +220,7 @@ def suggest_mappings(pg_df: pd.DataFrame, mssql_df: pd.DataFrame, threshold: flo
                 'PG_COLUMN_NAME': p,
                 'MSSQL_COLUMN_NAME': m,
                 'SUGGESTED_SCORE': round(sc, 2),
-                'NOTES': interpret_note(sc),
+                'NOTES': _type_note(interpret_note(sc), det, m_types.get(m), pg_types.get(p)),
                 '_MATCH_METHOD': det.get('method', '') if det else ''
             })
         else:
@@ -304,179 +234,232 @@ def suggest_mappings(pg_df: pd.DataFrame, mssql_df: pd.DataFrame, threshold: flo
     return mapping_rows, diagnostics
 
 # -------------------------
-# Excel output (fixed for MergedCell)
+# Excel output (excel_report.py)
+# -------------------------
+def write_excel(output_file: str, comp_df: 'pd.DataFrame', mapping_rows: List[dict]):
+    import pandas as pd
+    from excel_report import ExcelReport, SCORE_FORMAT
+    df_map = pd.DataFrame(mapping_rows, columns=['PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES', '_MATCH_METHOD'])
+    with ExcelReport(output_file) as report:
+        # Comparison: mssql | separator | postgres
+        ws_comp = report.sheet('Comparison', widths=[30, 20, 3, 30, 20])
+        ws_comp.append(['mssql', None, None, 'postgres', None], ['title', 'title', 'separator', 'title', 'title'])
+        ws_comp.merge('A1:B1')
+        ws_comp.merge('D1:E1')
+        ws_comp.append(['COLUMN_NAME', 'DATA_TYPE', '', 'column_name', 'data_type'],
+                       ['header', 'header', 'separator', 'header', 'header'])
+        ws_comp.rows(comp_df.itertuples(index=False, name=None), ['cell', 'cell', 'separator', 'cell', 'cell'])
+
+        # AutoMapping: scores centered with 2 decimals, notes wrapped
+        ws_map = report.sheet('AutoMapping', widths=[40, 40, 12, 60])
+        ws_map.append(['Auto mapping (PG -> MSSQL)', None, None, None], 'title')
+        ws_map.merge('A1:D1')
+        ws_map.frame(df_map, styles=['cell', 'cell', 'cell_center', 'cell_top'], formats={'C': SCORE_FORMAT},
+                     columns=['PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES'])
+
+    print("Saved Excel:", os.path.exists(output_file), " Size:", os.path.getsize(output_file) if os.path.exists(output_file) else None)
+
+# -------------------------
+# Batch mode (whole schema, non-interactive)
 # -------------------------
-from openpyxl import load_workbook
+BATCH_MAPPING_COLUMNS = ['MSSQL_TABLE', 'PG_TABLE', 'PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES', '_MATCH_METHOD']
+
+def split_qualified(name: str, default_schema: str) -> Tuple[str, str]:
+    """Return (schema, table) for 'schema.table' or 'table'."""
+    name = (name or '').strip()
+    if '.' in name:
+        schema, table = [p.strip() for p in name.split('.', 1)]
+        return schema, table
+    return default_schema, name
+
+def load_table_pairs(path: str) -> List[Tuple[str, str]]:
+    """
+    Read (mssql_table, pg_table) pairs from a CSV or YAML file.
 
-def _col_letters_from_cell(cell) -> str:
+    CSV  : header with 'mssql_table' and 'pg_table' columns (case-insensitive)
+    YAML : a list of {mssql: ..., pg: ...} items, optionally under a 'pairs' key
+    Table names may be schema-qualified.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.yml', '.yaml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Reading YAML pair lists requires PyYAML (pip install pyyaml), or use a CSV file.")
+        with open(path, encoding='utf-8') as fh:
+            data = yaml.safe_load(fh) or []
+        if isinstance(data, dict):
+            data = data.get('pairs', [])
+        pairs = []
+        for item in data:
+            item = {str(k).lower(): v for k, v in item.items()}
+            pairs.append((str(item.get('mssql') or item.get('mssql_table')).strip(),
+                          str(item.get('pg') or item.get('pg_table')).strip()))
+        return pairs
+
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str).fillna('')
+    cols = {c.strip().lower(): c for c in df.columns}
+    if 'mssql_table' not in cols or 'pg_table' not in cols:
+        raise ValueError(f"{path}: expected 'mssql_table' and 'pg_table' columns, got {list(df.columns)}")
+    return [(m.strip(), p.strip()) for m, p in zip(df[cols['mssql_table']], df[cols['pg_table']]) if m.strip() and p.strip()]
+
+def derive_table_pairs(m_tables: Dict[str, List[str]], p_tables: Dict[str, List[str]],
+                       min_score: float = 0.5) -> List[Tuple[str, str]]:
     """
-    Safely extract column letters from any cell-like object using its coordinate.
-    Works for normal Cell and MergedCell.
+    Pair tables automatically with table_matcher (table-name score blended with
+    column-set similarity); {table: [columns]} in, one-to-one (mssql, pg) pairs out.
     """
-    coord = getattr(cell, "coordinate", None)
-    if not coord:
-        return ""
-    m = RE_COL_LETTERS.match(coord)
-    return m.group(1) if m else ""
+    from table_matcher import match_tables, best_table_pairs
+    return best_table_pairs(match_tables(m_tables, p_tables), min_score=min_score)
+
+def table_columns_frame(table, db_type: str) -> 'pd.DataFrame':
+    """Column name/type frame of a catalog TableInfo, with each database's usual column headers."""
+    import pandas as pd
+    headers = ['COLUMN_NAME', 'DATA_TYPE'] if db_type == 'mssql' else ['column_name', 'data_type']
+    return pd.DataFrame([(c.name, c.data_type) for c in table.columns], columns=headers)
+
+def _map_table_pair(task):
+    """Process-pool worker: map one table pair from already-fetched column lists."""
+    m_name, p_name, m_table, p_table, threshold, engine, assignment, blocking, type_aware, kernel, persist, sketches = task
+    set_kernel(kernel)
+    if persist:
+        load_feature_index()
+    df_mssql = table_columns_frame(m_table, 'mssql')
+    df_pg = table_columns_frame(p_table, 'postgres')
+    mapping_rows, _ = suggest_mappings(df_pg, df_mssql, threshold=threshold, one_to_one=True,
+                                       engine=engine, assignment=assignment, blocking=blocking,
+                                       type_aware=type_aware, value_sketches=sketches)
+    for r in mapping_rows:
+        r['MSSQL_TABLE'] = m_name
+        r['PG_TABLE'] = p_name
+    # every worker writes back the names it featurized (no-op without persistence)
+    flush_feature_index()
+    return m_name, p_name, len(df_mssql), len(df_pg), mapping_rows
+
+def run_batch(pairs_file: str = None, auto_pairs: bool = False, output_file: str = None,
+              mssql_schema: str = 'dbo', pg_schema: str = 'public', workers: int = None,
+              threshold: float = 0.35, engine: str = 'vectorized', assignment: str = 'optimal',
+              blocking: bool = True, type_aware: bool = True, values: bool = False, sample_rows: int = None):
+    """
+    Map every table pair in one go: read both catalogs once, run suggest_mappings
+    for each pair in a process pool and write one combined report (.xlsx or .csv).
+    """
+    import pandas as pd
+    from concurrent.futures import ProcessPoolExecutor
+    from datetime import datetime
+
+    print_header("Batch PG->MSSQL Auto-Mapping")
+    if pairs_file:
+        raw_pairs = load_table_pairs(pairs_file)
+        pairs = [(split_qualified(m, mssql_schema), split_qualified(p, pg_schema)) for m, p in raw_pairs]
+        print(f"✓ {len(pairs)} table pairs read from {pairs_file}")
+    elif not auto_pairs:
+        raise ValueError("Either a pair list file or auto_pairs=True is required.")
+    else:
+        pairs = None
+
+    m_schemas = sorted({m[0] for m, _ in pairs}) if pairs else [mssql_schema]
+    p_schemas = sorted({p[0] for _, p in pairs}) if pairs else [pg_schema]
+
+    print("\n[1/3] Reading MSSQL and PostgreSQL catalogs...")
+    # every schema of both databases is read concurrently
+    catalogs = fetch_catalogs([('mssql', schema, None) for schema in m_schemas] +
+                              [('postgres', schema, None) for schema in p_schemas])
+    m_catalogs = dict(zip(m_schemas, catalogs[:len(m_schemas)]))
+    p_catalogs = dict(zip(p_schemas, catalogs[len(m_schemas):]))
+    print(f"✓ MSSQL: {sum(len(c.tables) for c in m_catalogs.values())} tables, "
+          f"PostgreSQL: {sum(len(c.tables) for c in p_catalogs.values())} tables")
+
+    if pairs is None:
+        m_tables = m_catalogs[mssql_schema].columns_by_table()
+        p_tables = p_catalogs[pg_schema].columns_by_table()
+        pairs = [((mssql_schema, m), (pg_schema, p)) for m, p in derive_table_pairs(m_tables, p_tables)]
+        print(f"✓ {len(pairs)} table pairs derived from table names and column sets")
+
+    tasks = []
+    for (ms, mt), (ps, pt) in pairs:
+        m_info = m_catalogs[ms].table(mt)
+        p_info = p_catalogs[ps].table(pt)
+        if not m_info or not p_info or not m_info.columns or not p_info.columns:
+            missing = f"{ms}.{mt}" if not (m_info and m_info.columns) else f"{ps}.{pt}"
+            print(f"✗ Skipping {ms}.{mt} -> {ps}.{pt}: {missing} not found or has no visible columns")
+            continue
+        tasks.append((f"{ms}.{m_info.name}", f"{ps}.{p_info.name}", m_info, p_info, threshold, engine, assignment,
+                      blocking, type_aware, get_kernel(), feature_persistence(), None))
+
+    if values and tasks:
+        # every table is sampled once (cached on disk), even if it appears in several pairs
+        from value_sketches import SAMPLE_ROWS, fetch_sketches
+        unique = {}
+        for t in tasks:
+            unique.setdefault(('mssql', t[2].schema, t[2].name), ('mssql', t[2]))
+            unique.setdefault(('postgres', t[3].schema, t[3].name), ('postgres', t[3]))
+        fetched = fetch_sketches(list(unique.values()), sample_rows=sample_rows or SAMPLE_ROWS)
+        by_table = dict(zip(unique, fetched))
+        tasks = [t[:-1] + ((by_table[('postgres', t[3].schema, t[3].name)], by_table[('mssql', t[2].schema, t[2].name)]),)
+                 for t in tasks]
+
+    print(f"\n[2/3] Mapping {len(tasks)} table pairs...")
+    all_rows = []
+    summary = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for m_name, p_name, n_m, n_p, rows in pool.map(_map_table_pair, tasks, chunksize=4):
+            matched = [r for r in rows if r['MSSQL_COLUMN_NAME'] != '-']
+            summary.append({
+                'MSSQL_TABLE': m_name,
+                'PG_TABLE': p_name,
+                'MSSQL_COLUMNS': n_m,
+                'PG_COLUMNS': n_p,
+                'MAPPED': len(matched),
+                'UNMAPPED': len(rows) - len(matched),
+                'AVG_SCORE': round(sum(r['SUGGESTED_SCORE'] for r in matched) / len(matched), 2) if matched else 0,
+            })
+            all_rows.extend(rows)
+            print(f"  ✓ {m_name} -> {p_name}: {len(matched)}/{len(rows)} columns mapped")
 
-def write_excel(output_file: str, comp_df: pd.DataFrame, mapping_rows: List[dict]):
+    print("\n[3/3] Writing combined report...")
+    if not output_file:
+        output_file = get_output_path(f"Batch_AutoMapping_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
     os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
-    df_map = pd.DataFrame(mapping_rows, columns=['PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES', '_MATCH_METHOD'])
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        comp_df.to_excel(writer, sheet_name='Comparison', index=False, startrow=1)
-        df_map.to_excel(writer, sheet_name='AutoMapping', index=False, startrow=1, columns=['PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES'])
-        workbook = writer.book
-        ws_comp = writer.sheets['Comparison']
-        ws_map = writer.sheets['AutoMapping']
-
-        # styling
-        header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF', size=12)
-        col_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
-        col_font = Font(bold=True, size=11)
-        center = Alignment(horizontal='center', vertical='center')
-        thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-        # Comparison header
-        ws_comp['A1'] = 'mssql'
-        ws_comp['D1'] = 'postgres'
-        ws_comp.merge_cells('A1:B1')
-        ws_comp.merge_cells('D1:E1')
-        for c in ['A1','D1']:
-            ws_comp[c].fill = header_fill
-            ws_comp[c].font = header_font
-            ws_comp[c].alignment = center
-        # headers row 2
-        ws_comp['A2'] = 'COLUMN_NAME'
-        ws_comp['B2'] = 'DATA_TYPE'
-        ws_comp['C2'] = ''
-        ws_comp['D2'] = 'column_name'
-        ws_comp['E2'] = 'data_type'
-        for c in ['A2','B2','D2','E2']:
-            ws_comp[c].fill = col_fill
-            ws_comp[c].font = col_font
-            ws_comp[c].alignment = center
-        ws_comp.column_dimensions['A'].width = 30
-        ws_comp.column_dimensions['B'].width = 20
-        ws_comp.column_dimensions['C'].width = 3
-        ws_comp.column_dimensions['D'].width = 30
-        ws_comp.column_dimensions['E'].width = 20
-
-        max_rows = comp_df.shape[0]
-        # Use safe column extraction to avoid MergedCell.column_letter error
-        for row in ws_comp.iter_rows(min_row=1, max_row=max_rows + 2, min_col=1, max_col=5):
-            for cell in row:
-                col_letters = _col_letters_from_cell(cell)
-                if col_letters != 'C':
-                    cell.border = thin
-                    cell.alignment = Alignment(vertical='center')
-        # separator gray
-        gray_fill = PatternFill(start_color='F2F2F2', end_color='F2F2F2', fill_type='solid')
-        for r in range(1, max_rows + 3):
-            ws_comp[f'C{r}'].fill = gray_fill
-
-        # AutoMapping header
-        ws_map['A1'] = 'Auto mapping (PG -> MSSQL)'
-        ws_map.merge_cells('A1:D1')
-        ws_map['A1'].fill = header_fill
-        ws_map['A1'].font = header_font
-        ws_map['A1'].alignment = center
-
-        # column headers row2
-        headers = ['PG_COLUMN_NAME', 'MSSQL_COLUMN_NAME', 'SUGGESTED_SCORE', 'NOTES']
-        for i, h in enumerate(headers, start=1):
-            cell = ws_map.cell(row=2, column=i, value=h)
-            cell.fill = col_fill
-            cell.font = col_font
-            cell.alignment = center
-
-        ws_map.column_dimensions['A'].width = 40
-        ws_map.column_dimensions['B'].width = 40
-        ws_map.column_dimensions['C'].width = 12
-        ws_map.column_dimensions['D'].width = 60
-
-        map_rows = df_map.shape[0]
-        # Safe border/alignment loop for AutoMapping too
-        for row in ws_map.iter_rows(min_row=1, max_row=map_rows + 2, min_col=1, max_col=4):
-            for cell in row:
-                # extract col letters safely
-                col_letters = _col_letters_from_cell(cell)
-                cell.border = thin
-                if col_letters == 'D':
-                    cell.alignment = Alignment(wrap_text=True, vertical='top')
-                else:
-                    cell.alignment = Alignment(vertical='center')
-
-        # Ensure SUGGESTED_SCORE are numeric where present and formatted to 2 decimals
-        for row_idx in range(3, 3 + map_rows):
-            cell = ws_map.cell(row=row_idx, column=3)  # column C
-            if cell.value is not None and cell.value != '':
-                try:
-                    num = float(cell.value)
-                    cell.value = num
-                    cell.number_format = '0.00'
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                except ValueError:
-                    # leave as-is
-                    pass
-
-    print("Saved Excel:", os.path.exists(output_file), " Size:", os.path.getsize(output_file) if os.path.exists(output_file) else None)
+    df_map = pd.DataFrame(all_rows, columns=BATCH_MAPPING_COLUMNS)
+    df_summary = pd.DataFrame(summary, columns=['MSSQL_TABLE', 'PG_TABLE', 'MSSQL_COLUMNS', 'PG_COLUMNS', 'MAPPED', 'UNMAPPED', 'AVG_SCORE'])
+    if output_file.lower().endswith('.csv'):
+        df_map.to_csv(output_file, index=False)
+    else:
+        from excel_report import ExcelReport
+        with ExcelReport(output_file) as report:
+            report.frame_sheet('Summary', df_summary, widths=[40, 40, 15, 12, 10, 10, 10])
+            report.frame_sheet('AutoMapping', df_map, widths=[40, 40, 35, 35, 16, 45],
+                               columns=BATCH_MAPPING_COLUMNS[:-1])
+    print(f"✓ {len(summary)} table pairs, {len(df_map)} mapping rows saved to: {output_file}")
+    return output_file
 
 # -------------------------
 # Main CLI
 # -------------------------
-def main():
-    print_header("Powerful PG->MSSQL Auto-Mapping (fixed merged-cell handling)")
-    mssql_conn = None
-    pg_conn = None
+def run_single_pair(m_input: str, pg_table: str, threshold: float = 0.35, output_file: str = None,
+                    values: bool = False, sample_rows: int = None) -> str:
+    """
+    Side-by-side columns and suggested mappings for one table pair; returns the report path.
+    With values, sampled column contents (value_sketches) are scored as well.
+    """
+    import pandas as pd
     try:
-        print("\n[1/3] Connecting to MSSQL...")
-        mssql_conn = get_mssql_connection()
-        print("✓ MSSQL Connected")
-        print("\n[2/3] Connecting to PostgreSQL...")
-        pg_conn = get_postgres_connection()
-        print("✓ PostgreSQL Connected")
-
-        print("\n" + "="*80)
-        m_input = input("Enter MSSQL table name (or schema.table) : ").strip()
-        pg_table = input("Enter PostgreSQL table name (table only or schema.table): ").strip()
-        print("="*80)
-
-        # parse mssql schema
-        if '.' in m_input:
-            m_schema, m_table = [p.strip() for p in m_input.split('.', 1)]
-        else:
-            m_schema = 'dbo'
-            m_table = m_input
+        m_schema, m_table = split_qualified(m_input, 'dbo')
+        p_schema, p_table = split_qualified(pg_table, 'public')
 
-        # parse pg schema optionally
-        if '.' in pg_table:
-            p_schema, p_table = [p.strip() for p in pg_table.split('.', 1)]
-        else:
-            p_schema = 'public'
-            p_table = pg_table
-
-        print("\n[3/3] Fetching table structures...")
-        mssql_q = f"""
-            SELECT COLUMN_NAME, DATA_TYPE
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_NAME = '{m_table}' AND TABLE_SCHEMA = '{m_schema}'
-            ORDER BY ORDINAL_POSITION
-        """
-        pg_q = f"""
-            SELECT column_name, data_type
-            FROM information_schema.columns
-            WHERE table_name = '{p_table}' AND table_schema = '{p_schema}'
-            ORDER BY ordinal_position
-        """
-        df_mssql = pd.read_sql(mssql_q, mssql_conn)
-        if df_mssql.empty:
+        # connect + catalog read on both databases at the same time
+        print("\nFetching table structures from MSSQL and PostgreSQL...")
+        m_info, p_info = fetch_table_pair(m_schema, m_table, p_schema, p_table)
+        if m_info is None or not m_info.columns:
             print(f"✗ MSSQL table '{m_table}' in schema '{m_schema}' not found or no columns visible.")
-            return
-        df_pg = pd.read_sql(pg_q, pg_conn)
-        if df_pg.empty:
+            return None
+        if p_info is None or not p_info.columns:
             print(f"✗ PostgreSQL table '{p_table}' in schema '{p_schema}' not found or no columns visible.")
-            return
+            return None
+        df_mssql = table_columns_frame(m_info, 'mssql')
+        df_pg = table_columns_frame(p_info, 'postgres')
 
         print(f"✓ MSSQL columns: {len(df_mssql)}")
         print(f"✓ PostgreSQL columns: {len(df_pg)}")
@@ -502,12 +485,21 @@ def main():
             rows.append(r)
         df_comp = pd.DataFrame(rows)
 
+        sketches = None
+        if values:
+            from value_sketches import SAMPLE_ROWS, fetch_sketches
+            m_sketches, p_sketches = fetch_sketches([('mssql', m_info), ('postgres', p_info)],
+                                                    sample_rows=sample_rows or SAMPLE_ROWS)
+            sketches = (p_sketches, m_sketches)
+
         # Suggest mappings
-        threshold = 0.35
-        mapping_rows, diagnostics = suggest_mappings(df_pg, df_mssql, threshold=threshold, one_to_one=True)
+        mapping_rows, diagnostics = suggest_mappings(df_pg, df_mssql, threshold=threshold, one_to_one=True,
+                                                    engine='vectorized', assignment='optimal',
+                                                    value_sketches=sketches)
 
         # Save to Excel
-        output_file = get_output_path(f"Compare_{m_table}_vs_{p_table}_powerful_mapping_fixed.xlsx")
+        if not output_file:
+            output_file = get_output_path(f"Compare_{m_table}_vs_{p_table}_powerful_mapping_fixed.xlsx")
         print("Saving to:", output_file)
         write_excel(output_file, df_comp, mapping_rows)
 
@@ -515,21 +507,53 @@ def main():
         for i, p in enumerate(df_pg['column_name'].tolist()[:10]):
             diag = diagnostics.get(p, {})
             print(f"{p} => {diag.get('mssql_candidate','')} (score={diag.get('score',0):.2f}) method={diag.get('detail',{}).get('method','')}")
+        return output_file
     except Exception as e:
         print("✗ Failed:", e)
         traceback.print_exc()
-    finally:
-        try:
-            if mssql_conn:
-                mssql_conn.close()
-        except Exception:
-            pass
-        try:
-            if pg_conn:
-                pg_conn.close()
-        except Exception:
-            pass
-        input("\nPress Enter to exit...")
+        return None
+
+
+def main(values: bool = False, sample_rows: int = None):
+    print_header("Powerful PG->MSSQL Auto-Mapping")
+    print("\n" + "="*80)
+    m_input = input("Enter MSSQL table name (or schema.table) : ").strip()
+    pg_table = input("Enter PostgreSQL table name (table only or schema.table): ").strip()
+    print("="*80)
+    run_single_pair(m_input, pg_table, values=values, sample_rows=sample_rows)
+    input("\nPress Enter to exit...")
+
+def cli(argv=None):
+    """Interactive single-pair mode without arguments; batch mode with --pairs / --auto-pairs."""
+    import argparse
+    parser = argparse.ArgumentParser(description="PG->MSSQL column auto-mapping")
+    parser.add_argument('--pairs', help="CSV/YAML file listing mssql_table,pg_table pairs (batch mode)")
+    parser.add_argument('--auto-pairs', action='store_true', help="derive table pairs with table_matcher (batch mode)")
+    parser.add_argument('--mssql-schema', default='dbo')
+    parser.add_argument('--pg-schema', default='public')
+    parser.add_argument('--workers', type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument('--threshold', type=float, default=0.35)
+    parser.add_argument('--assignment', choices=['greedy', 'optimal'], default='optimal')
+    parser.add_argument('--no-blocking', action='store_true', help="score every column pair, not just candidates sharing a name key")
+    parser.add_argument('--ignore-types', action='store_true', help="do not prune or weight pairs by data type compatibility")
+    parser.add_argument('--values', action='store_true',
+                        help="also match columns by sampled values (TABLESAMPLE + MinHash sketches, cached)")
+    parser.add_argument('--sample-rows', type=int, default=None, help="rows sampled per table with --values")
+    parser.add_argument('--similarity', choices=list(KERNELS), default=None,
+                        help="name similarity kernel (default: SIMILARITY_KERNEL or difflib)")
+    parser.add_argument('--output', help="combined report path (.xlsx or .csv)")
+    args = parser.parse_args(argv)
+    if args.similarity:
+        set_kernel(args.similarity)
+
+    with persisted_features():
+        if not args.pairs and not args.auto_pairs:
+            main(values=args.values, sample_rows=args.sample_rows)
+            return
+        run_batch(pairs_file=args.pairs, auto_pairs=args.auto_pairs, output_file=args.output,
+                  mssql_schema=args.mssql_schema, pg_schema=args.pg_schema, workers=args.workers,
+                  threshold=args.threshold, assignment=args.assignment, blocking=not args.no_blocking,
+                  type_aware=not args.ignore_types, values=args.values, sample_rows=args.sample_rows)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+data_diff.py
+
+Row-level data diff between an MSSQL source table and its PostgreSQL target.
+
+Both tables are read in key order (binary collations on both sides, so the two
+orders agree) and merged like a sort-merge join. Every row is reduced to a
+canonical form of its mapped columns and hashed; rows are reported as
+
+ - missing : key present in MSSQL only
+ - extra   : key present in PostgreSQL only
+ - changed : same key, different hash (the differing columns are listed)
+
+Only the current row of each side is held in memory, so tables with tens of
+millions of rows diff in constant memory. Both sides are fetched concurrently.
+
+The column mapping comes from compare_tables_powerful_auto_mapping: either its
+AutoMapping output (xlsx/csv, single-pair or batch report) or suggest_mappings run
+on the fly. The key is the MSSQL primary key unless given explicitly.
+
+Usage:
+    python data_diff.py                                   # interactive
+    python data_diff.py --mssql dbo.TBL_EVENTMASTER --pg public.event_master \\
+                        [--mapping Batch_AutoMapping.xlsx] [--key EventID] [--output diff.xlsx]
+"""
+
+import hashlib
+import queue
+import threading
+import traceback
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db_config import print_header, get_output_path
+from db_session import get_mssql_connection, get_postgres_connection
+from catalog import ColumnInfo, TableInfo
+from catalog_cache import cached_catalog
+from export_writers import make_writer
+from fetchdata import iter_query_chunks
+
+PREFETCH_CHUNKS = 4          # chunks buffered per side
+MAX_DETAIL_CHARS = 32_000    # Excel cell limit is 32,767
+
+MSSQL_STRING_TYPES = {'char', 'varchar', 'nchar', 'nvarchar'}
+PG_STRING_TYPES = {'character', 'character varying', 'text'}
+PADDED_TYPES = {'char', 'nchar', 'character'}
+UUID_TYPES = {'uniqueidentifier', 'uuid'}
+SINGLE_FLOAT_TYPES = {'real'}
+
+
+# -------------------------
+# Column mapping
+# -------------------------
+def _unqualified(name: str) -> str:
+    return str(name).strip().split('.')[-1].lower()
+
+
+def _read_mapping_frame(path: str) -> 'pd.DataFrame':
+    import pandas as pd
+    if path.lower().endswith('.csv'):
+        raw = pd.read_csv(path, dtype=str, header=None).fillna('')
+    else:
+        raw = pd.read_excel(path, sheet_name='AutoMapping', dtype=str, header=None).fillna('')
+    # the single-pair report has a title row above the header
+    header_row = next((i for i, row in raw.iterrows() if 'PG_COLUMN_NAME' in row.values), None)
+    if header_row is None:
+        raise ValueError(f"{path}: no PG_COLUMN_NAME/MSSQL_COLUMN_NAME header found")
+    df = raw.iloc[header_row + 1:]
+    df.columns = [str(c).strip() for c in raw.iloc[header_row]]
+    return df
+
+
+def _mapped_pairs(df: 'pd.DataFrame') -> List[Tuple[str, str]]:
+    pairs = []
+    for m, p in zip(df['MSSQL_COLUMN_NAME'], df['PG_COLUMN_NAME']):
+        m, p = m.strip(), p.strip()
+        if m and p and m != '-':
+            pairs.append((m, p))
+    return pairs
+
+
+def load_column_mapping(path: str, mssql_table: str = None, pg_table: str = None) -> List[Tuple[str, str]]:
+    """
+    (mssql_column, pg_column) pairs from an auto-mapping report (xlsx AutoMapping
+    sheet or csv). Batch reports are filtered to the given table pair; unmapped
+    rows ('-') are skipped.
+    """
+    df = _read_mapping_frame(path)
+    if mssql_table and 'MSSQL_TABLE' in df.columns:
+        df = df[df['MSSQL_TABLE'].map(_unqualified) == _unqualified(mssql_table)]
+    if pg_table and 'PG_TABLE' in df.columns:
+        df = df[df['PG_TABLE'].map(_unqualified) == _unqualified(pg_table)]
+    return _mapped_pairs(df)
+
+
+def load_table_mappings(path: str) -> Dict[Tuple[str, str], List[Tuple[str, str]]]:
+    """{(mssql_table, pg_table): [(mssql_column, pg_column), ...]} from a batch auto-mapping report."""
+    df = _read_mapping_frame(path)
+    if 'MSSQL_TABLE' not in df.columns or 'PG_TABLE' not in df.columns:
+        raise ValueError(f"{path}: not a batch report (no MSSQL_TABLE/PG_TABLE columns)")
+    out = {}
+    for (m_table, p_table), group in df.groupby(['MSSQL_TABLE', 'PG_TABLE'], sort=False):
+        out[(m_table.strip(), p_table.strip())] = _mapped_pairs(group)
+    return out
+
+
+def suggest_column_mapping(m_info: TableInfo, p_info: TableInfo, threshold: float = 0.35) -> List[Tuple[str, str]]:
+    """(mssql_column, pg_column) pairs from suggest_mappings on the two catalog tables."""
+    from compare_tables_powerful_auto_mapping import suggest_mappings, table_columns_frame
+    rows, _ = suggest_mappings(table_columns_frame(p_info, 'postgres'), table_columns_frame(m_info, 'mssql'),
+                               threshold=threshold, one_to_one=True, engine='vectorized', assignment='optimal')
+    return [(r['MSSQL_COLUMN_NAME'], r['PG_COLUMN_NAME']) for r in rows if r['MSSQL_COLUMN_NAME'] != '-']
+
+
+def resolve_mapping(m_info: TableInfo, p_info: TableInfo, pairs: List[Tuple[str, str]]) -> List[Tuple[ColumnInfo, ColumnInfo]]:
+    resolved = []
+    for m_name, p_name in pairs:
+        m_col, p_col = m_info.column(m_name), p_info.column(p_name)
+        if m_col is None:
+            raise ValueError(f"MSSQL column '{m_name}' not found in {m_info.schema}.{m_info.name}")
+        if p_col is None:
+            raise ValueError(f"PostgreSQL column '{p_name}' not found in {p_info.schema}.{p_info.name}")
+        resolved.append((m_col, p_col))
+    return resolved
+
+
+def key_pairs(m_info: TableInfo, p_info: TableInfo, mapping: List[Tuple[ColumnInfo, ColumnInfo]],
+              key: Optional[List[str]] = None) -> List[Tuple[ColumnInfo, ColumnInfo]]:
+    """Mapped key columns: `key` (MSSQL names), else the MSSQL primary key, else the PG one."""
+    by_m = {m.name.lower(): (m, p) for m, p in mapping}
+    by_p = {p.name.lower(): (m, p) for m, p in mapping}
+    if key:
+        names, lookup, side = key, by_m, 'MSSQL'
+    elif m_info.primary_key:
+        names, lookup, side = m_info.primary_key, by_m, 'MSSQL'
+    elif p_info.primary_key:
+        names, lookup, side = p_info.primary_key, by_p, 'PostgreSQL'
+    else:
+        raise ValueError("Neither table has a primary key; pass the key column(s) explicitly.")
+    keys = []
+    for name in names:
+        pair = lookup.get(name.lower())
+        if pair is None:
+            raise ValueError(f"Key column {side}.{name} is not in the column mapping.")
+        keys.append(pair)
+    return keys
+
+
+# -------------------------
+# Key-ordered streams
+# -------------------------
+def select_expr(db_type: str, col: ColumnInfo) -> str:
+    """Column expression that the driver can fetch and that canonicalizes the same on both sides."""
+    if db_type == 'mssql':
+        name = f"[{col.name}]"
+        if col.data_type == 'datetimeoffset':
+            # pyodbc cannot fetch datetimeoffset; compare as UTC
+            return f"CAST(SWITCHOFFSET({name}, '+00:00') AS datetime2)"
+        if col.data_type in ('hierarchyid', 'geometry', 'geography'):
+            return f"{name}.ToString()"
+        if col.data_type == 'sql_variant':
+            return f"CAST({name} AS nvarchar(4000))"
+        return name
+    name = f'"{col.name}"'
+    if col.data_type == 'timestamp with time zone':
+        return f"({name} AT TIME ZONE 'UTC')"
+    return name
+
+
+def _order_expr(db_type: str, col: ColumnInfo) -> str:
+    """Key expression ordered by code point on both sides."""
+    if db_type == 'mssql':
+        if col.data_type == 'uniqueidentifier':
+            # uniqueidentifier sorts by byte groups; its text sorts like PG's uuid
+            return f"CONVERT(char(36), [{col.name}])"
+        if col.data_type in MSSQL_STRING_TYPES:
+            return f"[{col.name}] COLLATE Latin1_General_BIN2"
+        return select_expr(db_type, col)
+    if col.data_type in PG_STRING_TYPES:
+        return f'"{col.name}" COLLATE "C"'
+    if col.data_type == 'uuid':
+        return f'"{col.name}"::text'
+    return select_expr(db_type, col)
+
+
+def build_diff_query(db_type: str, table: TableInfo, keys: List[ColumnInfo], values: List[ColumnInfo],
+                     where: str = None) -> str:
+    key_exprs = [_order_expr(db_type, c) for c in keys]
+    value_exprs = [select_expr(db_type, c) for c in values]
+    if db_type == 'mssql':
+        source = f"[{table.schema}].[{table.name}]"
+    else:
+        source = f'"{table.schema}"."{table.name}"'
+    where = f" WHERE {where}" if where else ""
+    return f"SELECT {', '.join(key_exprs + value_exprs)} FROM {source}{where} ORDER BY {', '.join(key_exprs)}"
+
+
+def _key_value(v, lower: bool = False, trim: bool = False):
+    if isinstance(v, str):
+        if trim:
+            v = v.rstrip(' ')
+        return v.lower() if lower else v
+    if isinstance(v, uuid.UUID):
+        return str(v)
+    if isinstance(v, datetime):
+        return v.replace(tzinfo=None) if v.tzinfo is None else v.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(v, date):
+        # date vs timestamp keys must still compare
+        return datetime(v.year, v.month, v.day)
+    return v
+
+
+def _decimal_text(d: Decimal) -> str:
+    if d == 0:
+        return '0'
+    return format(d.normalize(), 'f')
+
+
+def canonical_value(v, trim: bool = False, lower: bool = False, single: bool = False) -> Optional[str]:
+    """Driver-independent text form of a value: equal data gives equal text on both sides."""
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return '1' if v else '0'
+    if isinstance(v, int):
+        return str(v)
+    if isinstance(v, Decimal):
+        return _decimal_text(v)
+    if isinstance(v, float):
+        if single:
+            return format(v, '.7g')
+        if v.is_integer() and abs(v) < 1e16:
+            return str(int(v))
+        return repr(v)
+    if isinstance(v, datetime):
+        if v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v.isoformat(sep=' ')
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return bytes(v).hex()
+    if isinstance(v, uuid.UUID):
+        return str(v)
+    if not isinstance(v, str):
+        v = v.isoformat() if hasattr(v, 'isoformat') else str(v)
+    if trim:
+        v = v.rstrip(' ')
+    if lower:
+        v = v.lower()
+    return v
+
+
+def key_normalizers(keys: List[Tuple[ColumnInfo, ColumnInfo]]) -> List[Callable]:
+    """Key values stay typed (ints must compare as ints); uuid text is lower-cased, char(n) padding trimmed."""
+    out = []
+    for m, p in keys:
+        types = {m.data_type, p.data_type}
+        out.append(lambda v, lo=bool(types & UUID_TYPES), t=bool(types & PADDED_TYPES): _key_value(v, lo, t))
+    return out
+
+
+def canonicalizers(mapping: List[Tuple[ColumnInfo, ColumnInfo]]) -> List[Callable]:
+    """One canonical_value variant per mapped column, chosen from both sides' types."""
+    out = []
+    for m, p in mapping:
+        types = {m.data_type, p.data_type}
+        trim = bool(types & PADDED_TYPES)
+        lower = bool(types & UUID_TYPES)
+        single = bool(types & SINGLE_FLOAT_TYPES)
+        out.append(lambda v, t=trim, lo=lower, s=single: canonical_value(v, t, lo, s))
+    return out
+
+
+def row_hash(values: List[Optional[str]]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for v in values:
+        h.update(b'\x00\x1f' if v is None else v.encode('utf-8') + b'\x1f')
+    return h.digest()
+
+
+def _offer(q: queue.Queue, item, stop: threading.Event):
+    # bounded queue: give up once the consumer has gone away
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _prefetch(chunks, depth: int = PREFETCH_CHUNKS):
+    """Run a chunk generator in a thread, `depth` chunks ahead of the consumer."""
+    q = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in chunks:
+                if stop.is_set():
+                    break
+                _offer(q, item, stop)
+            _offer(q, done, stop)
+        except Exception as e:
+            _offer(q, e, stop)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = q.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def row_stream(conn, db_type: str, query: str, key_norm: List[Callable], canon: List[Callable], side: str):
+    """Yield (key, hash, canonical_values) in key order; checks the order and key uniqueness."""
+    last = None
+    for _, rows in _prefetch(iter_query_chunks(conn, db_type, query)):
+        for row in rows:
+            key = tuple(norm(v) for norm, v in zip(key_norm, row))
+            if last is not None and key <= last:
+                if key == last:
+                    raise ValueError(f"{side}: duplicate key {key} - the key columns are not unique")
+                raise ValueError(f"{side}: rows are not in key order at {key} - unsupported key type or collation")
+            last = key
+            values = [c(v) for c, v in zip(canon, row)]
+            yield key, row_hash(values), values
+
+
+# -------------------------
+# Merge
+# -------------------------
+@dataclass
+class DiffResult:
+    source_rows: int = 0
+    target_rows: int = 0
+    matched: int = 0
+    missing: int = 0
+    extra: int = 0
+    changed: int = 0
+    changed_by_column: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def differences(self) -> int:
+        return self.missing + self.extra + self.changed
+
+
+def merge_diff(source, target, columns: List[str], result: DiffResult, on_diff: Callable = None):
+    """
+    Sort-merge the two (key, hash, values) streams. on_diff(status, key, changed,
+    source_values, target_values) is called for every difference.
+    """
+    _end = object()
+    s = next(source, _end)
+    t = next(target, _end)
+    while s is not _end or t is not _end:
+        if t is _end or (s is not _end and s[0] < t[0]):
+            result.source_rows += 1
+            result.missing += 1
+            if on_diff:
+                on_diff('missing', s[0], [], s[2], None)
+            s = next(source, _end)
+        elif s is _end or t[0] < s[0]:
+            result.target_rows += 1
+            result.extra += 1
+            if on_diff:
+                on_diff('extra', t[0], [], None, t[2])
+            t = next(target, _end)
+        else:
+            result.source_rows += 1
+            result.target_rows += 1
+            if s[1] == t[1]:
+                result.matched += 1
+            else:
+                result.changed += 1
+                changed = [i for i, (a, b) in enumerate(zip(s[2], t[2])) if a != b]
+                for i in changed:
+                    result.changed_by_column[columns[i]] = result.changed_by_column.get(columns[i], 0) + 1
+                if on_diff:
+                    on_diff('changed', s[0], changed, s[2], t[2])
+            s = next(source, _end)
+            t = next(target, _end)
+    return result
+
+
+def compared_columns(mapping: List[Tuple[ColumnInfo, ColumnInfo]],
+                     keys: List[Tuple[ColumnInfo, ColumnInfo]]) -> List[Tuple[ColumnInfo, ColumnInfo]]:
+    """Key pairs first, then the other mapped pairs: the column order of every diff row."""
+    key_ids = {(m.name, p.name) for m, p in keys}
+    return list(keys) + [(m, p) for m, p in mapping if (m.name, p.name) not in key_ids]
+
+
+def diff_tables(mssql_conn, pg_conn, m_info: TableInfo, p_info: TableInfo,
+                mapping: List[Tuple[ColumnInfo, ColumnInfo]], keys: List[Tuple[ColumnInfo, ColumnInfo]],
+                on_diff: Callable = None, key_range: Tuple[int, int] = None,
+                result: DiffResult = None) -> DiffResult:
+    """
+    Diff two tables over `mapping`, keyed by `keys` (both lists of (mssql, pg) ColumnInfo
+    pairs). key_range=(lo, hi) limits an integer key to lo <= key < hi; counts are
+    added to `result` when given.
+    """
+    compared = compared_columns(mapping, keys)
+    values = compared[len(keys):]
+    canon = canonicalizers(compared)
+    key_norm = key_normalizers(keys)
+    columns = [m.name for m, _ in compared]
+
+    m_where = p_where = None
+    if key_range is not None:
+        lo, hi = int(key_range[0]), int(key_range[1])
+        m_key, p_key = keys[0]
+        m_where = f"[{m_key.name}] >= {lo} AND [{m_key.name}] < {hi}"
+        p_where = f'"{p_key.name}" >= {lo} AND "{p_key.name}" < {hi}'
+    m_query = build_diff_query('mssql', m_info, [m for m, _ in keys], [m for m, _ in values], m_where)
+    p_query = build_diff_query('postgres', p_info, [p for _, p in keys], [p for _, p in values], p_where)
+    source = row_stream(mssql_conn, 'mssql', m_query, key_norm, canon, 'MSSQL')
+    target = row_stream(pg_conn, 'postgres', p_query, key_norm, canon, 'PostgreSQL')
+    try:
+        return merge_diff(source, target, columns, result or DiffResult(), on_diff)
+    finally:
+        source.close()
+        target.close()
+
+
+# -------------------------
+# Report
+# -------------------------
+def format_details(columns, changed, source_values, target_values) -> str:
+    parts = [f"{columns[i]}: {source_values[i]!r} -> {target_values[i]!r}" for i in changed]
+    text = '; '.join(parts)
+    return text if len(text) <= MAX_DETAIL_CHARS else text[:MAX_DETAIL_CHARS] + '...'
+
+
+def run_diff(mssql_table: str, pg_table: str, mapping_file: str = None, key: List[str] = None,
+             output_file: str = None, max_report_rows: int = None) -> DiffResult:
+    """Diff one table pair and write every difference to an xlsx/csv report."""
+    from compare_tables_powerful_auto_mapping import split_qualified
+
+    print_header("MSSQL -> PostgreSQL Data Diff")
+    m_schema, m_table = split_qualified(mssql_table, 'dbo')
+    p_schema, p_table = split_qualified(pg_table, 'public')
+
+    mssql_conn = None
+    pg_conn = None
+    writer = None
+    try:
+        print("\n[1/3] Connecting and reading table structures...")
+        mssql_conn = get_mssql_connection()
+        pg_conn = get_postgres_connection()
+        m_info = cached_catalog(mssql_conn, 'mssql', m_schema, tables=[m_table]).table(m_table)
+        p_info = cached_catalog(pg_conn, 'postgres', p_schema, tables=[p_table]).table(p_table)
+        if m_info is None:
+            raise ValueError(f"MSSQL table '{m_schema}.{m_table}' not found")
+        if p_info is None:
+            raise ValueError(f"PostgreSQL table '{p_schema}.{p_table}' not found")
+
+        if mapping_file:
+            pairs = load_column_mapping(mapping_file, mssql_table, pg_table)
+            print(f"✓ {len(pairs)} mapped columns read from {mapping_file}")
+        else:
+            pairs = suggest_column_mapping(m_info, p_info)
+            print(f"✓ {len(pairs)} mapped columns suggested by auto-mapping")
+        mapping = resolve_mapping(m_info, p_info, pairs)
+        keys = key_pairs(m_info, p_info, mapping, key)
+        print(f"✓ Key: {', '.join(f'{m.name} -> {p.name}' for m, p in keys)}")
+
+        if not output_file:
+            stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            output_file = get_output_path(f"DataDiff_{m_table}_vs_{p_table}_{stamp}.xlsx")
+        fmt = 'csv' if output_file.lower().endswith('.csv') else 'xlsx'
+        key_names = [m.name for m, _ in keys]
+        compared = [m.name for m, _ in compared_columns(mapping, keys)]
+        writer = make_writer(fmt, output_file, 'DataDiff', 'mssql')
+        writer.open([(name,) for name in ['STATUS'] + key_names + ['CHANGED_COLUMNS', 'DETAILS']])
+        reported = [0]
+
+        def on_diff(status, key_values, changed, source_values, target_values):
+            if max_report_rows is not None and reported[0] >= max_report_rows:
+                return
+            reported[0] += 1
+            details = format_details(compared, changed, source_values, target_values) if changed else ''
+            writer.write_rows([(status, *key_values, ', '.join(compared[i] for i in changed), details)])
+
+        print("\n[2/3] Streaming both tables in key order...")
+        started = datetime.now()
+        result = diff_tables(mssql_conn, pg_conn, m_info, p_info, mapping, keys, on_diff)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        print("\n[3/3] Writing report...")
+        writer.close({
+            "compared_at": datetime.now().isoformat(),
+            "mssql_table": f"{m_schema}.{m_table}",
+            "pg_table": f"{p_schema}.{p_table}",
+            "key": ", ".join(key_names),
+            "mssql_rows": result.source_rows,
+            "pg_rows": result.target_rows,
+            "matched": result.matched,
+            "missing_in_pg": result.missing,
+            "extra_in_pg": result.extra,
+            "changed": result.changed,
+            "changed_by_column": ", ".join(f"{c}={n}" for c, n in sorted(result.changed_by_column.items())),
+        })
+        writer = None
+
+        print(f"✓ Compared {result.source_rows:,} MSSQL rows with {result.target_rows:,} PostgreSQL rows in {elapsed:.1f}s")
+        print(f"  matched: {result.matched:,}   missing in PG: {result.missing:,}   "
+              f"extra in PG: {result.extra:,}   changed: {result.changed:,}")
+        if result.differences == 0:
+            print("✓ Tables are identical over the mapped columns.")
+        print(f"Report saved: {output_file}")
+        return result
+    finally:
+        if writer is not None:
+            # diff failed or was interrupted before the report was closed
+            writer.abort()
+        for conn in (mssql_conn, pg_conn):
+            try:
+                if conn:
+                    conn.close()
+            except Exception:
+                pass
+
+
+def main():
+    print("\n" + "=" * 80)
+    m_input = input("Enter MSSQL table name (or schema.table) : ").strip()
+    p_input = input("Enter PostgreSQL table name (table only or schema.table): ").strip()
+    mapping_file = input("Auto-mapping report (xlsx/csv), or Enter to suggest mappings now: ").strip()
+    key = input("Key column(s), comma separated MSSQL names, or Enter for the primary key: ").strip()
+    print("=" * 80)
+    try:
+        run_diff(m_input, p_input, mapping_file or None,
+                 [k.strip() for k in key.split(',') if k.strip()] or None)
+    except Exception as e:
+        print("✗ Failed:", e)
+        traceback.print_exc()
+
+
+def cli(argv=None):
+    """Interactive without arguments; otherwise --mssql and --pg are required."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Row-level data diff MSSQL -> PostgreSQL")
+    parser.add_argument('--mssql', help="MSSQL table (schema.table)")
+    parser.add_argument('--pg', help="PostgreSQL table (schema.table)")
+    parser.add_argument('--mapping', help="auto-mapping report (xlsx/csv); default: suggest now")
+    parser.add_argument('--key', help="comma separated MSSQL key columns (default: primary key)")
+    parser.add_argument('--output', help="report path (.xlsx or .csv)")
+    parser.add_argument('--max-report-rows', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if not args.mssql and not args.pg:
+        main()
+        return
+    if not args.mssql or not args.pg:
+        parser.error("--mssql and --pg are both required")
+    key = [k.strip() for k in args.key.split(',') if k.strip()] if args.key else None
+    result = run_diff(args.mssql, args.pg, args.mapping, key, args.output, args.max_report_rows)
+    raise SystemExit(1 if result.differences else 0)
+
+
+if __name__ == '__main__':
+    cli()
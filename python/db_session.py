@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+db_session.py
+
+Process-wide connection pools for MSSQL and PostgreSQL, shared by every tool.
+
+The connections themselves still come from db_config.get_mssql_connection() /
+get_postgres_connection(); this module keeps them open between uses so a second
+menu choice in run_comparison.py (or a second worker in a parallel export) does
+not pay the connect/TLS/AD authentication cost again.
+
+    from db_session import get_mssql_connection
+    conn = get_mssql_connection()    # borrowed from the pool (connects only if none is idle)
+    ...
+    conn.close()                     # returned to the pool, not disconnected
+
+    with connection('postgres') as conn:
+        ...
+
+Borrowed connections behave like the driver connection. On return they are rolled
+back, their autocommit flag is restored and PostgreSQL session settings are RESET,
+so one tool's SET TIME ZONE or open transaction does not leak into the next.
+A connection that sat idle longer than HEALTH_CHECK_IDLE seconds is checked with
+SELECT 1 before it is handed out, and replaced if the check fails.
+
+Pool size (per database) and the wait for a free connection come from the
+DB_POOL_SIZE / DB_POOL_TIMEOUT environment variables or configure(). Parallel
+features should cap their workers at pool_size(db_type) minus the connections they
+already hold, otherwise they wait for DB_POOL_TIMEOUT and fail.
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import db_config
+
+POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))             # connections per database
+POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '60'))    # seconds to wait for a free connection
+HEALTH_CHECK_IDLE = 30.0                                         # re-check connections idle longer than this
+
+_FACTORIES = {
+    'mssql': lambda: db_config.get_mssql_connection(),
+    'postgres': lambda: db_config.get_postgres_connection(),
+}
+
+
+class PooledConnection:
+    """A driver connection borrowed from a ConnectionPool; close() gives it back."""
+
+    def __init__(self, pool, raw):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_raw', raw)
+
+    @property
+    def raw(self):
+        if self._raw is None:
+            raise RuntimeError("Connection was already returned to the pool")
+        return self._raw
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.raw, name, value)
+
+    def close(self):
+        raw = self._raw
+        if raw is not None:
+            object.__setattr__(self, '_raw', None)
+            self._pool.release(raw)
+
+    def __del__(self):
+        # a borrower that forgot close() must not keep the slot forever
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded pool of connections to one database, safe to use from several threads."""
+
+    def __init__(self, db_type: str, factory=None, size: int = None, timeout: float = None):
+        self.db_type = db_type
+        self.factory = factory or _FACTORIES[db_type]
+        self.size = max(1, size or POOL_SIZE)
+        self.timeout = POOL_TIMEOUT if timeout is None else timeout
+        self._idle = []          # (connection, returned_at), most recently used last
+        self._open = 0           # idle + borrowed + being created
+        self._autocommit = None  # the factory's autocommit setting, restored on release
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, idle_since = self._idle.pop()
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    raw, idle_since = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"No free {self.db_type} connection after {timeout:g}s ({self.size} in use); "
+                        f"raise DB_POOL_SIZE or use fewer workers"
+                    )
+                self._cond.wait(remaining)
+
+        # connect and health-check outside the lock: both can take seconds
+        try:
+            if raw is not None and time.monotonic() - idle_since > HEALTH_CHECK_IDLE and not self._healthy(raw):
+                _close_quietly(raw)
+                raw = None
+            if raw is None:
+                raw = self.factory()
+                if self._autocommit is None:
+                    self._autocommit = bool(getattr(raw, 'autocommit', False))
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw)
+
+    def release(self, raw):
+        reusable = self._reset(raw)
+        with self._cond:
+            if reusable:
+                self._idle.append((raw, time.monotonic()))
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if not reusable:
+            _close_quietly(raw)
+
+    def _healthy(self, raw) -> bool:
+        if getattr(raw, 'closed', 0):
+            return False
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, raw) -> bool:
+        if getattr(raw, 'closed', 0):
+            return False
+        try:
+            raw.rollback()
+            if self._autocommit is not None and bool(getattr(raw, 'autocommit', False)) != self._autocommit:
+                raw.autocommit = self._autocommit
+            if self.db_type == 'postgres':
+                cursor = raw.cursor()
+                try:
+                    cursor.execute("RESET ALL")
+                finally:
+                    cursor.close()
+                raw.commit()
+            return True
+        except Exception:
+            return False
+
+    def close_idle(self):
+        """Disconnect every idle connection; borrowed ones return to the pool as usual."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._cond.notify_all()
+        for raw, _ in idle:
+            _close_quietly(raw)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {'size': self.size, 'open': self._open, 'idle': len(self._idle)}
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+# -------------------------
+# Process-wide pools
+# -------------------------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_type: str) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(db_type)
+        if pool is None:
+            pool = _pools[db_type] = ConnectionPool(db_type)
+        return pool
+
+
+def get_mssql_connection() -> PooledConnection:
+    return get_pool('mssql').acquire()
+
+
+def get_postgres_connection() -> PooledConnection:
+    return get_pool('postgres').acquire()
+
+
+@contextmanager
+def connection(db_type: str):
+    conn = get_pool(db_type).acquire()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def pool_size(db_type: str) -> int:
+    return get_pool(db_type).size
+
+
+def configure(size: int = None, timeout: float = None):
+    """Change pool size / wait timeout for pools created from now on and for existing ones."""
+    global POOL_SIZE, POOL_TIMEOUT
+    with _pools_lock:
+        if size is not None:
+            POOL_SIZE = max(1, size)
+        if timeout is not None:
+            POOL_TIMEOUT = timeout
+        pools = list(_pools.values())
+    for pool in pools:
+        with pool._cond:
+            pool.size = POOL_SIZE
+            pool.timeout = POOL_TIMEOUT
+            pool._cond.notify_all()
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_idle()
+
+
+atexit.register(close_pools)
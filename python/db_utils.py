@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+db_utils.py
+
+Small driver-neutral SQL helpers shared by the tools: identifier quoting, table
+references (optionally page-sampled) and a one-shot query runner.
+
+Pure Python with no driver or db_config import, so catalog-only modules can use it.
+"""
+
+from typing import Optional
+
+
+def quote_ident(db_type: str, name: str) -> str:
+    return f"[{name}]" if db_type == 'mssql' else f'"{name}"'
+
+
+def qualified_table(db_type: str, schema: str, table: str) -> str:
+    return f"{quote_ident(db_type, schema)}.{quote_ident(db_type, table)}"
+
+
+def sampled_table(db_type: str, schema: str, table: str, percent: Optional[float] = None, seed: int = 42) -> str:
+    """qualified_table read through a repeatable page sample when percent is below 100."""
+    source = qualified_table(db_type, schema, table)
+    if percent is None or percent >= 100.0:
+        return source
+    if db_type == 'mssql':
+        return f"{source} TABLESAMPLE ({percent:.6f} PERCENT) REPEATABLE ({seed})"
+    return f"{source} TABLESAMPLE SYSTEM ({percent:.6f}) REPEATABLE ({seed})"
+
+
+def fetchall(conn, sql: str, params: Optional[tuple] = None) -> list:
+    """
+    Run one query on its own cursor and return all rows. Without params the SQL is
+    sent as is, so psycopg2 leaves literal % (LIKE patterns) alone.
+    """
+    cursor = conn.cursor()
+    try:
+        if params is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
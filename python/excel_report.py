@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+excel_report.py
+
+Shared .xlsx report renderer for the tools' Excel reports (comparetable.py,
+list_all_tables.py, table_details.py, compare_tables_powerful_auto_mapping.py,
+column_profile.py, row_counts.py, fk_inference.py).
+
+Reports are written with an openpyxl write-only workbook: every row is serialized
+as it is appended, so memory stays flat however long the sheet is. Formatting is
+declared once per sheet instead of mutated cell by cell afterwards:
+ - named styles (STYLES), registered once per workbook; a data cell only carries
+   the style of its column, number formats included
+ - column widths, merged title cells and freeze panes per sheet
+ - value-dependent fills (NOT NULL, foreign keys, mismatches) are conditional
+   formatting rules over a column or row range, evaluated by Excel
+
+    with ExcelReport(path) as report:
+        sheet = report.sheet('Comparison', widths=[25, 18, 3], freeze='A3')
+        sheet.append(['mssql - Orders', None, None], 'title')
+        sheet.merge('A1:B1')
+        sheet.frame(df, styles=['cell', 'cell_center', 'separator'])
+        sheet.highlight('B', NOT_NULL_COLOR, equals='NOT NULL')
+
+openpyxl is only imported when a report is written.
+"""
+
+import os
+from itertools import chain
+from typing import Iterable, List, Optional, Sequence, Union
+
+from export_writers import excel_value
+
+TITLE_COLOR = '366092'
+HEADER_COLOR = 'D9E1F2'
+SEPARATOR_COLOR = 'F2F2F2'
+NOT_NULL_COLOR = 'E2EFDA'
+FK_COLOR = 'DDEBF7'
+OK_COLOR = 'C6EFCE'
+MISMATCH_COLOR = 'F8CBAD'
+
+INT_FORMAT = '#,##0'
+SCORE_FORMAT = '0.00'
+
+# name -> (font, fill color, alignment, thin border)
+STYLES = {
+    'title':       ({'bold': True, 'color': 'FFFFFF', 'size': 12}, TITLE_COLOR,
+                    {'horizontal': 'center', 'vertical': 'center'}, True),
+    'title_large': ({'bold': True, 'color': 'FFFFFF', 'size': 14}, TITLE_COLOR,
+                    {'horizontal': 'center', 'vertical': 'center'}, False),
+    'header':      ({'bold': True, 'size': 11}, HEADER_COLOR,
+                    {'horizontal': 'center', 'vertical': 'center'}, True),
+    'header_plain': ({'bold': True, 'size': 11}, HEADER_COLOR, None, False),
+    'info':        ({'bold': True, 'size': 11}, None, None, False),
+    'cell':        (None, None, {'vertical': 'center'}, True),
+    'cell_center': (None, None, {'horizontal': 'center', 'vertical': 'center'}, True),
+    'cell_wrap':   (None, None, {'vertical': 'center', 'wrap_text': True}, True),
+    'cell_top':    (None, None, {'vertical': 'top', 'wrap_text': True}, True),
+    'separator':   (None, SEPARATOR_COLOR, None, False),
+}
+
+StyleSpec = Union[None, str, Sequence[Optional[str]]]
+
+
+def column_letter(index: int) -> str:
+    """1 -> A, 27 -> AA."""
+    letters = ''
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord('A') + rem) + letters
+    return letters
+
+
+def _fill(color: str):
+    from openpyxl.styles import PatternFill
+    return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
+
+def _style_key(name: Optional[str], number_format: Optional[str]) -> str:
+    return f"{name or 'plain'}|{number_format}" if number_format else name
+
+
+def _named_style(name: Optional[str], number_format: Optional[str] = None):
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+    font, fill, alignment, border = STYLES[name] if name else (None, None, None, False)
+    style = NamedStyle(name=_style_key(name, number_format))
+    if font:
+        style.font = Font(**font)
+    if fill:
+        style.fill = _fill(fill)
+    if alignment:
+        style.alignment = Alignment(**alignment)
+    if border:
+        thin = Side(style='thin')
+        style.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    if number_format:
+        style.number_format = number_format
+    return style
+
+
+class ReportSheet:
+    """One write-only worksheet; rows are appended top to bottom."""
+
+    def __init__(self, report: 'ExcelReport', ws, widths: Sequence[float] = (), freeze: str = None):
+        self.report = report
+        self.ws = ws
+        self.row = 0
+        for idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[column_letter(idx)].width = width
+        if freeze:
+            ws.freeze_panes = freeze
+
+    def _styles(self, styles: StyleSpec, width: int, formats: Optional[dict] = None) -> List[Optional[str]]:
+        """Per-column style names; {column letter or 1-based index: number format} become derived styles."""
+        names = list(styles) + [None] * (width - len(styles)) if isinstance(styles, (list, tuple)) else [styles] * width
+        number_formats = [None] * width
+        for idx, fmt in (formats or {}).items():
+            pos = idx - 1 if isinstance(idx, int) else ord(idx.upper()) - ord('A')
+            if 0 <= pos < width:
+                number_formats[pos] = fmt
+        return [self.report.style(name, fmt) for name, fmt in zip(names, number_formats)]
+
+    def _write(self, rows: Iterable[Sequence], names: List[Optional[str]]):
+        from openpyxl.cell import Cell
+        ws, append = self.ws, self.ws.append
+        # one style array per column, copied into each cell instead of resolving the named style per cell
+        arrays = [self.report.style_array(name) if name else None for name in names]
+        for values in rows:
+            row = []
+            for value, array in zip(values, arrays):
+                value = excel_value(value)
+                row.append(value if array is None else Cell(ws, row=1, column=1, value=value, style_array=array))
+            append(row)
+            self.row += 1
+
+    def append(self, values: Sequence, styles: StyleSpec = None, formats: Optional[dict] = None):
+        """Write one row; styles is one style name for the row or one per column."""
+        self._write([values], self._styles(styles, len(values), formats))
+
+    def rows(self, rows: Iterable[Sequence], styles: StyleSpec = 'cell', formats: Optional[dict] = None,
+             width: int = None):
+        """Write many rows with the same per-column styles (width defaults to the first row's)."""
+        rows = iter(rows)
+        if width is None:
+            first = next(rows, None)
+            if first is None:
+                return
+            width = len(first)
+            rows = chain([first], rows)
+        self._write(rows, self._styles(styles, width, formats))
+
+    def frame(self, df: 'pd.DataFrame', styles: StyleSpec = 'cell', header: StyleSpec = 'header',
+              formats: Optional[dict] = None, columns: Sequence[str] = None):
+        """DataFrame with a header row (missing values become empty cells)."""
+        if columns is not None:
+            df = df[list(columns)]
+        self.append(list(df.columns), header)
+        values = df.astype(object).where(df.notna(), None)
+        self.rows(values.itertuples(index=False, name=None), styles, formats, width=len(df.columns))
+
+    def merge(self, ref: str):
+        self.ws.merged_cells.add(ref)
+
+    def highlight(self, columns: str, color: str, equals: str = None, nonblank: bool = False,
+                  first_row: int = None, last_row: int = None):
+        """
+        Conditional fill of data cells in `columns` (letters, e.g. 'CH') that equal
+        `equals` or, with nonblank, hold anything but whitespace.
+        """
+        from openpyxl.formatting.rule import CellIsRule, FormulaRule
+        first_row = first_row or 2
+        last_row = last_row or self.row
+        if last_row < first_row:
+            return
+        for col in columns:
+            ref = f"{col}{first_row}:{col}{last_row}"
+            if nonblank:
+                rule = FormulaRule(formula=[f'LEN(TRIM({col}{first_row}))>0'], fill=_fill(color))
+            else:
+                text = str(equals).replace('"', '""')
+                rule = CellIsRule(operator='equal', formula=[f'"{text}"'], fill=_fill(color))
+            self.ws.conditional_formatting.add(ref, rule)
+
+    def highlight_rows(self, column: str, color: str, last_column: str, equals: Sequence[str] = None,
+                       not_in: Sequence[str] = None, first_row: int = 2):
+        """Conditional fill of whole rows (A..last_column) by the value in `column`."""
+        from openpyxl.formatting.rule import FormulaRule
+        if self.row < first_row:
+            return
+        ref = f"${column}{first_row}"
+        quote = lambda v: '"' + str(v).replace('"', '""') + '"'
+        if equals is not None:
+            formula = f"OR({','.join(f'{ref}={quote(v)}' for v in equals)})"
+        else:
+            formula = f"AND({','.join(f'{ref}<>{quote(v)}' for v in not_in)})"
+        self.ws.conditional_formatting.add(f"A{first_row}:{last_column}{self.row}",
+                                           FormulaRule(formula=[formula], fill=_fill(color)))
+
+
+class ExcelReport:
+    """Write-only workbook with the shared named styles; saved on close."""
+
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self._styles = {}
+
+    def style(self, name: Optional[str], number_format: str = None) -> Optional[str]:
+        """Register a named style (plus number format) once; returns the name cells refer to."""
+        if name is None and number_format is None:
+            return None
+        key = _style_key(name, number_format)
+        if key not in self._styles:
+            style = _named_style(name, number_format)
+            self.wb.add_named_style(style)
+            self._styles[key] = style
+        return key
+
+    def style_array(self, key: str):
+        """Style array of a registered named style, as cells store it."""
+        return self._styles[key].as_tuple()
+
+    def sheet(self, title: str, widths: Sequence[float] = (), freeze: str = None) -> ReportSheet:
+        return ReportSheet(self, self.wb.create_sheet(title[:31]), widths, freeze)
+
+    def frame_sheet(self, title: str, df: 'pd.DataFrame', widths: Sequence[float] = (), freeze: str = 'A2',
+                    styles: StyleSpec = None, header: StyleSpec = 'header_plain',
+                    formats: Optional[dict] = None, columns: Sequence[str] = None) -> ReportSheet:
+        """The common report sheet: a DataFrame under a styled header row, frozen below it."""
+        sheet = self.sheet(title, widths, freeze)
+        sheet.frame(df, styles, header, formats, columns)
+        return sheet
+
+    def close(self):
+        self.wb.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+export_writers.py
+
+Streaming writers used by fetchdata.py. Rows arrive in chunks (lists of tuples) and
+are written straight out, so memory stays bounded by the chunk size regardless of
+the table size.
+
+Every writer has the same shape:
+
+    writer = make_writer('parquet', path, sheet_name, db_type)
+    writer.open(description)       # DB-API cursor.description
+    writer.write_rows(rows)        # called once per chunk
+    writer.close(metadata)         # metadata: dict written alongside the data
+    writer.abort()                 # on failure instead of close(): releases file handles
+                                   # and temp files, removes the incomplete output
+
+Formats:
+ - xlsx    : openpyxl write-only workbook; rolls over to a new sheet every
+             1,048,575 data rows. Metadata goes to a __metadata sheet.
+   openpyxl is only imported when an xlsx file is written.
+ - csv     : UTF-8 CSV. Metadata goes to <file>.metadata.json.
+ - parquet : zstd-compressed, typed columns, one row group per ROW_GROUP_ROWS rows.
+ - arrow   : Arrow IPC file, zstd-compressed, one record batch per chunk.
+   parquet/arrow need pyarrow (optional) and store metadata in <file>.metadata.json.
+
+For PostgreSQL COPY output (already CSV bytes) there is no per-row Python work:
+csv_stream_to_arrow() parses the stream with pyarrow's streaming CSV reader and
+hands the record batches to the Parquet/Arrow writer.
+"""
+
+import csv
+import json
+import os
+import re
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+EXPORT_FORMATS = {
+    'xlsx': '.xlsx',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'csv': '.csv',
+}
+
+EXCEL_MAX_ROWS = 1_048_576   # per sheet, including the header row
+ROW_GROUP_ROWS = 100_000     # parquet row group size
+
+# control characters Excel rejects (same set as openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE)
+ILLEGAL_CHARACTERS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+
+
+def column_names(description) -> list:
+    return [d[0] for d in description]
+
+
+def write_metadata_file(path: str, metadata: dict):
+    with open(path + '.metadata.json', 'w', encoding='utf-8') as fh:
+        json.dump(metadata, fh, indent=2, default=str)
+
+
+# -------------------------
+# Excel
+# -------------------------
+def excel_value(v):
+    """Coerce driver values to something openpyxl can store."""
+    if v is None or isinstance(v, (int, float, bool, Decimal)):
+        return v
+    if isinstance(v, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', v)
+    if isinstance(v, (datetime, dt_time)):
+        # Excel has no time zones
+        return v.replace(tzinfo=None) if v.tzinfo is not None else v
+    if isinstance(v, (date, timedelta)):
+        return v
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return '0x' + bytes(v).hex()
+    if isinstance(v, uuid.UUID):
+        return str(v)
+    return str(v)
+
+
+class ExcelStreamWriter:
+    """openpyxl write-only workbook: rows are serialized as they are appended."""
+
+    def __init__(self, path: str, sheet_name: str, max_rows: int = EXCEL_MAX_ROWS):
+        self.path = path
+        self.sheet_name = sheet_name[:31]
+        self.max_rows = max_rows
+        self.rows_written = 0
+        self.sheets = []
+        self.wb = None
+        self.ws = None
+        self.columns = []
+        self._sheet_rows = 0
+
+    def _new_sheet(self):
+        n = len(self.sheets) + 1
+        name = self.sheet_name if n == 1 else f"{self.sheet_name[:31 - len(str(n)) - 1]}_{n}"
+        self.ws = self.wb.create_sheet(name)
+        self.ws.append(self.columns)
+        self.sheets.append(name)
+        self._sheet_rows = 1
+
+    def open(self, description):
+        from openpyxl import Workbook
+        self.columns = column_names(description)
+        self.wb = Workbook(write_only=True)
+        self._new_sheet()
+
+    def write_rows(self, rows):
+        start = 0
+        while start < len(rows):
+            if self._sheet_rows >= self.max_rows:
+                self._new_sheet()
+            part = rows[start:start + self.max_rows - self._sheet_rows]
+            append = self.ws.append
+            for row in part:
+                append([excel_value(v) for v in row])
+            self._sheet_rows += len(part)
+            start += len(part)
+        self.rows_written += len(rows)
+
+    def close(self, metadata: dict = None):
+        if metadata:
+            if len(self.sheets) > 1:
+                metadata = {**metadata, "sheets": ", ".join(self.sheets)}
+            meta = self.wb.create_sheet("__metadata")
+            meta.append(list(metadata))
+            meta.append([excel_value(v) for v in metadata.values()])
+        self.wb.save(self.path)
+        self.wb = None
+
+    def abort(self):
+        # nothing was saved yet; only openpyxl's per-sheet temp files exist
+        for ws in (self.wb.worksheets if self.wb is not None else []):
+            try:
+                ws.close()
+                ws._writer.cleanup()
+            except Exception:
+                pass
+        self.wb = None
+
+
+def _remove_partial(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# -------------------------
+# CSV
+# -------------------------
+def _csv_value(v):
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return '0x' + bytes(v).hex()
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, default=str)
+    return v
+
+
+class CsvStreamWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.rows_written = 0
+        self._fh = None
+        self._writer = None
+
+    def open(self, description):
+        self._fh = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._fh)
+        self._writer.writerow(column_names(description))
+
+    def write_rows(self, rows):
+        self._writer.writerows([_csv_value(v) for v in row] for row in rows)
+        self.rows_written += len(rows)
+
+    def close(self, metadata: dict = None):
+        self._fh.close()
+        if metadata:
+            write_metadata_file(self.path, metadata)
+
+    def abort(self):
+        if self._fh is not None and not self._fh.closed:
+            self._fh.close()
+            _remove_partial(self.path)
+
+
+# -------------------------
+# Parquet / Arrow IPC
+# -------------------------
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet/Arrow export requires pyarrow (pip install pyarrow), or export to xlsx/csv.")
+    return pyarrow
+
+
+# psycopg2 reports type OIDs in cursor.description
+_PG_OID_TYPES = {
+    16: 'bool',
+    20: 'int64', 21: 'int64', 23: 'int64', 26: 'int64',
+    700: 'float64', 701: 'float64',
+    1700: 'decimal',
+    1082: 'date', 1083: 'time', 1114: 'timestamp', 1184: 'timestamptz',
+    17: 'binary',
+}
+
+# pyodbc reports Python classes in cursor.description
+_PY_CLASS_TYPES = {
+    bool: 'bool', int: 'int64', float: 'float64', Decimal: 'decimal',
+    date: 'date', dt_time: 'time', datetime: 'timestamp',
+    bytes: 'binary', bytearray: 'binary',
+}
+
+
+def _arrow_type(pa, kind: str, precision, scale):
+    if kind == 'decimal':
+        # unconstrained numeric has no precision: keep it lossless as text
+        if precision and 0 < precision <= 38 and scale is not None and 0 <= scale <= precision:
+            return pa.decimal128(precision, scale)
+        return pa.string()
+    return {
+        'bool': pa.bool_(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'date': pa.date32(),
+        'time': pa.time64('us'),
+        'timestamp': pa.timestamp('us'),
+        'timestamptz': pa.timestamp('us', tz='UTC'),
+        'binary': pa.binary(),
+    }.get(kind, pa.string())
+
+
+def arrow_schema(description, db_type: str):
+    """Arrow schema from a DB-API cursor.description (psycopg2 or pyodbc)."""
+    pa = require_pyarrow()
+    fields = []
+    for d in description:
+        name, type_code, precision, scale = d[0], d[1], d[4], d[5]
+        if db_type == 'postgres':
+            kind = _PG_OID_TYPES.get(type_code, 'string')
+        else:
+            kind = _PY_CLASS_TYPES.get(type_code, 'string')
+        fields.append(pa.field(name, _arrow_type(pa, kind, precision, scale)))
+    return pa.schema(fields)
+
+
+def _arrow_text(v):
+    if v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, default=str)
+    return str(v)
+
+
+class _ArrowStreamWriter:
+    """Shared column conversion for the Parquet and Arrow IPC writers."""
+
+    def __init__(self, path: str, db_type: str):
+        self.pa = require_pyarrow()
+        self.path = path
+        self.db_type = db_type
+        self.rows_written = 0
+        self.schema = None
+
+    def open(self, description):
+        self.open_schema(arrow_schema(description, self.db_type))
+
+    def write_rows(self, rows):
+        if rows:
+            self.write_batch(self._batch(rows))
+
+    def _batch(self, rows):
+        pa = self.pa
+        arrays = []
+        for values, fld in zip(zip(*rows), self.schema):
+            if pa.types.is_string(fld.type):
+                values = [_arrow_text(v) for v in values]
+            elif pa.types.is_binary(fld.type):
+                values = [bytes(v) if isinstance(v, memoryview) else v for v in values]
+            arrays.append(pa.array(values, type=fld.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def close(self, metadata: dict = None):
+        if metadata:
+            write_metadata_file(self.path, metadata)
+
+
+class ParquetStreamWriter(_ArrowStreamWriter):
+    def __init__(self, path: str, db_type: str, row_group_rows: int = ROW_GROUP_ROWS):
+        super().__init__(path, db_type)
+        self.row_group_rows = row_group_rows
+        self._writer = None
+        self._pending = []
+        self._pending_rows = 0
+
+    def open_schema(self, schema):
+        import pyarrow.parquet as pq
+        self.schema = schema
+        self._writer = pq.ParquetWriter(self.path, self.schema, compression='zstd')
+
+    def _flush(self):
+        if self._pending:
+            table = self.pa.Table.from_batches(self._pending, schema=self.schema)
+            self._writer.write_table(table, row_group_size=self._pending_rows)
+            self._pending, self._pending_rows = [], 0
+
+    def write_batch(self, batch):
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        self.rows_written += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            self._flush()
+
+    def close(self, metadata: dict = None):
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        super().close(metadata)
+
+    def abort(self):
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            finally:
+                self._writer = None
+                _remove_partial(self.path)
+
+
+class ArrowIpcStreamWriter(_ArrowStreamWriter):
+    def __init__(self, path: str, db_type: str):
+        super().__init__(path, db_type)
+        self._sink = None
+        self._writer = None
+
+    def open_schema(self, schema):
+        pa = self.pa
+        self.schema = schema
+        self._sink = pa.OSFile(self.path, 'wb')
+        options = pa.ipc.IpcWriteOptions(compression='zstd')
+        self._writer = pa.ipc.new_file(self._sink, self.schema, options=options)
+
+    def write_batch(self, batch):
+        self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+
+    def close(self, metadata: dict = None):
+        self._writer.close()
+        self._sink.close()
+        self._sink = self._writer = None
+        super().close(metadata)
+
+    def abort(self):
+        if self._sink is not None:
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+            finally:
+                self._sink.close()
+                self._sink = self._writer = None
+                _remove_partial(self.path)
+
+
+def make_writer(fmt: str, path: str, sheet_name: str, db_type: str):
+    """Streaming writer for one of EXPORT_FORMATS."""
+    if fmt == 'xlsx':
+        return ExcelStreamWriter(path, sheet_name)
+    if fmt == 'csv':
+        return CsvStreamWriter(path)
+    if fmt == 'parquet':
+        return ParquetStreamWriter(path, db_type)
+    if fmt == 'arrow':
+        return ArrowIpcStreamWriter(path, db_type)
+    raise ValueError(f"Unknown export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+
+
+def csv_stream_to_arrow(stream, writer, schema, on_batch=None):
+    """
+    Parse a PostgreSQL COPY ... WITH (FORMAT csv) byte stream (no header) into `writer`
+    (a ParquetStreamWriter or ArrowIpcStreamWriter) without building Python rows.
+
+    `stream` must be a buffered binary reader. `schema` fixes the column types (see arrow_schema). COPY writes bytea as '\\x..'
+    text, so binary columns are kept as strings here. NULL is an unquoted empty
+    field and '' a quoted one, which is what the null options below distinguish.
+    """
+    pa = writer.pa
+    import pyarrow.csv as pacsv
+    schema = pa.schema([
+        pa.field(f.name, pa.string()) if pa.types.is_binary(f.type) else f for f in schema
+    ])
+    convert = pacsv.ConvertOptions(
+        column_types=schema,
+        true_values=['t'],
+        false_values=['f'],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=False,
+    )
+    writer.open_schema(schema)
+    if not stream.peek(1):
+        # empty result: pyarrow refuses an empty CSV, the writer still gets the schema
+        return
+    read = pacsv.ReadOptions(column_names=schema.names, block_size=1 << 22)
+    reader = pacsv.open_csv(stream, read_options=read, convert_options=convert)
+    for batch in reader:
+        writer.write_batch(batch)
+        if on_batch:
+            on_batch(batch.num_rows)
@@ -2,39 +2,58 @@
 """
 download_table_to_excel.py
 
-Interactive utility to export a table from either MSSQL or PostgreSQL to an Excel file.
+Interactive utility to export a table from either MSSQL or PostgreSQL to Excel,
+Parquet, Arrow IPC or CSV.
 
 Flow:
  - Ask the user which connection to use (MSSQL or PostgreSQL)
  - Ask for table name (supports schema.table or plain table)
  - Verify the table exists in the chosen database (prompts if not)
- - Show row count and, if large, ask whether to download all rows or a limited sample
- - Download the data into a DataFrame and save it to an Excel file
+ - Show row count and ask for the output format
+ - Stream every row in chunks (server-side cursor on PostgreSQL, fetchmany on MSSQL)
+   straight into the chosen writer (see export_writers.py), reporting progress in rows/s
  - Uses get_mssql_connection(), get_postgres_connection(), print_header(), get_output_path()
    from your db_config module.
 
 Notes:
  - Table identifiers are validated to allow only letters/digits/underscore and an optional schema.
- - For safety, if row count is large (default threshold 100k) you'll be asked to confirm or specify a limit.
- - Requires pandas and openpyxl.
+ - PostgreSQL exports to csv/parquet/arrow use COPY (...) TO STDOUT: the CSV byte
+   stream goes straight to the file, or through pyarrow's CSV reader into Parquet/Arrow,
+   without building Python row tuples.
+ - Large MSSQL tables can be read in parallel: the primary key (or a chosen int/date
+   column) is split into key ranges (key_ranges.py) that are fetched concurrently over
+   one pooled connection per worker (db_session.py), in key order or in arrival order.
+ - Memory use is bounded by CHUNK_SIZE rows, not by the table size, so large tables
+   are exported completely. Excel output rolls over to a new sheet every 1,048,575 rows.
+ - xlsx output needs openpyxl, Parquet/Arrow need pyarrow; both are only imported for
+   those formats, csv export needs neither (nor pandas).
 """
 
+import os
+import queue
 import re
 import sys
+import threading
+import time
 import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import pandas as pd
-from db_config import (
-    get_mssql_connection,
-    get_postgres_connection,
-    print_header,
-    get_output_path,
-)
+from db_config import print_header, get_output_path
+from db_session import get_mssql_connection, get_postgres_connection, pool_size
+from catalog_cache import cached_catalog
+from key_ranges import PARTITION_TYPES, plan_key_ranges
+from export_writers import EXPORT_FORMATS, arrow_schema, csv_stream_to_arrow, make_writer, write_metadata_file
+from row_counts import estimate_row_count
 
 
 # Config
-LARGE_TABLE_THRESHOLD = 100_000  # warn if table has more rows than this
+CHUNK_SIZE = 10_000              # rows fetched from the server per round trip
+PROGRESS_INTERVAL = 1.0          # seconds between progress lines
+PARALLEL_MIN_ROWS = 1_000_000    # offer partitioned extraction above this (MSSQL)
+PARALLEL_WORKERS = 4             # default number of concurrent range readers
+QUEUE_DEPTH = 4                  # chunks buffered per worker
 
 
 def valid_identifier(name: str) -> bool:
@@ -59,44 +78,25 @@ def parse_schema_table(name: str, default_schema: str) -> (str, str):
 
 
 def table_exists_mssql(conn, schema: str, table: str) -> bool:
-    q = f"""
-    SELECT 1
-    FROM INFORMATION_SCHEMA.TABLES
-    WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table}'
-    """
     try:
-        df = pd.read_sql(q, conn)
-        return not df.empty
+        return cached_catalog(conn, "mssql", schema, tables=[table]).table(table) is not None
     except Exception:
         return False
 
 
 def table_exists_postgres(conn, schema: str, table: str) -> bool:
-    q = f"""
-    SELECT 1
-    FROM information_schema.tables
-    WHERE table_schema = '{schema}' AND table_name = '{table}'
-    """
     try:
-        df = pd.read_sql(q, conn)
-        return not df.empty
+        return cached_catalog(conn, "postgres", schema, tables=[table]).table(table) is not None
     except Exception:
         return False
 
 
 def get_row_count(conn, db_type: str, schema: str, table: str) -> int:
-    if db_type == "mssql":
-        q = f"SELECT COUNT(*) AS cnt FROM [{schema}].[{table}]"
-    else:
-        # postgres
-        q = f"SELECT COUNT(*) AS cnt FROM \"{schema}\".\"{table}\""
+    """Catalog row estimate (no table scan), only used for progress and the parallel prompt."""
     try:
-        df = pd.read_sql(q, conn)
-        if not df.empty:
-            return int(df.iloc[0]["cnt"])
+        return estimate_row_count(conn, db_type, schema, table)
     except Exception:
-        pass
-    return -1
+        return -1
 
 
 def build_select_query(db_type: str, schema: str, table: str, limit: int = None) -> str:
@@ -113,8 +113,340 @@ def build_select_query(db_type: str, schema: str, table: str, limit: int = None)
         return base
 
 
+def iter_query_chunks(conn, db_type: str, query: str, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield (description, rows) for `query`, `chunk_size` rows at a time.
+
+    PostgreSQL uses a named (server-side) cursor so the result set stays on the
+    server; pyodbc already streams from the TDS connection, so fetchmany is enough.
+    """
+    if db_type == "postgres":
+        # withhold: a named cursor needs a transaction unless it is declared WITH HOLD
+        cursor = conn.cursor(name=f"export_{uuid.uuid4().hex}", withhold=bool(getattr(conn, "autocommit", False)))
+        cursor.itersize = chunk_size
+    else:
+        cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        # named cursors only have a description after the first fetch
+        rows = cursor.fetchmany(chunk_size)
+        description = cursor.description
+        yield description, rows  # may be empty: callers still get the header
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield description, rows
+    finally:
+        cursor.close()
+
+
+def _range_worker(schema: str, table: str, column: str, key_range, ordered: bool,
+                  chunk_size: int, out: "queue.Queue", stop: threading.Event, tag):
+    """Fetch one key range over its own connection, putting (tag, description, rows) on `out`."""
+    conn = None
+    try:
+        conn = get_mssql_connection()
+        where, params = key_range.where("mssql", column)
+        query = f"SELECT * FROM [{schema}].[{table}] WHERE {where}"
+        if ordered:
+            query += f" ORDER BY [{column}]"
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        description = cursor.description
+        while not stop.is_set():
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            _put(out, (tag, description, rows), stop)
+        _put(out, (tag, description, None), stop)
+    except Exception as e:
+        _put(out, (tag, None, e), stop)
+    finally:
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _put(out, item, stop):
+    # bounded queues: keep retrying so a cancelled export can still stop the worker
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def parallel_query_chunks(schema: str, table: str, column: str, ranges, workers: int = PARALLEL_WORKERS,
+                          ordered: bool = True, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield (description, rows) for all `ranges` of an MSSQL table, read concurrently.
+
+    ordered=True keeps key order: every range has its own bounded queue and they are
+    drained one after another, so workers run at most QUEUE_DEPTH chunks ahead.
+    ordered=False shares one queue and yields chunks as they arrive.
+    """
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(maxsize=QUEUE_DEPTH) for _ in ranges]
+    else:
+        shared = queue.Queue(maxsize=QUEUE_DEPTH * workers)
+        queues = [shared] * len(ranges)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for i, key_range in enumerate(ranges):
+            pool.submit(_range_worker, schema, table, column, key_range, ordered, chunk_size, queues[i], stop, i)
+
+        if ordered:
+            streams = [(queues[i], {i}) for i in range(len(ranges))]
+        else:
+            streams = [(queues[0], set(range(len(ranges))))]
+        description = None
+        yielded = False
+        for source, pending in streams:
+            while pending:
+                tag, desc, rows = source.get()
+                if isinstance(rows, Exception):
+                    raise rows
+                description = description or desc
+                if rows is None:
+                    pending.discard(tag)
+                elif rows:
+                    yielded = True
+                    yield description, rows
+        if not yielded and description is not None:
+            # empty table: callers still get the header
+            yield description, []
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def partition_column(table_info):
+    """Single-column primary key usable for key ranges, or None."""
+    pk = table_info.primary_key if table_info else []
+    if len(pk) == 1:
+        col = table_info.column(pk[0])
+        if col is not None and col.data_type in PARTITION_TYPES:
+            return col
+    return None
+
+
+def ask_partitioning(conn, schema: str, table: str):
+    """Prompt for key column, worker count and ordering; returns (ranges, column, workers, ordered)."""
+    table_info = cached_catalog(conn, "mssql", schema, tables=[table]).table(table)
+    col = partition_column(table_info)
+    prompt = f"Key column [{col.name}]: " if col else "Key column (integer or date): "
+    name = input(prompt).strip()
+    if name:
+        col = table_info.column(name) if table_info else None
+    if col is None or col.data_type not in PARTITION_TYPES:
+        print("✗ Need an existing integer or date/datetime column to partition on.")
+        return None, None, None, None
+
+    n = input(f"Number of workers [{PARALLEL_WORKERS}]: ").strip()
+    try:
+        workers = int(n) if n else PARALLEL_WORKERS
+    except ValueError:
+        print("Invalid number. Exiting.")
+        return None, None, None, None
+    # every worker borrows a pooled connection; this session already holds one
+    max_workers = max(1, pool_size("mssql") - 1)
+    if workers > max_workers:
+        print(f"Using {max_workers} workers (connection pool size {pool_size('mssql')}, see DB_POOL_SIZE).")
+        workers = max_workers
+    ordered = input("Keep rows in key order? (Y/n) ").strip().lower() != "n"
+
+    print("Planning key ranges...")
+    # a few ranges per worker evens out skew the histogram does not see
+    ranges = plan_key_ranges(conn, "mssql", schema, table, col.name, workers * 4,
+                             data_type=col.data_type, nullable=col.nullable)
+    return ranges, col.name, max(1, workers), ordered
+
+
+def copy_sql(query: str, header: bool) -> str:
+    return f"COPY ({query}) TO STDOUT WITH (FORMAT csv{', HEADER true' if header else ''})"
+
+
+def _prepare_copy_session(cursor):
+    # ISO dates and UTC offsets ('+00') are what the Arrow CSV parser expects
+    cursor.execute("SET DateStyle = 'ISO, MDY'")
+    cursor.execute("SET TIME ZONE 'UTC'")
+
+
+class _CopySink:
+    """File wrapper handed to copy_expert; counts lines for the progress display."""
+
+    def __init__(self, fh, progress):
+        self.fh = fh
+        self.progress = progress
+
+    def write(self, data):
+        self.fh.write(data)
+        # approximate: quoted values may contain newlines, the final count comes from COPY
+        self.progress.update(data.count(b"\n"))
+
+
+def pg_copy_to_csv(conn, query: str, output_file: str, progress) -> int:
+    """COPY the query result into a CSV file; returns the number of rows copied."""
+    cursor = conn.cursor()
+    try:
+        _prepare_copy_session(cursor)
+        with open(output_file, "wb") as fh:
+            cursor.copy_expert(copy_sql(query, header=True), _CopySink(fh, progress))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def pg_copy_to_arrow(conn, query: str, writer, progress) -> int:
+    """
+    COPY the query result into a Parquet/Arrow writer. COPY runs in a thread and
+    writes into a pipe; this thread parses the other end into record batches.
+    """
+    cursor = conn.cursor()
+    _prepare_copy_session(cursor)
+    cursor.execute(f"SELECT * FROM ({query}) q LIMIT 0")
+    schema = arrow_schema(cursor.description, "postgres")
+
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def produce():
+        try:
+            with os.fdopen(write_fd, "wb") as sink:
+                try:
+                    cursor.copy_expert(copy_sql(query, header=False), sink)
+                except Exception as e:
+                    # recorded before the pipe closes, so the reader sees it at end of stream
+                    errors.append(e)
+        except OSError as e:
+            # flushing the last buffer into a pipe the reader already closed
+            errors.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    copy_error = None
+    try:
+        # closing our end on failure unblocks the producer with a broken pipe
+        with os.fdopen(read_fd, "rb") as source:
+            try:
+                csv_stream_to_arrow(source, writer, schema, on_batch=progress.update)
+            except Exception:
+                # a COPY that failed before us truncated the stream: that error is the cause
+                copy_error = next((e for e in errors if not isinstance(e, BrokenPipeError)), None)
+                raise
+    except Exception:
+        producer.join()
+        if copy_error is not None:
+            raise copy_error
+        raise
+    finally:
+        producer.join()
+        cursor.close()
+    if errors:
+        raise errors[0]
+    return writer.rows_written
+
+
+class ExportProgress:
+    """Rows-so-far and throughput, printed at most every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, total: int = -1):
+        self.total = total
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def update(self, n: int):
+        self.rows += n
+        now = time.perf_counter()
+        if now - self._last >= PROGRESS_INTERVAL:
+            self._last = now
+            print("\r  " + self._line(now), end="", flush=True)
+
+    def _line(self, now: float) -> str:
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.rows / elapsed
+        if self.total > 0:
+            pct = min(100.0, 100.0 * self.rows / self.total)
+            return f"{self.rows:,}/{self.total:,} rows ({pct:.1f}%) - {rate:,.0f} rows/s"
+        return f"{self.rows:,} rows - {rate:,.0f} rows/s"
+
+    def finish(self) -> float:
+        now = time.perf_counter()
+        print("\r  " + self._line(now))
+        return now - self.started
+
+
+def export_table(conn, db_type: str, schema: str, table: str, fmt: str, row_count: int = -1,
+                 partitioning=None, output_file: str = None) -> str:
+    """
+    Stream one table into an EXPORT_FORMATS file; returns the output path.
+    `partitioning` is (ranges, key_column, workers, ordered) from ask_partitioning (MSSQL).
+    """
+    # prepare output path
+    if not output_file:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        safe_table_name = f"{schema}_{table}".replace(" ", "_")
+        output_file = get_output_path(f"export_{db_type}_{safe_table_name}_{timestamp}{EXPORT_FORMATS[fmt]}")
+
+    # stream query -> writer, one chunk at a time
+    print("\nFetching data...")
+    query = build_select_query(db_type, schema, table)
+    progress = ExportProgress(row_count)
+    metadata = {
+        "exported_at": datetime.now().isoformat(),
+        "source_db": db_type,
+        "schema": schema,
+        "table": table,
+    }
+    if db_type == "postgres" and fmt == "csv":
+        print("  (using COPY TO STDOUT)")
+        rows_exported = pg_copy_to_csv(conn, query, output_file, progress)
+        progress.rows = rows_exported
+        elapsed = progress.finish()
+        print(f"✓ Retrieved {rows_exported:,} rows in {elapsed:.1f}s.")
+        print(f"\nSaving to: {output_file}")
+        write_metadata_file(output_file, {**metadata, "rows_exported": rows_exported})
+    else:
+        writer = make_writer(fmt, output_file, table, db_type)
+        if db_type == "postgres" and fmt in ("parquet", "arrow"):
+            print("  (using COPY TO STDOUT)")
+            pg_copy_to_arrow(conn, query, writer, progress)
+            columns = writer.schema.names
+        else:
+            columns = None
+            if partitioning:
+                ranges, key_column, workers, ordered = partitioning
+                print(f"  ({len(ranges)} key ranges on {key_column}, {workers} workers, "
+                      f"{'key order' if ordered else 'arrival order'})")
+                chunks = parallel_query_chunks(schema, table, key_column, ranges, workers, ordered)
+            else:
+                chunks = iter_query_chunks(conn, db_type, query)
+            for description, rows in chunks:
+                if columns is None:
+                    columns = [d[0] for d in description]
+                    writer.open(description)
+                writer.write_rows(rows)
+                progress.update(len(rows))
+        elapsed = progress.finish()
+        print(f"✓ Retrieved {writer.rows_written:,} rows and {len(columns)} columns in {elapsed:.1f}s.")
+
+        print(f"\nSaving to: {output_file}")
+        writer.close({**metadata, "rows_exported": writer.rows_written})
+
+    print("✓ Export complete.")
+    print(f"File saved: {output_file}")
+    return output_file
+
+
 def main():
-    print_header("Export Table to Excel")
+    print_header("Export Table")
 
     # choose connection
     print("\nChoose connection to export from:")
@@ -165,77 +497,33 @@ def main():
         print(f"✓ Found table: {schema}.{table}")
 
         # row count
-        print("\nGetting row count (may take a moment)...")
         row_count = get_row_count(conn, db_type, schema, table)
         if row_count == -1:
-            print("Could not determine row count. Proceeding without row-count guard.")
+            print("\nNo row count estimate available. Progress will show rows so far only.")
         else:
-            print(f"Row count: {row_count:,}")
-
-        # handle large tables
-        limit = None
-        if row_count == -1:
-            # unknown, ask user whether download all or sample
-            ans = input("Row count unknown. Download all rows? (y/N) ").strip().lower()
-            if ans != "y":
-                n = input("Enter row limit to download (e.g. 1000) or press Enter to cancel: ").strip()
-                if not n:
-                    print("Cancelled.")
-                    return
-                try:
-                    limit = int(n)
-                except ValueError:
-                    print("Invalid number. Exiting.")
-                    return
-        else:
-            if row_count > LARGE_TABLE_THRESHOLD:
-                print(f"Warning: table has more than {LARGE_TABLE_THRESHOLD:,} rows.")
-                print("Downloading very large tables may take a long time and produce a very large Excel file.")
-                ans = input("Do you want to (A)ll rows, (L)imit rows, or (C)ancel? [L] ").strip().lower()
-                if ans == "a":
-                    limit = None
-                elif ans == "c" or ans == "":
-                    print("Cancelled.")
+            print(f"\nRow count (estimate): {row_count:,}")
+
+        # output format
+        formats = list(EXPORT_FORMATS)
+        print("\nChoose output format:")
+        for i, fmt in enumerate(formats, 1):
+            print(f"  {i}) {fmt}")
+        ans = input("Enter choice [1]: ").strip() or "1"
+        if ans not in [str(i) for i in range(1, len(formats) + 1)]:
+            print("Invalid choice. Exiting.")
+            return
+        fmt = formats[int(ans) - 1]
+
+        # partitioned extraction (MSSQL)
+        partitioning = None
+        if db_type == "mssql" and (row_count == -1 or row_count >= PARALLEL_MIN_ROWS):
+            ans = input("\nUse parallel key-range extraction? (y/N) ").strip().lower()
+            if ans == "y":
+                partitioning = ask_partitioning(conn, schema, table)
+                if partitioning[0] is None:
                     return
-                else:
-                    n = input("Enter row limit to download (e.g. 10000): ").strip()
-                    try:
-                        limit = int(n)
-                    except ValueError:
-                        print("Invalid number. Exiting.")
-                        return
-
-        # build and run query
-        print("\nFetching data...")
-        query = build_select_query(db_type, schema, table, limit=limit)
-        # Use pandas to read query
-        # Note: pandas may warn if connection is not SQLAlchemy engine; that's fine.
-        df = pd.read_sql(query, conn)
-        print(f"✓ Retrieved {len(df):,} rows and {len(df.columns)} columns.")
-
-        # prepare output path
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_table_name = f"{schema}_{table}".replace(" ", "_")
-        output_file = get_output_path(f"export_{db_type}_{safe_table_name}_{timestamp}.xlsx")
-        print(f"\nSaving to: {output_file}")
 
-        # Write to Excel
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-            # Write the data sheet
-            sheet_name = table if len(table) <= 31 else table[:31]
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            # Optionally add a small metadata sheet
-            meta = {
-                "exported_at": [datetime.now().isoformat()],
-                "source_db": [db_type],
-                "schema": [schema],
-                "table": [table],
-                "rows_exported": [len(df)],
-            }
-            pd.DataFrame(meta).to_excel(writer, sheet_name="__metadata", index=False)
-
-        print("✓ Export complete.")
-        print(f"File saved: {output_file}")
+        export_table(conn, db_type, schema, table, fmt, row_count, partitioning)
 
     except Exception as e:
         print("\n✗ Export failed!")
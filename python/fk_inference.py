@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+fk_inference.py
+
+Foreign-key inference for schemas without declared foreign keys, and the table
+order the migrations have to run in.
+
+A column C references a key column K when every value of C is also a value of K
+(an inclusion dependency). Testing that with a join for every column pair of
+hundreds of tables is out of the question, so:
+
+ 1. Candidates from the catalog snapshot (catalog.py), across all given schemas:
+     - key columns   : single-column primary keys and unique indexes; tables
+                       without either offer columns named ID / <table>ID / <table>_ID
+     - referencing   : every other column of a key-like type (integer, decimal,
+                       string up to MAX_KEY_LENGTH, uuid) without a declared FK
+ 2. Key sketches, one query per table: every candidate column's values are hashed
+    on the server (lower-cased, trimmed text, decimals without trailing zeros, so
+    int 42, numeric 42.00 and '42' agree) and
+    GROUPING SETS + ROW_NUMBER() keep the SKETCH_SIZE smallest distinct hashes of
+    each column, plus its exact distinct count. Smallest-hash samples are
+    coordinated: a value kept for C whose hash is below K's largest kept hash is
+    kept for K too whenever K contains it. Sketches are cached by table stamp in
+    the catalog cache file (catalog_cache.py).
+ 3. Hash buckets instead of all pairs: every key column's hashes go into an
+    inverted index; a referencing column only meets the key columns it shares a
+    hash with. Containment = shared hashes / C's hashes that K's sketch can decide.
+    Pairs with containment >= MIN_CONTAINMENT, enough evidence and no more
+    distinct values than the key are ranked (containment, then name similarity).
+    Small integers are contained in every identity column, so numeric columns
+    also need a name hint (MIN_NAME_SCORE), and a key column only references a
+    table whose name it contains (OrderDetail.OrderID -> Order.OrderID).
+ 4. The top CONFIRM_LIMIT candidates are confirmed with an exact anti-join, run
+    concurrently on pooled connections:
+        SELECT COUNT(*) FROM child c WHERE c.col IS NOT NULL
+           AND NOT EXISTS (SELECT 1 FROM parent p WHERE p.key = c.col)
+ 5. Declared and confirmed foreign keys give the migration order: parents before
+    children (topological levels); cycles are reported, self-references ignored.
+
+Confirmed foreign keys are stored in the catalog cache, so comparetable.py shows
+them in its FOREIGN_KEY column (marked "inferred").
+
+Usage:
+    python fk_inference.py                                  # interactive
+    python fk_inference.py --db mssql --schemas dbo,sales [--min-containment 0.95] [--confirm 200]
+"""
+
+import time
+import traceback
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from db_config import print_header, get_output_path
+from catalog import ColumnInfo, TableInfo
+from catalog_cache import CatalogCache, cache_enabled, cached_catalog, connection_identity, fetch_stamps
+from column_profile import MAX_COLUMNS_PER_QUERY
+from db_utils import fetchall, qualified_table, quote_ident
+from name_matching import name_features, persisted_features
+from similarity import ratio
+from type_compat import type_family
+
+KEY_FAMILIES = {'integer', 'decimal', 'string', 'uuid'}
+MAX_KEY_LENGTH = 450          # longer strings are not treated as keys
+SKETCH_SIZE = 2048            # smallest distinct value hashes kept per column
+MIN_CONTAINMENT = 0.95
+MIN_EVIDENCE = 3              # hashes a key sketch must be able to decide
+MIN_NAME_SCORE = 0.5          # numeric columns only: value inclusion alone proves little
+CANDIDATES_PER_COLUMN = 2
+CONFIRM_LIMIT = 200
+CONFIRM_WORKERS = 4
+
+_NO_THRESHOLD = 1 << 63       # above every signed 64-bit hash: the sketch holds every value
+
+FK_COLUMNS = ['STATUS', 'SCHEMA', 'TABLE', 'COLUMN', 'REF_SCHEMA', 'REF_TABLE', 'REF_COLUMN',
+              'CONTAINMENT', 'SHARED', 'DISTINCT', 'REF_DISTINCT', 'NAME_SCORE', 'ORPHANS']
+ORDER_COLUMNS = ['LEVEL', 'SCHEMA', 'TABLE', 'DEPENDS_ON', 'NOTE']
+
+
+@dataclass
+class KeySketch:
+    schema: str
+    table: str
+    column: str
+    data_type: str
+    family: str
+    distinct: int
+    hashes: List[int]         # sorted, at most SKETCH_SIZE
+
+    @property
+    def threshold(self) -> int:
+        """Largest hash this sketch can vouch for: the sketch is complete below it."""
+        return self.hashes[-1] if self.distinct > len(self.hashes) else _NO_THRESHOLD
+
+    @property
+    def label(self) -> str:
+        return f"{self.schema}.{self.table}.{self.column}"
+
+
+@dataclass
+class Candidate:
+    child: KeySketch
+    parent: KeySketch
+    containment: float
+    shared: int
+    name_score: float
+    status: str = 'candidate'
+    orphans: Optional[int] = None
+
+
+@dataclass
+class InferenceResult:
+    db_type: str
+    schemas: List[str]
+    candidates: List[Candidate] = field(default_factory=list)
+    declared: List[Tuple[TableInfo, str, str, str, str]] = field(default_factory=list)
+    order: List[Tuple[int, str, str, List[str], str]] = field(default_factory=list)
+
+
+# -------------------------
+# Candidate columns
+# -------------------------
+def _key_type(db_type: str, col: ColumnInfo) -> bool:
+    if type_family(db_type, col.data_type) not in KEY_FAMILIES:
+        return False
+    return not (col.max_length is not None and (col.max_length < 0 or col.max_length > MAX_KEY_LENGTH))
+
+
+def key_columns(db_type: str, table: TableInfo) -> List[ColumnInfo]:
+    """Columns other tables can reference: single-column PK / unique index, else ID-named columns."""
+    keyed = [idx.columns[0] for idx in table.indexes if (idx.is_primary or idx.is_unique) and len(idx.columns) == 1]
+    if not keyed:
+        compact = name_features(table.name).compact
+        names = {'id', f"{compact}id"}
+        keyed = [c.name for c in table.columns if name_features(c.name).compact in names]
+    cols = [table.column(name) for name in dict.fromkeys(keyed)]
+    return [c for c in cols if c is not None and _key_type(db_type, c)]
+
+
+def referencing_columns(db_type: str, table: TableInfo) -> List[ColumnInfo]:
+    """Columns that may hold references: key-like types, no declared foreign key."""
+    declared = {c for fk in table.foreign_keys for c in fk.columns}
+    return [c for c in table.columns if c.name not in declared and _key_type(db_type, c)]
+
+
+# -------------------------
+# Key sketches
+# -------------------------
+def _trim_decimal(db_type: str, text: str) -> str:
+    """Decimal text without trailing fractional zeros or point: 42.00 -> 42, 1.50 -> 1.5."""
+    if db_type == 'mssql':
+        zeros = f"LEFT({text}, LEN({text}) - PATINDEX('%[^0]%', REVERSE({text})) + 1)"
+        trimmed = f"CASE WHEN {zeros} LIKE '%.' THEN LEFT({zeros}, LEN({zeros}) - 1) ELSE {zeros} END"
+    else:
+        trimmed = f"rtrim(rtrim({text}, '0'), '.')"
+    return f"CASE WHEN {text} LIKE '%.%' THEN {trimmed} ELSE {text} END"
+
+
+def _key_text(db_type: str, col: ColumnInfo, alias: str = None) -> str:
+    """Text form of a key value, the same for int 42, numeric(10,2) 42.00 and '42 '."""
+    name = quote_ident(db_type, col.name)
+    if alias:
+        name = f"{alias}.{name}"
+    if db_type == 'mssql':
+        text = f"CAST({name} AS nvarchar({MAX_KEY_LENGTH}))"
+    else:
+        text = f"{name}::text"
+    if type_family(db_type, col.data_type) == 'decimal':
+        return _trim_decimal(db_type, text)
+    if db_type == 'mssql':
+        return f"LOWER(RTRIM({text}))"
+    return f"lower(rtrim({text}))"
+
+
+def _hash_expr(db_type: str, col: ColumnInfo) -> str:
+    """Signed 64-bit hash of the key text (NULL stays NULL)."""
+    if db_type == 'mssql':
+        return f"CAST(SUBSTRING(HASHBYTES('MD5', {_key_text(db_type, col)}), 1, 8) AS bigint)"
+    return f"hashtextextended({_key_text(db_type, col)}, 0)"
+
+
+def sketch_query(db_type: str, table: TableInfo, columns: List[ColumnInfo], size: int = SKETCH_SIZE) -> str:
+    """(column index, hash, distinct count) rows: the `size` smallest distinct hashes of every column."""
+    hashed = ', '.join(f"{_hash_expr(db_type, c)} AS h{k}" for k, c in enumerate(columns))
+    sets = ', '.join(f"(h{k})" for k in range(len(columns)))
+    col_no = ' '.join(f"WHEN GROUPING(h{k}) = 0 THEN {k}" for k in range(len(columns)))
+    value = ' '.join(f"WHEN GROUPING(h{k}) = 0 THEN h{k}" for k in range(len(columns)))
+    return (f"SELECT col_no, h, d FROM ("
+            f"SELECT col_no, h, ROW_NUMBER() OVER (PARTITION BY col_no ORDER BY h) AS rn, "
+            f"COUNT(*) OVER (PARTITION BY col_no) AS d "
+            f"FROM (SELECT CASE {col_no} END AS col_no, CASE {value} END AS h "
+            f"FROM (SELECT {hashed} FROM {qualified_table(db_type, table.schema, table.name)}) s "
+            f"GROUP BY GROUPING SETS ({sets})) g "
+            f"WHERE h IS NOT NULL) r WHERE rn <= {int(size)} ORDER BY col_no, rn")
+
+
+def sketch_table(conn, db_type: str, table: TableInfo, columns: List[ColumnInfo],
+                 size: int = SKETCH_SIZE) -> Dict[str, KeySketch]:
+    sketches = {c.name: KeySketch(table.schema, table.name, c.name, c.data_type,
+                                  type_family(db_type, c.data_type), 0, []) for c in columns}
+    for start in range(0, len(columns), MAX_COLUMNS_PER_QUERY):
+        chunk = columns[start:start + MAX_COLUMNS_PER_QUERY]
+        for col_no, h, d in fetchall(conn, sketch_query(db_type, table, chunk, size)):
+            sketch = sketches[chunk[int(col_no)].name]
+            sketch.hashes.append(int(h))
+            sketch.distinct = int(d)
+    return sketches
+
+
+def table_key_sketches(conn, db_type: str, table: TableInfo, columns: List[ColumnInfo],
+                       size: int = SKETCH_SIZE) -> Dict[str, KeySketch]:
+    """Key sketches of a table, from the catalog cache file while the table stamp is unchanged."""
+    if not cache_enabled():
+        return sketch_table(conn, db_type, table, columns, size)
+    cache = CatalogCache()
+    try:
+        cache_key = f"fk|{db_type}|{connection_identity(conn, db_type)}|{table.schema}"
+        stamp = fetch_stamps(conn, db_type, table.schema, [table.name]).get(table.name, '')
+        cached = cache.load_sketches(cache_key, table.name)
+        if cached is not None:
+            cached_stamp, _, payload = cached
+            stored = payload.get('columns', {})
+            if cached_stamp == stamp and payload.get('size') == size and all(c.name in stored for c in columns):
+                return {c.name: KeySketch(table.schema, table.name, c.name, c.data_type,
+                                          type_family(db_type, c.data_type), stored[c.name]['distinct'],
+                                          stored[c.name]['hashes']) for c in columns}
+        sketches = sketch_table(conn, db_type, table, columns, size)
+        cache.store_sketches(cache_key, table.name, stamp, {
+            'size': size,
+            'columns': {name: {'distinct': s.distinct, 'hashes': s.hashes} for name, s in sketches.items()},
+        })
+        return sketches
+    finally:
+        cache.close()
+
+
+def fetch_key_sketches(db_type: str, requests: List[Tuple[TableInfo, List[ColumnInfo]]],
+                       workers: int = CONFIRM_WORKERS) -> List[KeySketch]:
+    """Sketches of the requested (table, columns), one pooled connection per worker."""
+    from db_session import connection, pool_size
+
+    def load(request):
+        table, columns = request
+        try:
+            with connection(db_type) as conn:
+                return list(table_key_sketches(conn, db_type, table, columns).values())
+        except Exception as e:
+            print(f"  ✗ {table.schema}.{table.name}: {e}")
+            return []
+
+    workers = max(1, min(workers, pool_size(db_type)))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(load, requests))
+    print(f"✓ Key sketches for {len(requests)} tables ({time.perf_counter() - started:.1f}s)")
+    return [s for sketches in results for s in sketches]
+
+
+# -------------------------
+# Candidate pairs
+# -------------------------
+def name_score(child: KeySketch, parent: KeySketch) -> float:
+    """How much the referencing column's name looks like the key it points to (CustomerID -> Customer.ID)."""
+    c = name_features(child.column).compact
+    t = name_features(parent.table).compact
+    k = name_features(parent.column).compact
+    # a bare "ID" key says nothing about which table a column points to
+    return max(ratio(c, k) if k != 'id' else 0.0, ratio(c, t + k), ratio(c, t + 'id'))
+
+
+def candidate_pairs(children: List[KeySketch], parents: List[KeySketch],
+                    min_containment: float = MIN_CONTAINMENT,
+                    per_column: int = CANDIDATES_PER_COLUMN) -> List[Candidate]:
+    """Likely (referencing column -> key column) pairs, found through shared value hashes."""
+    buckets = defaultdict(list)
+    for p, parent in enumerate(parents):
+        for h in parent.hashes:
+            buckets[h].append(p)
+
+    keys = {parent.label for parent in parents}
+    found = []
+    for child in children:
+        if not child.hashes:
+            continue
+        compact = name_features(child.column).compact
+        shared = defaultdict(int)
+        for h in child.hashes:
+            for p in buckets.get(h, ()):
+                shared[p] += 1
+        pairs = []
+        for p, n in shared.items():
+            parent = parents[p]
+            if parent.label == child.label or child.distinct > parent.distinct:
+                continue
+            decidable = bisect_right(child.hashes, parent.threshold)
+            if decidable < min(MIN_EVIDENCE, child.distinct):
+                continue
+            containment = n / decidable
+            if containment < min_containment:
+                continue
+            if child.label in keys and name_features(parent.table).compact not in compact:
+                continue
+            score = name_score(child, parent)
+            if child.family in ('integer', 'decimal') and score < MIN_NAME_SCORE:
+                continue
+            pairs.append(Candidate(child, parent, round(containment, 4), n, round(score, 4)))
+        pairs.sort(key=lambda c: (c.containment, c.name_score, c.shared), reverse=True)
+        found += pairs[:per_column]
+    found.sort(key=lambda c: (c.containment, c.name_score, c.shared), reverse=True)
+    return found
+
+
+# -------------------------
+# Confirmation
+# -------------------------
+def anti_join_query(db_type: str, child: TableInfo, child_col: ColumnInfo,
+                    parent: TableInfo, parent_col: ColumnInfo) -> str:
+    """Referencing rows without a matching key (0 = inclusion holds)."""
+    c_name = f"c.{quote_ident(db_type, child_col.name)}"
+    family = type_family(db_type, child_col.data_type)
+    if family is not None and family == type_family(db_type, parent_col.data_type):
+        match = f"p.{quote_ident(db_type, parent_col.name)} = {c_name}"
+    else:
+        match = f"{_key_text(db_type, parent_col, 'p')} = {_key_text(db_type, child_col, 'c')}"
+    return (f"SELECT COUNT(*) FROM {qualified_table(db_type, child.schema, child.name)} c "
+            f"WHERE {c_name} IS NOT NULL AND NOT EXISTS ("
+            f"SELECT 1 FROM {qualified_table(db_type, parent.schema, parent.name)} p WHERE {match})")
+
+
+def confirm_candidates(db_type: str, candidates: List[Candidate], tables: Dict[Tuple[str, str], TableInfo],
+                       workers: int = CONFIRM_WORKERS, max_orphans: int = 0):
+    """
+    Run the anti-join of every candidate concurrently; sets status to confirmed / rejected / failed.
+    A column with several confirmed keys keeps the best ranked; the others become 'alternative'.
+    """
+    from db_session import connection, pool_size
+
+    def confirm(candidate):
+        child = tables[(candidate.child.schema, candidate.child.table)]
+        parent = tables[(candidate.parent.schema, candidate.parent.table)]
+        sql = anti_join_query(db_type, child, child.column(candidate.child.column),
+                              parent, parent.column(candidate.parent.column))
+        try:
+            with connection(db_type) as conn:
+                candidate.orphans = int(fetchall(conn, sql)[0][0])
+            candidate.status = 'confirmed' if candidate.orphans <= max_orphans else 'rejected'
+        except Exception as e:
+            print(f"  ✗ {candidate.child.label} -> {candidate.parent.label}: {e}")
+            candidate.status = 'failed'
+
+    workers = max(1, min(workers, pool_size(db_type)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(confirm, candidates))
+    seen = set()
+    for candidate in candidates:
+        if candidate.status == 'confirmed':
+            if candidate.child.label in seen:
+                candidate.status = 'alternative'
+            seen.add(candidate.child.label)
+
+
+# -------------------------
+# Migration order
+# -------------------------
+def migration_order(tables: List[Tuple[str, str]],
+                    edges: List[Tuple[Tuple[str, str], Tuple[str, str]]]) -> List[Tuple[int, str, str, List[str], str]]:
+    """
+    (level, schema, table, depends_on, note) with every table after the tables it references.
+    edges are (child, parent) pairs of (schema, table); tables in a cycle come last.
+    """
+    parents = defaultdict(set)
+    children = defaultdict(set)
+    for child, parent in edges:
+        if child != parent and child in tables and parent in tables:
+            parents[child].add(parent)
+            children[parent].add(child)
+
+    waiting = {t: len(parents[t]) for t in tables}
+    level = sorted((t for t in tables if waiting[t] == 0), key=lambda t: (t[0].lower(), t[1].lower()))
+    order, depth = [], 0
+    while level:
+        nxt = []
+        for t in level:
+            order.append((depth, t[0], t[1], sorted(f"{s}.{n}" for s, n in parents[t]), ''))
+            for child in children[t]:
+                waiting[child] -= 1
+                if waiting[child] == 0:
+                    nxt.append(child)
+        level = sorted(nxt, key=lambda t: (t[0].lower(), t[1].lower()))
+        depth += 1
+    for t in sorted((t for t in tables if waiting[t] > 0), key=lambda t: (t[0].lower(), t[1].lower())):
+        order.append((depth, t[0], t[1], sorted(f"{s}.{n}" for s, n in parents[t]), 'cycle'))
+    return order
+
+
+# -------------------------
+# Inference
+# -------------------------
+def infer_foreign_keys(db_type: str = 'mssql', schemas: Optional[List[str]] = None,
+                       min_containment: float = MIN_CONTAINMENT, confirm_limit: int = CONFIRM_LIMIT,
+                       workers: int = CONFIRM_WORKERS) -> InferenceResult:
+    """Infer foreign keys across `schemas` of one database and derive the migration order."""
+    from db_session import connection
+
+    schemas = schemas or [('dbo' if db_type == 'mssql' else 'public')]
+    tables: Dict[Tuple[str, str], TableInfo] = {}
+    with connection(db_type) as conn:
+        for schema in schemas:
+            catalog = cached_catalog(conn, db_type, schema)
+            # views declare no keys and hold no rows of their own
+            for name in catalog.table_names():
+                info = catalog.tables[name]
+                tables[(info.schema, info.name)] = info
+    print(f"✓ {len(tables)} tables in {', '.join(schemas)}")
+
+    result = InferenceResult(db_type, schemas)
+    requests, key_labels = [], set()
+    for info in tables.values():
+        for fk in info.foreign_keys:
+            for col, ref_col in zip(fk.columns, fk.ref_columns):
+                result.declared.append((info, col, fk.ref_schema, fk.ref_table, ref_col))
+        keys = key_columns(db_type, info)
+        key_labels.update(f"{info.schema}.{info.name}.{c.name}" for c in keys)
+        columns = list({c.name: c for c in keys + referencing_columns(db_type, info)}.values())
+        if columns:
+            requests.append((info, columns))
+    print(f"  {len(key_labels)} key columns, {sum(len(c) for _, c in requests)} sketched columns, "
+          f"{len(result.declared)} declared foreign key columns")
+
+    sketches = fetch_key_sketches(db_type, requests, workers)
+    parents = [s for s in sketches if s.label in key_labels]
+    declared = {c for info in tables.values() for fk in info.foreign_keys
+                for c in (f"{info.schema}.{info.name}.{col}" for col in fk.columns)}
+    children = [s for s in sketches if s.label not in declared]
+    started = time.perf_counter()
+    candidates = candidate_pairs(children, parents, min_containment)
+    print(f"✓ {len(candidates)} candidates from {len(children)} columns x {len(parents)} keys "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    to_confirm = candidates[:confirm_limit]
+    if to_confirm:
+        started = time.perf_counter()
+        confirm_candidates(db_type, to_confirm, tables, workers)
+        confirmed = sum(c.status == 'confirmed' for c in to_confirm)
+        print(f"✓ {confirmed} of {len(to_confirm)} candidates confirmed by anti-join "
+              f"({time.perf_counter() - started:.1f}s)")
+    result.candidates = candidates
+
+    edges = [((info.schema, info.name), (ref_schema, ref_table)) for info, _, ref_schema, ref_table, _ in result.declared]
+    edges += [((c.child.schema, c.child.table), (c.parent.schema, c.parent.table))
+              for c in candidates if c.status == 'confirmed']
+    result.order = migration_order(list(tables), edges)
+    return result
+
+
+def store_confirmed(db_type: str, result: InferenceResult):
+    """Keep the confirmed foreign keys in the catalog cache (shown by comparetable.py)."""
+    if not cache_enabled():
+        return
+    from db_session import connection
+    with connection(db_type) as conn:
+        identity = connection_identity(conn, db_type)
+    rows = defaultdict(list)
+    for c in result.candidates:
+        if c.status == 'confirmed':
+            rows[c.child.schema].append((c.child.table, c.child.column, c.parent.schema, c.parent.table, c.parent.column))
+    cache = CatalogCache()
+    try:
+        for schema in result.schemas:
+            cache.store_inferred_fks(f"{db_type}|{identity}|{schema}", rows.get(schema, []))
+    finally:
+        cache.close()
+
+
+def inferred_fk_labels(db_type: str, schema: str, table: str) -> Dict[str, str]:
+    """{column: 'ref_table(ref_column)'} of confirmed inferred foreign keys; {} if none or unavailable."""
+    if not cache_enabled():
+        return {}
+    try:
+        from db_session import connection
+        with connection(db_type) as conn:
+            identity = connection_identity(conn, db_type)
+        cache = CatalogCache()
+        try:
+            rows = cache.load_inferred_fks(f"{db_type}|{identity}|{schema}", table)
+        finally:
+            cache.close()
+    except Exception:
+        return {}
+    labels = {}
+    for column, ref_schema, ref_table, ref_column in rows:
+        ref = ref_table if ref_schema == schema else f"{ref_schema}.{ref_table}"
+        labels.setdefault(column, f"{ref}({ref_column})")
+    return labels
+
+
+# -------------------------
+# Report
+# -------------------------
+def result_frames(result: InferenceResult) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+    import pandas as pd
+    records = [{
+        'STATUS': 'declared', 'SCHEMA': info.schema, 'TABLE': info.name, 'COLUMN': col,
+        'REF_SCHEMA': ref_schema, 'REF_TABLE': ref_table, 'REF_COLUMN': ref_col,
+    } for info, col, ref_schema, ref_table, ref_col in result.declared]
+    records += [{
+        'STATUS': c.status, 'SCHEMA': c.child.schema, 'TABLE': c.child.table, 'COLUMN': c.child.column,
+        'REF_SCHEMA': c.parent.schema, 'REF_TABLE': c.parent.table, 'REF_COLUMN': c.parent.column,
+        'CONTAINMENT': c.containment, 'SHARED': c.shared, 'DISTINCT': c.child.distinct,
+        'REF_DISTINCT': c.parent.distinct, 'NAME_SCORE': c.name_score, 'ORPHANS': c.orphans,
+    } for c in result.candidates]
+    fks = pd.DataFrame(records, columns=FK_COLUMNS)
+    for col in ('SHARED', 'DISTINCT', 'REF_DISTINCT', 'ORPHANS'):
+        fks[col] = fks[col].astype('Int64')
+    order = pd.DataFrame([{'LEVEL': lvl, 'SCHEMA': s, 'TABLE': t, 'DEPENDS_ON': ', '.join(deps), 'NOTE': note}
+                          for lvl, s, t, deps, note in result.order], columns=ORDER_COLUMNS)
+    return fks, order
+
+
+def write_result(fks: 'pd.DataFrame', order: 'pd.DataFrame', output_file: str):
+    from excel_report import ExcelReport, OK_COLOR
+    with ExcelReport(output_file) as report:
+        sheet = report.frame_sheet('Foreign_Keys', fks, widths=[12, 12, 35, 30, 12, 35, 30, 13, 10, 12, 12, 12, 10])
+        sheet.highlight_rows('A', OK_COLOR, last_column='M', equals=['confirmed'])
+        report.frame_sheet('Migration_Order', order, widths=[8, 12, 40, 80, 10])
+
+
+def run_inference(db_type: str = 'mssql', schemas: Optional[List[str]] = None,
+                  min_containment: float = MIN_CONTAINMENT, confirm_limit: int = CONFIRM_LIMIT,
+                  workers: int = CONFIRM_WORKERS, output_file: str = None) -> InferenceResult:
+    print_header(f"Foreign-Key Inference ({db_type.upper()})")
+    started = datetime.now()
+    result = infer_foreign_keys(db_type, schemas, min_containment, confirm_limit, workers)
+    elapsed = (datetime.now() - started).total_seconds()
+    store_confirmed(db_type, result)
+
+    confirmed = [c for c in result.candidates if c.status == 'confirmed']
+    print(f"\n{'Referencing column':<50} {'Key column':<50} {'contain':>8}")
+    print("-" * 112)
+    for c in confirmed:
+        print(f"{c.child.label[:50]:<50} {c.parent.label[:50]:<50} {c.containment:>8.2f}")
+    levels = max((lvl for lvl, *_ in result.order), default=-1) + 1
+    cycles = sum(1 for *_, note in result.order if note == 'cycle')
+    print(f"\n{len(confirmed)} inferred foreign keys confirmed, {len(result.declared)} declared, "
+          f"{levels} migration levels, {cycles} tables in cycles, {elapsed:.1f}s")
+
+    if not output_file:
+        output_file = get_output_path(f"ForeignKeys_{db_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    write_result(*result_frames(result), output_file)
+    print(f"Report saved: {output_file}")
+    return result
+
+
+def main():
+    print("\n" + "=" * 80)
+    db_type = input("Database (mssql/postgres) [mssql]: ").strip().lower() or 'mssql'
+    schemas = input("Schemas, comma separated (Enter for the default schema): ").strip()
+    print("=" * 80)
+    try:
+        run_inference(db_type, [s.strip() for s in schemas.split(',') if s.strip()] or None)
+    except Exception as e:
+        print("✗ Failed:", e)
+        traceback.print_exc()
+
+
+def cli(argv=None):
+    """Interactive without arguments."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Foreign-key inference and migration order")
+    parser.add_argument('--db', choices=['mssql', 'postgres'])
+    parser.add_argument('--schemas', help="comma separated schemas (default dbo / public)")
+    parser.add_argument('--min-containment', type=float, default=MIN_CONTAINMENT,
+                        help="estimated share of values found in the key column (default 0.95)")
+    parser.add_argument('--confirm', type=int, default=CONFIRM_LIMIT, help="candidates confirmed by anti-join")
+    parser.add_argument('--workers', type=int, default=CONFIRM_WORKERS)
+    parser.add_argument('--output', help="report path (.xlsx)")
+    args = parser.parse_args(argv)
+
+    with persisted_features():
+        if not args.db:
+            main()
+            return
+        schemas = [s.strip() for s in args.schemas.split(',') if s.strip()] if args.schemas else None
+        run_inference(args.db, schemas, args.min_containment, args.confirm, args.workers, args.output)
+
+
+if __name__ == '__main__':
+    cli()
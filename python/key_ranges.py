@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+key_ranges.py
+
+Split a table into key ranges on one ordered column (usually the primary key) so it
+can be read in parallel, or compared range by range.
+
+    ranges = plan_key_ranges(conn, 'mssql', 'dbo', 'TBL_EVENTMASTER', 'EventID', 8)
+    for r in ranges:
+        sql, params = r.where('mssql', 'EventID')   # "[EventID] >= ? AND [EventID] < ?"
+
+The first range has no lower bound and the last no upper bound, so rows outside
+stale statistics (or inserted meanwhile) are never lost. Nullable columns get an
+extra IS NULL range.
+
+Split points come from the column's statistics histogram on MSSQL
+(sys.dm_db_stats_histogram, SQL Server 2016 SP1 CU2+) so ranges hold roughly equal
+row counts; otherwise min/max is split into equal-width intervals.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional
+
+from db_utils import fetchall, qualified_table, quote_ident
+
+INTEGER_TYPES = {'tinyint', 'smallint', 'int', 'bigint', 'integer'}
+DATE_TYPES = {'date', 'datetime', 'datetime2', 'smalldatetime',
+              'timestamp without time zone', 'timestamp with time zone'}
+PARTITION_TYPES = INTEGER_TYPES | DATE_TYPES
+
+MSSQL_HISTOGRAM_SQL = """
+    SELECT s.stats_id, CAST(h.range_high_key AS {cast_type}), h.range_rows + h.equal_rows
+    FROM sys.stats s
+    JOIN sys.stats_columns sc ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id AND sc.stats_column_id = 1
+    JOIN sys.columns c ON c.object_id = sc.object_id AND c.column_id = sc.column_id
+    CROSS APPLY sys.dm_db_stats_histogram(s.object_id, s.stats_id) h
+    WHERE s.object_id = OBJECT_ID(?) AND c.name = ?
+    ORDER BY s.stats_id, h.step_number
+"""
+
+
+@dataclass
+class KeyRange:
+    """[lo, hi) on the key column; None means unbounded. is_null selects the NULL keys."""
+    lo: Any = None
+    hi: Any = None
+    is_null: bool = False
+
+    def where(self, db_type: str, column: str):
+        """(sql, params) predicate for this range; placeholders match the driver."""
+        col = quote_ident(db_type, column)
+        mark = '?' if db_type == 'mssql' else '%s'
+        if self.is_null:
+            return f"{col} IS NULL", ()
+        parts, params = [], []
+        if self.lo is not None:
+            parts.append(f"{col} >= {mark}")
+            params.append(self.lo)
+        if self.hi is not None:
+            parts.append(f"{col} < {mark}")
+            params.append(self.hi)
+        if not parts:
+            return f"{col} IS NOT NULL", ()
+        return ' AND '.join(parts), tuple(params)
+
+
+def key_bounds(conn, db_type: str, schema: str, table: str, column: str):
+    col = quote_ident(db_type, column)
+    rows = fetchall(conn, f"SELECT MIN({col}), MAX({col}) FROM {qualified_table(db_type, schema, table)}")
+    return tuple(rows[0]) if rows else (None, None)
+
+
+def split_points(lo, hi, n: int) -> List[Any]:
+    """n - 1 equal-width interior split points between lo and hi (ints, dates, datetimes)."""
+    if lo is None or hi is None or n <= 1 or hi <= lo:
+        return []
+    if isinstance(lo, datetime):
+        points = [lo + (hi - lo) * k / n for k in range(1, n)]
+    elif isinstance(lo, date):
+        days = (hi - lo).days
+        points = [lo + timedelta(days=days * k // n) for k in range(1, n)]
+    else:
+        width = int(hi) - int(lo) + 1
+        points = [int(lo) + width * k // n for k in range(1, n)]
+    out = []
+    for p in points:
+        if lo < p <= hi and (not out or p > out[-1]):
+            out.append(p)
+    return out
+
+
+def histogram_split_points(conn, schema: str, table: str, column: str, data_type: str, n: int) -> List[Any]:
+    """Split points at equal row quantiles of the column's MSSQL statistics histogram."""
+    cast_type = 'bigint' if data_type in INTEGER_TYPES else ('date' if data_type == 'date' else 'datetime2')
+    sql = MSSQL_HISTOGRAM_SQL.format(cast_type=cast_type)
+    rows = fetchall(conn, sql, (f"[{schema}].[{table}]", column))
+    if not rows:
+        return []
+    stats_id = rows[0][0]
+    steps = [(key, float(count or 0)) for sid, key, count in rows if sid == stats_id and key is not None]
+    total = sum(count for _, count in steps)
+    if total <= 0 or n <= 1:
+        return []
+    out, cumulative, k = [], 0.0, 1
+    for key, count in steps:
+        cumulative += count
+        while k < n and cumulative >= total * k / n:
+            if not out or key > out[-1]:
+                out.append(key)
+            k += 1
+    return out
+
+
+def ranges_from_points(points: List[Any], nullable: bool = False) -> List[KeyRange]:
+    bounds = [None] + list(points) + [None]
+    ranges = [KeyRange(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+    if nullable:
+        ranges.append(KeyRange(is_null=True))
+    return ranges
+
+
+def plan_key_ranges(conn, db_type: str, schema: str, table: str, column: str, n: int,
+                    data_type: Optional[str] = None, nullable: bool = False,
+                    use_histogram: bool = True) -> List[KeyRange]:
+    """
+    About n ranges covering every row of the table. data_type is the catalog type of
+    `column`; it is needed for the MSSQL histogram lookup.
+    """
+    points = []
+    if use_histogram and db_type == 'mssql' and data_type in PARTITION_TYPES:
+        try:
+            points = histogram_split_points(conn, schema, table, column, data_type, n)
+        except Exception:
+            # no VIEW DATABASE STATE, or a server older than 2016 SP1 CU2
+            points = []
+    if not points:
+        lo, hi = key_bounds(conn, db_type, schema, table, column)
+        points = split_points(lo, hi, n)
+    return ranges_from_points(points, nullable)
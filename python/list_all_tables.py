@@ -1,194 +1,97 @@
-import pandas as pd
 from datetime import datetime
-from openpyxl import load_workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from db_config import (
-    get_mssql_connection, 
-    get_postgres_connection,
     print_header,
     get_output_path
 )
+from catalog_async import fetch_catalogs
+from name_matching import persisted_features
+from table_matcher import match_tables
+from excel_report import ExcelReport
 
-print_header("All Tables List - MSSQL vs PostgreSQL")
+MATCH_COLUMNS = ['MSSQL_TABLE', 'RANK', 'PG_TABLE', 'SCORE', 'NAME_SCORE', 'COLUMN_SCORE']
 
-# Connect to databases
-print("\n[1/3] Connecting to MSSQL...")
-mssql_conn = get_mssql_connection()
-print("✓ MSSQL Connected")
 
-print("\n[2/3] Connecting to PostgreSQL...")
-pg_conn = get_postgres_connection()
-print("✓ PostgreSQL Connected")
-
-try:
-    # Get all MSSQL tables
-    print("\n[3/3] Fetching all tables...")
-    
-    mssql_query = """
-    SELECT 
-        TABLE_NAME,
-        (SELECT COUNT(*) 
-         FROM INFORMATION_SCHEMA.COLUMNS 
-         WHERE TABLE_NAME = t.TABLE_NAME 
-         AND TABLE_SCHEMA = 'dbo') as COLUMN_COUNT
-    FROM INFORMATION_SCHEMA.TABLES t
-    WHERE TABLE_TYPE = 'BASE TABLE' 
-    AND TABLE_SCHEMA = 'dbo'
-    ORDER BY TABLE_NAME
-    """
-    
-    df_mssql = pd.read_sql(mssql_query, mssql_conn)
-    print(f"✓ MSSQL: Found {len(df_mssql)} tables")
-    
-    # Get all PostgreSQL tables
-    pg_query = """
-    SELECT 
-        table_name,
-        (SELECT COUNT(*) 
-         FROM information_schema.columns 
-         WHERE table_name = t.table_name 
-         AND table_schema = 'public') as column_count
-    FROM information_schema.tables t
-    WHERE table_type = 'BASE TABLE' 
-    AND table_schema = 'public'
-    ORDER BY table_name
-    """
-    
-    df_pg = pd.read_sql(pg_query, pg_conn)
-    print(f"✓ PostgreSQL: Found {len(df_pg)} tables")
+def list_all_tables(mssql_schema: str = 'dbo', pg_schema: str = 'public') -> str:
+    """Both table lists side by side plus ranked table matches; returns the report path (None on failure)."""
+    output_file = None
+    try:
+        # Get all MSSQL and PostgreSQL tables
+        print("\nFetching all tables from MSSQL and PostgreSQL...")
     
-    # Create side-by-side comparison
-    max_rows = max(len(df_mssql), len(df_pg))
+        # One set-based catalog read per database (columns, keys, indexes), both at the same time
+        mssql_catalog, pg_catalog = fetch_catalogs([('mssql', mssql_schema, None), ('postgres', pg_schema, None)])
+        mssql_tables = [(t, len(mssql_catalog.tables[t].columns)) for t in mssql_catalog.table_names()]
+        print(f"✓ MSSQL: Found {len(mssql_tables)} tables")
     
-    comparison_data = []
+        pg_tables = [(t, len(pg_catalog.tables[t].columns)) for t in pg_catalog.table_names()]
+        print(f"✓ PostgreSQL: Found {len(pg_tables)} tables")
     
-    for i in range(max_rows):
-        row_data = {}
-        
-        # MSSQL tables
-        if i < len(df_mssql):
-            row_data['MSSQL_TABLE_NAME'] = df_mssql.iloc[i]['TABLE_NAME']
-            row_data['MSSQL_COLUMNS'] = int(df_mssql.iloc[i]['COLUMN_COUNT'])
-        else:
-            row_data['MSSQL_TABLE_NAME'] = ''
-            row_data['MSSQL_COLUMNS'] = ''
-        
-        # Empty separator
-        row_data['SEPARATOR'] = ''
-        
-        # PostgreSQL tables
-        if i < len(df_pg):
-            row_data['PG_table_name'] = df_pg.iloc[i]['table_name']
-            row_data['PG_columns'] = int(df_pg.iloc[i]['column_count'])
-        else:
-            row_data['PG_table_name'] = ''
-            row_data['PG_columns'] = ''
-        
-        comparison_data.append(row_data)
+        # Match tables across databases (name + column-set similarity)
+        print("\nMatching tables (name + column-set similarity)...")
+        table_matches = match_tables(mssql_catalog.columns_by_table(), pg_catalog.columns_by_table(), top_k=3)
+        print(f"✓ {len({m['MSSQL_TABLE'] for m in table_matches})} MSSQL tables have ranked PostgreSQL candidates")
     
-    df_comparison = pd.DataFrame(comparison_data)
+        # Side-by-side rows: MSSQL table, columns, separator, PostgreSQL table, columns
+        comparison_rows = []
+        for i in range(max(len(mssql_tables), len(pg_tables))):
+            m_name, m_count = mssql_tables[i] if i < len(mssql_tables) else ('', '')
+            p_name, p_count = pg_tables[i] if i < len(pg_tables) else ('', '')
+            comparison_rows.append((m_name, m_count, '', p_name, p_count))
     
-    # Save to Excel with formatting
-    output_file = get_output_path(f"All_Tables_Comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        # Save to Excel with formatting
+        output_file = get_output_path(f"All_Tables_Comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
     
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        df_comparison.to_excel(writer, sheet_name='Tables_Comparison', index=False, startrow=1)
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Tables_Comparison']
-        
-        # Add database names in first row
-        worksheet['A1'] = 'mssql - WCL_MVC'
-        worksheet['D1'] = 'postgres - navikaran_mig'
-        
-        # Merge cells for headers
-        worksheet.merge_cells('A1:B1')
-        worksheet.merge_cells('D1:E1')
-        
-        # Style the header row
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        center_align = Alignment(horizontal='center', vertical='center')
-        
-        for cell in ['A1', 'D1']:
-            worksheet[cell].fill = header_fill
-            worksheet[cell].font = header_font
-            worksheet[cell].alignment = center_align
-        
-        # Style column headers
-        col_header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        col_header_font = Font(bold=True, size=11)
-        
-        # Set column headers
-        worksheet['A2'] = 'TABLE_NAME'
-        worksheet['B2'] = 'COLUMNS'
-        worksheet['C2'] = ''
-        worksheet['D2'] = 'table_name'
-        worksheet['E2'] = 'columns'
-        
-        for cell in ['A2', 'B2', 'D2', 'E2']:
-            worksheet[cell].fill = col_header_fill
-            worksheet[cell].font = col_header_font
-            worksheet[cell].alignment = center_align
-        
-        # Set column widths
-        worksheet.column_dimensions['A'].width = 35
-        worksheet.column_dimensions['B'].width = 12
-        worksheet.column_dimensions['C'].width = 3
-        worksheet.column_dimensions['D'].width = 35
-        worksheet.column_dimensions['E'].width = 12
-        
-        # Add borders
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for row in worksheet.iter_rows(min_row=1, max_row=max_rows+2, min_col=1, max_col=5):
-            for cell in row:
-                if cell.column != 3:  # Skip separator column
-                    cell.border = thin_border
-                    if cell.row > 2 and cell.column in [2, 5]:  # Number columns
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                    else:
-                        cell.alignment = Alignment(vertical='center')
-        
-        # Make separator column gray
-        gray_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-        for row in range(1, max_rows + 3):
-            worksheet[f'C{row}'].fill = gray_fill
+        with ExcelReport(output_file) as report:
+            sheet = report.sheet('Tables_Comparison', widths=[35, 12, 3, 35, 12])
+            # Database names in the first row, column headers in the second
+            sheet.append(['mssql - WCL_MVC', None, None, 'postgres - navikaran_mig', None],
+                         ['title', 'title', 'separator', 'title', 'title'])
+            sheet.merge('A1:B1')
+            sheet.merge('D1:E1')
+            sheet.append(['TABLE_NAME', 'COLUMNS', '', 'table_name', 'columns'],
+                         ['header', 'header', 'separator', 'header', 'header'])
+            sheet.rows(comparison_rows, ['cell', 'cell_center', 'separator', 'cell', 'cell_center'])
+
+            # Ranked table correspondences
+            matches = report.sheet('Table_Matches', widths=[35, 8, 35, 10, 12, 14], freeze='A2')
+            matches.append(MATCH_COLUMNS, 'header')
+            matches.rows(([m[c] for c in MATCH_COLUMNS] for m in table_matches), None, width=len(MATCH_COLUMNS))
     
-    # Print summary
-    print("\n" + "=" * 80)
-    print("✓ ALL TABLES COMPARISON COMPLETE!")
-    print("=" * 80)
-    print(f"\nSummary:")
-    print(f"  MSSQL Tables: {len(df_mssql)}")
-    print(f"  PostgreSQL Tables: {len(df_pg)}")
-    print(f"\n✓ File saved to: {output_file}")
+        # Print summary
+        print("\n" + "=" * 80)
+        print("✓ ALL TABLES COMPARISON COMPLETE!")
+        print("=" * 80)
+        print(f"\nSummary:")
+        print(f"  MSSQL Tables: {len(mssql_tables)}")
+        print(f"  PostgreSQL Tables: {len(pg_tables)}")
+        print(f"  Table matches (top 3 per MSSQL table): {len(table_matches)} rows in 'Table_Matches' sheet")
+        print(f"\n✓ File saved to: {output_file}")
     
-    # Show some sample tables
-    print(f"\nSample MSSQL Tables (first 5):")
-    for i in range(min(5, len(df_mssql))):
-        print(f"  - {df_mssql.iloc[i]['TABLE_NAME']} ({df_mssql.iloc[i]['COLUMN_COUNT']} columns)")
+        # Show some sample tables
+        print(f"\nSample MSSQL Tables (first 5):")
+        for name, count in mssql_tables[:5]:
+            print(f"  - {name} ({count} columns)")
     
-    print(f"\nSample PostgreSQL Tables (first 5):")
-    for i in range(min(5, len(df_pg))):
-        print(f"  - {df_pg.iloc[i]['table_name']} ({df_pg.iloc[i]['column_count']} columns)")
+        print(f"\nSample PostgreSQL Tables (first 5):")
+        for name, count in pg_tables[:5]:
+            print(f"  - {name} ({count} columns)")
+
+    except Exception as e:
+        print(f"\n✗ Failed to fetch tables!")
+        print(f"Error: {str(e)}")
+        output_file = None
+        import traceback
+        traceback.print_exc()
+
+    return output_file
+
 
-except Exception as e:
-    print(f"\n✗ Failed to fetch tables!")
-    print(f"Error: {str(e)}")
-    import traceback
-    traceback.print_exc()
+def main():
+    print_header("All Tables List - MSSQL vs PostgreSQL")
+    list_all_tables()
 
-finally:
-    mssql_conn.close()
-    pg_conn.close()
-    print("\n" + "=" * 80)
-    print("Connections closed")
-    print("=" * 80)
 
-input("\nPress Enter to exit...")
\ No newline at end of file
+if __name__ == "__main__":
+    with persisted_features():
+        main()
+    input("\nPress Enter to exit...")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+mapping_assignment.py
+
+One-to-one assignment stage for the auto-mapper.
+
+Takes the PG x MSSQL score matrix produced by `suggest_mappings` and picks at most
+one MSSQL column per PG column (and vice versa). Entries below `threshold` are
+pruned first, so only rows/columns that still have a candidate take part:
+
+ - 'greedy'  : the original behaviour - walk pairs best-first, take a pair when
+               neither side is used yet. Fast, but not globally optimal.
+ - 'optimal' : maximum total score assignment (Hungarian / Jonker-Volgenant).
+               Uses scipy.optimize.linear_sum_assignment when scipy is installed,
+               otherwise a NumPy implementation of the Hungarian algorithm.
+
+Both return {pg_index: mssql_index}.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+ASSIGNMENT_METHODS = ('greedy', 'optimal')
+
+
+def prune_scores(scores: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (rows, cols, values) of the positive entries at or above threshold, in row-major order."""
+    keep = (scores >= threshold) & (scores > 0)
+    rows, cols = np.nonzero(keep)
+    return rows, cols, scores[rows, cols]
+
+
+def assign_greedy(scores: np.ndarray, threshold: float) -> Dict[int, int]:
+    """Best-first greedy walk over the pruned pairs (ties keep PG-major order)."""
+    rows, cols, vals = prune_scores(scores, threshold)
+    order = np.argsort(-vals, kind='stable')
+    chosen = {}
+    used = set()
+    for k in order.tolist():
+        i, j = int(rows[k]), int(cols[k])
+        if i in chosen or j in used:
+            continue
+        chosen[i] = j
+        used.add(j)
+    return chosen
+
+
+def _hungarian_min(cost: np.ndarray) -> np.ndarray:
+    """
+    Minimum-cost assignment for an n x m cost matrix with n <= m
+    (shortest augmenting path formulation). Returns the column chosen for each row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)   # p[j] = row (1-based) assigned to column j
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            cand = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(cand)) + 1
+            delta = cand[j1 - 1]
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while True:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+            if j0 == 0:
+                break
+    col_for_row = np.empty(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if p[j]:
+            col_for_row[p[j] - 1] = j - 1
+    return col_for_row
+
+
+def _solve_max(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximum-weight assignment on a dense matrix; returns (row_ind, col_ind)."""
+    try:
+        from scipy.optimize import linear_sum_assignment
+    except ImportError:
+        linear_sum_assignment = None
+    if linear_sum_assignment is not None:
+        return linear_sum_assignment(weights, maximize=True)
+
+    if weights.shape[0] <= weights.shape[1]:
+        cols = _hungarian_min(-weights)
+        return np.arange(weights.shape[0]), cols
+    rows = _hungarian_min(-weights.T)
+    order = np.argsort(rows)
+    return rows[order], np.arange(weights.shape[1])[order]
+
+
+def assign_optimal(scores: np.ndarray, threshold: float) -> Dict[int, int]:
+    """Globally optimal (maximum total score) one-to-one assignment over the pruned pairs."""
+    rows, cols, vals = prune_scores(scores, threshold)
+    if rows.size == 0:
+        return {}
+    # solve only on the rows/columns that still have a candidate
+    r_idx = np.unique(rows)
+    c_idx = np.unique(cols)
+    sub = np.zeros((r_idx.size, c_idx.size), dtype=np.float64)
+    sub[np.searchsorted(r_idx, rows), np.searchsorted(c_idx, cols)] = vals
+    ri, ci = _solve_max(sub)
+    return {int(r_idx[a]): int(c_idx[b]) for a, b in zip(ri, ci) if sub[a, b] > 0}
+
+
+def assign(scores: np.ndarray, threshold: float, method: str = 'greedy') -> Dict[int, int]:
+    if method == 'greedy':
+        return assign_greedy(scores, threshold)
+    if method == 'optimal':
+        return assign_optimal(scores, threshold)
+    raise ValueError(f"Unknown assignment method: {method!r} (expected one of {ASSIGNMENT_METHODS})")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+name_blocking.py
+
+Candidate blocking for column mapping: which PG x MSSQL column pairs are worth a
+full score_pair at all.
+
+Most pairs of a wide table share nothing, and score_pair on them spends its time
+in difflib only to land far below any threshold. The MSSQL names are put in an
+inverted index (same features as the name matcher, see name_matching.name_features):
+
+ - normalized name and underscore-free name   -> exact / UnderscoreRemoved matches
+ - tokens (after TOKEN_EQUIV)                 -> every pair sharing a token
+ - 3-grams of the underscore-free name        -> abbreviations, substrings, typos
+
+and each PG column is paired only with the MSSQL columns it shares a key with.
+3-grams present in more than MAX_NGRAM_DF_SHARE of the columns (e.g. the "ate" of
+every *_date column) do not generate candidates on their own; tokens always do.
+
+Fallbacks keep every column reachable:
+ - names shorter than 3 characters have no 3-grams and are paired with everything
+ - a column left without any candidate is paired with every column of the other side
+
+Pairs that are not candidates score 0, as if pruned below the threshold.
+"""
+
+from collections import defaultdict
+from typing import List, Sequence
+
+from name_matching import name_features
+
+# 3-grams in more columns than this share of the MSSQL side do not generate candidates
+MAX_NGRAM_DF_SHARE = 0.2
+MIN_NGRAM_DF_CAP = 20
+
+
+class CandidatePairs:
+    """Candidate MSSQL column indexes for every PG column index."""
+
+    def __init__(self, rows: List[List[int]], n_pg: int, n_m: int):
+        self.rows = rows
+        self.n_pg = n_pg
+        self.n_m = n_m
+
+    @classmethod
+    def full(cls, n_pg: int, n_m: int) -> 'CandidatePairs':
+        """Every pair (no blocking)."""
+        all_m = list(range(n_m))
+        return cls([all_m] * n_pg, n_pg, n_m)
+
+    def filter(self, keep) -> 'CandidatePairs':
+        """Only the pairs for which keep(i, j) is true."""
+        return CandidatePairs([[j for j in cols if keep(i, j)] for i, cols in enumerate(self.rows)],
+                              self.n_pg, self.n_m)
+
+    def union(self, extra) -> 'CandidatePairs':
+        """Add the pairs set in a (n_pg x n_m) boolean mask."""
+        rows = []
+        for i, cols in enumerate(self.rows):
+            more = [int(j) for j in extra[i].nonzero()[0]]
+            rows.append(sorted(set(cols).union(more)) if more else cols)
+        return CandidatePairs(rows, self.n_pg, self.n_m)
+
+    def __len__(self):
+        return sum(len(r) for r in self.rows)
+
+    def __iter__(self):
+        for i, cols in enumerate(self.rows):
+            for j in cols:
+                yield i, j
+
+    @property
+    def share(self) -> float:
+        """Fraction of all pairs that are candidates."""
+        total = self.n_pg * self.n_m
+        return len(self) / total if total else 0.0
+
+
+def _short(feats) -> bool:
+    return len(feats.compact) < 3
+
+
+def candidate_pairs(pg_names: Sequence[str], m_names: Sequence[str],
+                    max_ngram_df_share: float = MAX_NGRAM_DF_SHARE) -> CandidatePairs:
+    """Block PG x MSSQL column pairs through an inverted index over the MSSQL names."""
+    pg = [name_features(str(n)) if n else None for n in pg_names]
+    ms = [name_features(str(n)) if n else None for n in m_names]
+
+    by_norm = defaultdict(list)
+    by_compact = defaultdict(list)
+    by_token = defaultdict(list)
+    by_ngram = defaultdict(list)
+    short_m = []
+    for j, f in enumerate(ms):
+        if f is None:
+            continue
+        by_norm[f.norm].append(j)
+        by_compact[f.compact].append(j)
+        for tok in f.tokens:
+            by_token[tok].append(j)
+        for gram in f.ngrams:
+            by_ngram[gram].append(j)
+        if _short(f):
+            short_m.append(j)
+    max_df = max(MIN_NGRAM_DF_CAP, int(max_ngram_df_share * len(ms)))
+
+    all_m = [j for j, f in enumerate(ms) if f is not None]
+    rows = []
+    for f in pg:
+        if f is None:
+            rows.append([])
+            continue
+        if _short(f):
+            rows.append(all_m)
+            continue
+        cands = set(short_m)
+        cands.update(by_norm.get(f.norm, ()))
+        cands.update(by_compact.get(f.compact, ()))
+        for tok in f.tokens:
+            cands.update(by_token.get(tok, ()))
+        for gram in f.ngrams:
+            postings = by_ngram.get(gram)
+            if postings and len(postings) <= max_df:
+                cands.update(postings)
+        rows.append(sorted(cands) if cands else all_m)
+
+    # MSSQL columns nobody picked: pair them with every PG column
+    reached = set()
+    for cols in rows:
+        reached.update(cols)
+    orphans = [j for j in all_m if j not in reached]
+    if orphans:
+        rows = [sorted(set(cols).union(orphans)) if pg[i] is not None else cols for i, cols in enumerate(rows)]
+    return CandidatePairs(rows, len(pg), len(ms))
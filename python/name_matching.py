@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+name_matching.py
+
+Column/table name normalization and pairwise name similarity (score_pair), used by
+the auto-mapper, column_scoring and table_matcher.
+
+Pure Python (re, difflib via similarity.py): importing it does not load pandas, numpy or openpyxl,
+so catalog-only tools can match names without the reporting stack.
+
+The features score_pair needs per name (normalized form, tokens, 3-grams, digit
+suffix) are computed once and kept in a bounded LRU index (NameFeatureIndex) shared
+with column_scoring. The index is in memory only: importing and scoring touch no
+files. Tool entry points opt in to persistence with persisted_features(), which
+warms the index from the catalog cache file (catalog_cache.py) and writes the
+most recently used entries back, so the next run starts warm.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from similarity import ratio
+
+RE_NON_ALNUM_UNDERSCORE = re.compile(r'[^0-9a-zA-Z_]+')
+RE_DIGITS = re.compile(r'\d+$')
+
+COMMON_PREFIXES = ('is_', 'has_', 'the_', 'tbl_', 'fk_')
+COMMON_SUFFIXES = ('_flag', '_yn')
+
+# small mapping of token synonyms that often occur across systems
+TOKEN_EQUIV = {
+    'desc': 'description',
+    'descr': 'description',
+    'code': 'code',
+    'cd': 'code',
+    'id': 'id',
+    'pk': 'id',
+    'uid': 'id',
+    'name': 'name',
+    'nm': 'name',
+    'created': 'created',
+    'createdby': 'created_by',
+    'created_on': 'created_date',
+    'modified': 'modified',
+    'modifiedby': 'modified_by',
+    'deleted': 'deleted',
+    'company': 'company',
+    'client': 'client',
+    'sap': 'sap',
+    'inco': 'incoterm',
+}
+
+def normalize(name: str) -> str:
+    """Lowercase, replace non-alnum with underscore, collapse repeated underscores."""
+    if not name:
+        return ""
+    s = RE_NON_ALNUM_UNDERSCORE.sub('_', name.strip()).lower()
+    s = re.sub(r'__+', '_', s)
+    s = s.strip('_')
+    return s
+
+def remove_underscores(s: str) -> str:
+    return s.replace('_', '') if s else ''
+
+def strip_common_affixes(s: str) -> str:
+    if not s:
+        return ''
+    for p in COMMON_PREFIXES:
+        if s.startswith(p):
+            s = s[len(p):]
+    for suf in COMMON_SUFFIXES:
+        if s.endswith(suf):
+            s = s[:-len(suf)]
+    return s
+
+def split_tokens(name: str) -> List[str]:
+    """Split on underscores, digits boundaries and camelCase; return normalized tokens."""
+    if not name:
+        return []
+    s = normalize(name)
+    # split underscores
+    parts = [p for p in s.split('_') if p]
+    tokens = []
+    for part in parts:
+        # split alpha/digit boundaries
+        subparts = re.findall(r'[A-Za-z]+|\d+', part)
+        for sp in subparts:
+            tokens.append(TOKEN_EQUIV.get(sp, sp))
+    return tokens
+
+def token_overlap_score(a_tokens: List[str], b_tokens: List[str]) -> float:
+    if not a_tokens or not b_tokens:
+        return 0.0
+    set_a = set(a_tokens)
+    set_b = set(b_tokens)
+    inter = set_a.intersection(set_b)
+    avg_len = (len(set_a) + len(set_b)) / 2.0
+    if avg_len == 0:
+        return 0.0
+    return len(inter) / avg_len
+
+def ngram_set(s: str, n: int = 3) -> set:
+    s2 = re.sub(r'[^a-z0-9]', '', s.lower())
+    if len(s2) < n:
+        return {s2} if s2 else set()
+    return {s2[i:i+n] for i in range(len(s2)-n+1)}
+
+def jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a.intersection(b))
+    union = len(a.union(b))
+    return inter / union if union > 0 else 0.0
+
+# -------------------------
+# Feature index
+# -------------------------
+FEATURE_VERSION = 1
+FEATURE_INDEX_SIZE = int(os.environ.get('NAME_FEATURE_INDEX_SIZE', '50000'))   # names kept in memory
+FEATURE_INDEX_PRELOAD = int(os.environ.get('NAME_FEATURE_PRELOAD', '5000'))    # names read back from disk
+
+_popcount = getattr(int, 'bit_count', None) or (lambda x: bin(x).count('1'))
+
+
+class NameFeatures:
+    """What score_pair needs to know about one name, computed once."""
+
+    __slots__ = ('name', 'norm', 'compact', 'tokens', 'ngrams', 'suffix', 'token_bits', 'ngram_bits')
+
+    def __init__(self, name: str, norm: str, compact: str, tokens: Tuple[str, ...], ngrams: FrozenSet[str],
+                 suffix: Optional[str], token_bits: int, ngram_bits: int):
+        self.name = name
+        self.norm = norm
+        self.compact = compact
+        self.tokens = tokens            # distinct tokens, sorted
+        self.ngrams = ngrams            # 3-grams of norm
+        self.suffix = suffix            # trailing digits of norm, or None
+        self.token_bits = token_bits    # tokens / ngrams as bitsets over the index vocabulary
+        self.ngram_bits = ngram_bits
+
+    def to_row(self) -> list:
+        return [self.norm, self.compact, list(self.tokens), sorted(self.ngrams), self.suffix]
+
+
+def _featurize(name: str) -> tuple:
+    norm = normalize(name)
+    m = RE_DIGITS.search(norm)
+    return (
+        sys.intern(norm),
+        remove_underscores(norm),
+        tuple(sys.intern(t) for t in sorted(set(split_tokens(name)))),
+        frozenset(ngram_set(norm, 3)),
+        m.group() if m else None,
+    )
+
+
+class NameFeatureIndex:
+    """
+    Bounded LRU of NameFeatures keyed by the raw name, safe to use from several threads.
+
+    Tokens and 3-grams are numbered in index-wide vocabularies, so overlaps between
+    two names are popcounts of two ints. The vocabularies are not evicted: they are
+    bounded by the distinct tokens / 3-grams seen, which stays small next to the names.
+    """
+
+    def __init__(self, max_entries: int = None):
+        self.max_entries = max(1, max_entries or FEATURE_INDEX_SIZE)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._used = set()          # names looked up since the last flush
+        self._token_ids = {}
+        self._ngram_ids = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name: str) -> NameFeatures:
+        with self._lock:
+            feats = self._entries.get(name)
+            if feats is not None:
+                self._entries.move_to_end(name)
+                self._used.add(name)
+                self.hits += 1
+                return feats
+        parts = _featurize(name)        # outside the lock: the expensive part
+        with self._lock:
+            self.misses += 1
+            self._used.add(name)
+            return self._insert(name, parts)
+
+    def _insert(self, name: str, parts: tuple) -> NameFeatures:
+        feats = self._entries.get(name)
+        if feats is None:
+            norm, compact, tokens, ngrams, suffix = parts
+            feats = NameFeatures(name, norm, compact, tokens, ngrams, suffix,
+                                 _bits(tokens, self._token_ids), _bits(ngrams, self._ngram_ids))
+            self._entries[name] = feats
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._used.discard(evicted)
+        self._entries.move_to_end(name)
+        return feats
+
+    def load_rows(self, rows):
+        """Add persisted (name, row) entries, least recently used first; names already present win."""
+        with self._lock:
+            for name, (norm, compact, tokens, ngrams, suffix) in rows:
+                if name not in self._entries:
+                    self._insert(name, (sys.intern(norm), compact, tuple(sys.intern(t) for t in tokens),
+                                        frozenset(ngrams), suffix))
+
+    def take_used(self) -> List[tuple]:
+        """(name, row) of every entry looked up since the last call, for persisting."""
+        with self._lock:
+            used, self._used = self._used, set()
+            return [(name, self._entries[name].to_row()) for name in used if name in self._entries]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'hits': self.hits,
+                    'misses': self.misses, 'tokens': len(self._token_ids), 'ngrams': len(self._ngram_ids)}
+
+
+def _bits(items, ids: Dict[str, int]) -> int:
+    bits = 0
+    for item in items:
+        bit = ids.get(item)
+        if bit is None:
+            bit = ids[item] = len(ids)
+        bits |= 1 << bit
+    return bits
+
+
+def feature_signature() -> str:
+    """Changes with the normalization rules, so features persisted by older code are ignored."""
+    import hashlib
+    spec = repr((FEATURE_VERSION, RE_NON_ALNUM_UNDERSCORE.pattern, RE_DIGITS.pattern, sorted(TOKEN_EQUIV.items())))
+    return hashlib.sha1(spec.encode('utf-8')).hexdigest()[:16]
+
+
+_shared_index = None
+_shared_lock = threading.Lock()
+_persisted = False
+
+
+def feature_index() -> NameFeatureIndex:
+    """The process-wide, in-memory index."""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_lock:
+            if _shared_index is None:
+                _shared_index = NameFeatureIndex()
+    return _shared_index
+
+
+def name_features(name: str) -> NameFeatures:
+    return feature_index().get(name)
+
+
+def load_feature_index():
+    """Opt in to persistence: warm the index from the on-disk cache (once per process)."""
+    global _persisted
+    index = feature_index()
+    with _shared_lock:
+        if _persisted:
+            return
+        _persisted = True
+    from catalog_cache import load_name_features
+    load_name_features(index, FEATURE_INDEX_PRELOAD)
+
+
+def feature_persistence() -> bool:
+    """True once load_feature_index() opted this process in to persistence."""
+    return _persisted
+
+
+def flush_feature_index():
+    """Persist the entries used since the last flush; no-op unless load_feature_index() ran."""
+    if _persisted and _shared_index is not None:
+        from catalog_cache import store_name_features
+        store_name_features(_shared_index)
+
+
+@contextmanager
+def persisted_features():
+    """For tool entry points: load the feature index on entry, flush it on exit."""
+    load_feature_index()
+    try:
+        yield
+    finally:
+        flush_feature_index()
+
+# -------------------------
+# Composite scoring
+# -------------------------
+def score_pair(pg_name: str, m_name: str) -> Tuple[float, Dict]:
+    detail = {}
+    if not pg_name or not m_name:
+        return 0.0, detail
+
+    pg = name_features(pg_name)
+    m = name_features(m_name)
+    pg_norm = pg.norm
+    m_norm = m.norm
+
+    # early exacts
+    if pg_norm == m_norm:
+        detail['method'] = 'Exact'
+        detail['components'] = {'exact': 1.0}
+        return 1.0, detail
+
+    if pg.compact == m.compact:
+        detail['method'] = 'UnderscoreRemoved'
+        detail['components'] = {'underscore_removed': 0.98}
+        return 0.98, detail
+
+    # tokens (same arithmetic as token_overlap_score, on the index bitsets)
+    pg_tokens = pg.tokens
+    m_tokens = m.tokens
+    tok_overlap = 0.0
+    if pg_tokens and m_tokens:
+        tok_overlap = _popcount(pg.token_bits & m.token_bits) / ((len(pg_tokens) + len(m_tokens)) / 2.0)
+    detail['tok_overlap'] = tok_overlap
+
+    # numeric-suffix awareness
+    num_bonus = 0.0
+    if pg.suffix is not None and pg.suffix == m.suffix:
+        num_bonus = 0.05
+
+    # substring / prefix / suffix
+    substr_flag = 0
+    if pg_norm in m_norm or m_norm in pg_norm:
+        substr_flag = 0.75
+
+    # n-gram jaccard (3-gram)
+    ng_jacc = 0.0
+    if pg.ngrams and m.ngrams:
+        inter = _popcount(pg.ngram_bits & m.ngram_bits)
+        ng_jacc = inter / (len(pg.ngrams) + len(m.ngrams) - inter)
+    detail['ngram_jaccard'] = ng_jacc
+
+    # sequence ratio (difflib by default, see similarity.py)
+    seq_ratio = ratio(pg_norm, m_norm)
+    detail['seq_ratio'] = seq_ratio
+
+    # token partial / abbreviation handling:
+    token_subscore = 0.0
+    for at in pg_tokens:
+        for bt in m_tokens:
+            if at == bt:
+                token_subscore = max(token_subscore, 1.0)
+            elif at in bt or bt in at:
+                token_subscore = max(token_subscore, 0.8)
+            else:
+                token_subscore = max(token_subscore, ratio(at, bt) * 0.6)
+
+    detail['token_subscore'] = token_subscore
+
+    # Weighted combination
+    w_token_overlap = 0.35
+    w_token_sub = 0.20
+    w_seq = 0.18
+    w_ngram = 0.12
+    w_substr = 0.10
+    base_score = (
+        w_token_overlap * tok_overlap
+        + w_token_sub * token_subscore
+        + w_seq * seq_ratio
+        + w_ngram * ng_jacc
+        + w_substr * (1.0 if substr_flag else 0.0)
+    )
+
+    base_score = min(1.0, base_score + num_bonus)
+    score = round(base_score, 4)
+
+    if tok_overlap >= 0.8 or token_subscore >= 0.95:
+        method = f"TokenStrong({tok_overlap:.2f})"
+    elif tok_overlap >= 0.4:
+        method = f"Token({tok_overlap:.2f})"
+    elif ng_jacc >= 0.45:
+        method = f"NGram({ng_jacc:.2f})"
+    elif seq_ratio >= 0.75:
+        method = f"Fuzzy({seq_ratio:.2f})"
+    elif substr_flag:
+        method = "Substring"
+    else:
+        method = f"FuzzyLow({seq_ratio:.2f})"
+
+    detail['method'] = method
+    detail['components'] = {
+        'token_overlap': tok_overlap,
+        'token_subscore': token_subscore,
+        'seq_ratio': seq_ratio,
+        'ngram_jacc': ng_jacc,
+        'substr_flag': substr_flag,
+        'num_bonus': num_bonus,
+    }
+    return score, detail
+
+def interpret_note(score: float) -> str:
+    if score >= 0.95:
+        return "High-confidence match"
+    if score >= 0.75:
+        return "Probable match — please review"
+    if score >= 0.35:
+        return "Low confidence — manual review recommended"
+    return ""
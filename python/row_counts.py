@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+row_counts.py
+
+Row-count reconciliation between MSSQL source tables and their PostgreSQL targets.
+
+Counts start from the catalog estimates, which cost one query per schema and no
+table scans:
+
+ - MSSQL      : sys.dm_db_partition_stats (heap/clustered index rows; falls back to
+                sys.partitions without VIEW DATABASE STATE)
+ - PostgreSQL : pg_class.reltuples (as of the last VACUUM/ANALYZE; partitioned
+                tables sum their partitions)
+
+Exact COUNT(*) queries are only run - in parallel, one pooled connection per worker - for
+pairs whose estimates disagree by more than the tolerance, or have no estimate.
+
+Table pairs come from a batch auto-mapping report, a CSV/YAML pair list (as in
+compare_tables_powerful_auto_mapping --pairs) or are derived with table_matcher.
+
+Usage:
+    python row_counts.py                                     # interactive
+    python row_counts.py --mapping Batch_AutoMapping.xlsx [--tolerance 0.02] [--exact]
+    python row_counts.py --auto-pairs --mssql-schema dbo --pg-schema public
+"""
+
+import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from db_config import print_header, get_output_path
+from db_session import get_mssql_connection, get_postgres_connection, pool_size
+from catalog_cache import cached_catalog
+from db_utils import fetchall
+
+DEFAULT_TOLERANCE = 0.02     # relative difference between estimates that triggers an exact count
+COUNT_WORKERS = 4            # concurrent exact counts per database
+
+MSSQL_ESTIMATES_SQL = """
+    SELECT t.name, SUM(ps.row_count)
+    FROM sys.dm_db_partition_stats ps
+    JOIN sys.tables t ON t.object_id = ps.object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE s.name = ? AND ps.index_id IN (0, 1)
+    GROUP BY t.name
+"""
+
+# sys.partitions needs no VIEW DATABASE STATE permission
+MSSQL_ESTIMATES_FALLBACK_SQL = """
+    SELECT t.name, SUM(p.rows)
+    FROM sys.partitions p
+    JOIN sys.tables t ON t.object_id = p.object_id
+    JOIN sys.schemas s ON s.schema_id = t.schema_id
+    WHERE s.name = ? AND p.index_id IN (0, 1)
+    GROUP BY t.name
+"""
+
+PG_ESTIMATES_SQL = """
+    SELECT c.relname,
+           CASE WHEN c.relkind = 'p' THEN
+                    (SELECT SUM(ch.reltuples) FROM pg_inherits i JOIN pg_class ch ON ch.oid = i.inhrelid
+                     WHERE i.inhparent = c.oid AND ch.reltuples >= 0)
+                ELSE c.reltuples END
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'p')
+"""
+
+
+def estimate_row_counts(conn, db_type: str, schema: str) -> Dict[str, int]:
+    """{table: estimated rows} for a whole schema; -1 where no estimate exists yet."""
+    if db_type == 'mssql':
+        try:
+            rows = fetchall(conn, MSSQL_ESTIMATES_SQL, (schema,))
+        except Exception:
+            rows = fetchall(conn, MSSQL_ESTIMATES_FALLBACK_SQL, (schema,))
+    else:
+        rows = fetchall(conn, PG_ESTIMATES_SQL, (schema,))
+    # reltuples is -1 (PG 14+) or 0 for tables never vacuumed/analyzed
+    return {name: int(n) if n is not None and n >= 0 else -1 for name, n in rows}
+
+
+def estimate_row_count(conn, db_type: str, schema: str, table: str) -> int:
+    """Estimated rows of one table, -1 if unknown."""
+    return lookup_estimate(estimate_row_counts(conn, db_type, schema), table)
+
+
+def lookup_estimate(counts: Dict[str, int], table: str) -> int:
+    """One table's entry of estimate_row_counts() (case-insensitive fallback), -1 if missing."""
+    if table in counts:
+        return counts[table]
+    low = table.lower()
+    return next((n for name, n in counts.items() if name.lower() == low), -1)
+
+
+def exact_row_count(conn, db_type: str, schema: str, table: str) -> int:
+    if db_type == 'mssql':
+        sql = f"SELECT COUNT_BIG(*) FROM [{schema}].[{table}]"
+    else:
+        sql = f'SELECT count(*) FROM "{schema}"."{table}"'
+    return int(fetchall(conn, sql)[0][0])
+
+
+def estimates_disagree(a: int, b: int, tolerance: float) -> bool:
+    if a < 0 or b < 0:
+        return True
+    return abs(a - b) > tolerance * max(a, b)
+
+
+def exact_row_counts(tasks: List[Tuple[str, str, str]], workers: int = COUNT_WORKERS) -> Dict[Tuple[str, str, str], int]:
+    """Run COUNT(*) for (db_type, schema, table) tasks concurrently; -1 where a count failed."""
+    # every running count borrows its own pooled connection
+    workers = max(1, min(workers, pool_size('mssql'), pool_size('postgres')))
+
+    def count(task):
+        db_type, schema, table = task
+        conn = None
+        try:
+            conn = get_mssql_connection() if db_type == 'mssql' else get_postgres_connection()
+            return task, exact_row_count(conn, db_type, schema, table)
+        except Exception as e:
+            print(f"  ✗ COUNT(*) failed for {db_type} {schema}.{table}: {e}")
+            return task, -1
+        finally:
+            if conn is not None:
+                conn.close()
+
+    # one executor per database: both count at the same time, neither exceeds its pool
+    executors = {db_type: ThreadPoolExecutor(max_workers=workers) for db_type in ('mssql', 'postgres')}
+    try:
+        futures = [executors[task[0]].submit(count, task) for task in tasks]
+        return dict(f.result() for f in futures)
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+
+
+# -------------------------
+# Reconciliation
+# -------------------------
+RECONCILE_COLUMNS = ['MSSQL_TABLE', 'PG_TABLE', 'MSSQL_ESTIMATE', 'PG_ESTIMATE', 'MSSQL_ROWS', 'PG_ROWS',
+                     'DIFFERENCE', 'COUNT_SOURCE', 'STATUS']
+OK_STATUSES = ('match', 'within tolerance')
+
+
+def load_pairs(mapping_file: str = None, pairs_file: str = None) -> List[Tuple[str, str]]:
+    if mapping_file:
+        from data_diff import load_table_mappings
+        return list(load_table_mappings(mapping_file))
+    from compare_tables_powerful_auto_mapping import load_table_pairs
+    return load_table_pairs(pairs_file)
+
+
+def reconcile_row_counts(pairs: Optional[List[Tuple[str, str]]] = None, mssql_schema: str = 'dbo',
+                         pg_schema: str = 'public', tolerance: float = DEFAULT_TOLERANCE,
+                         exact: bool = False, workers: int = COUNT_WORKERS) -> 'pd.DataFrame':
+    """
+    Source vs target row counts for every table pair (derived with table_matcher when
+    `pairs` is None). Exact counts only where estimates disagree, or everywhere with exact=True.
+    """
+    from compare_tables_powerful_auto_mapping import derive_table_pairs, split_qualified
+
+    mssql_conn = None
+    pg_conn = None
+    try:
+        mssql_conn = get_mssql_connection()
+        pg_conn = get_postgres_connection()
+        if pairs is None:
+            m_tables = cached_catalog(mssql_conn, 'mssql', mssql_schema).columns_by_table()
+            p_tables = cached_catalog(pg_conn, 'postgres', pg_schema).columns_by_table()
+            pairs = [(f"{mssql_schema}.{m}", f"{pg_schema}.{p}") for m, p in derive_table_pairs(m_tables, p_tables)]
+            print(f"✓ {len(pairs)} table pairs derived from table names and column sets")
+        qualified = [(split_qualified(m, mssql_schema), split_qualified(p, pg_schema)) for m, p in pairs]
+
+        print("\nReading catalog estimates...")
+        m_estimates = {s: estimate_row_counts(mssql_conn, 'mssql', s) for s in sorted({m[0] for m, _ in qualified})}
+        p_estimates = {s: estimate_row_counts(pg_conn, 'postgres', s) for s in sorted({p[0] for _, p in qualified})}
+    finally:
+        for conn in (mssql_conn, pg_conn):
+            try:
+                if conn:
+                    conn.close()
+            except Exception:
+                pass
+
+    def lookup(estimates: Dict[str, int], table: str) -> Optional[int]:
+        if table in estimates:
+            return estimates[table]
+        low = table.lower()
+        return next((n for name, n in estimates.items() if name.lower() == low), None)
+
+    rows = []
+    tasks = []
+    for (ms, mt), (ps, pt) in qualified:
+        m_est = lookup(m_estimates[ms], mt)
+        p_est = lookup(p_estimates[ps], pt)
+        row = {
+            'MSSQL_TABLE': f"{ms}.{mt}", 'PG_TABLE': f"{ps}.{pt}",
+            'MSSQL_ESTIMATE': m_est, 'PG_ESTIMATE': p_est,
+            'MSSQL_ROWS': m_est, 'PG_ROWS': p_est, 'COUNT_SOURCE': 'estimate',
+        }
+        if m_est is None or p_est is None:
+            row['STATUS'] = 'table not found'
+        elif exact or estimates_disagree(m_est, p_est, tolerance):
+            row['COUNT_SOURCE'] = 'exact'
+            tasks += [('mssql', ms, mt), ('postgres', ps, pt)]
+        rows.append(row)
+
+    if tasks:
+        print(f"Running {len(tasks)} exact counts ({workers} workers per database)...")
+        counts = exact_row_counts(list(dict.fromkeys(tasks)), workers)
+    else:
+        counts = {}
+
+    for row, ((ms, mt), (ps, pt)) in zip(rows, qualified):
+        if row['COUNT_SOURCE'] == 'exact':
+            row['MSSQL_ROWS'] = counts.get(('mssql', ms, mt), -1)
+            row['PG_ROWS'] = counts.get(('postgres', ps, pt), -1)
+        if row.get('STATUS'):
+            continue
+        m_rows, p_rows = row['MSSQL_ROWS'], row['PG_ROWS']
+        if m_rows < 0 or p_rows < 0:
+            row['STATUS'] = 'count failed'
+            continue
+        row['DIFFERENCE'] = p_rows - m_rows
+        if row['COUNT_SOURCE'] == 'exact':
+            row['STATUS'] = 'match' if m_rows == p_rows else 'MISMATCH'
+        else:
+            row['STATUS'] = 'within tolerance'
+    import pandas as pd
+    df = pd.DataFrame(rows, columns=RECONCILE_COLUMNS)
+    counts_cols = ['MSSQL_ESTIMATE', 'PG_ESTIMATE', 'MSSQL_ROWS', 'PG_ROWS', 'DIFFERENCE']
+    df[counts_cols] = df[counts_cols].astype('Int64')
+    return df
+
+
+def write_reconciliation(df: 'pd.DataFrame', output_file: str):
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    if output_file.lower().endswith('.csv'):
+        df.to_csv(output_file, index=False)
+        return
+    from excel_report import ExcelReport, INT_FORMAT, MISMATCH_COLOR
+    with ExcelReport(output_file) as report:
+        sheet = report.frame_sheet('RowCounts', df, widths=[40, 40, 16, 16, 16, 16, 14, 14, 18],
+                                   formats={col: INT_FORMAT for col in range(3, 8)})
+        sheet.highlight_rows('I', MISMATCH_COLOR, last_column='I', not_in=OK_STATUSES)
+
+
+def _fmt(n) -> str:
+    import pandas as pd
+    return '' if n is None or pd.isna(n) else f"{int(n):,}"
+
+
+def run_reconciliation(mapping_file: str = None, pairs_file: str = None, mssql_schema: str = 'dbo',
+                       pg_schema: str = 'public', tolerance: float = DEFAULT_TOLERANCE, exact: bool = False,
+                       workers: int = COUNT_WORKERS, output_file: str = None) -> 'pd.DataFrame':
+    print_header("Row-Count Reconciliation MSSQL -> PostgreSQL")
+    pairs = load_pairs(mapping_file, pairs_file) if (mapping_file or pairs_file) else None
+    if pairs is not None:
+        print(f"✓ {len(pairs)} table pairs read from {mapping_file or pairs_file}")
+
+    started = datetime.now()
+    df = reconcile_row_counts(pairs, mssql_schema, pg_schema, tolerance, exact, workers)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    print(f"\n{'MSSQL table':<40} {'PG table':<40} {'MSSQL rows':>14} {'PG rows':>14}  status")
+    print("-" * 125)
+    for _, r in df.iterrows():
+        mark = '✓' if r['STATUS'] in OK_STATUSES else '✗'
+        print(f"{r['MSSQL_TABLE'][:40]:<40} {r['PG_TABLE'][:40]:<40} {_fmt(r['MSSQL_ROWS']):>14} "
+              f"{_fmt(r['PG_ROWS']):>14}  {mark} {r['STATUS']} ({r['COUNT_SOURCE']})")
+    bad = df[~df['STATUS'].isin(OK_STATUSES)]
+    exact_n = int((df['COUNT_SOURCE'] == 'exact').sum())
+    print(f"\n{len(df)} pairs, {len(bad)} need attention, {exact_n} exact counts, {elapsed:.1f}s")
+
+    if not output_file:
+        output_file = get_output_path(f"RowCounts_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+    write_reconciliation(df, output_file)
+    print(f"Report saved: {output_file}")
+    return df
+
+
+def main():
+    print("\n" + "=" * 80)
+    source = input("Batch auto-mapping report or pair list (xlsx/csv/yaml), or Enter to derive pairs: ").strip()
+    print("=" * 80)
+    try:
+        if source and source.lower().endswith(('.xlsx', '.xls')):
+            run_reconciliation(mapping_file=source)
+        elif source:
+            run_reconciliation(pairs_file=source)
+        else:
+            run_reconciliation()
+    except Exception as e:
+        print("✗ Failed:", e)
+        traceback.print_exc()
+
+
+def cli(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Row-count reconciliation MSSQL -> PostgreSQL")
+    parser.add_argument('--mapping', help="batch auto-mapping report (xlsx/csv) listing the table pairs")
+    parser.add_argument('--pairs', help="CSV/YAML file listing mssql_table,pg_table pairs")
+    parser.add_argument('--auto-pairs', action='store_true', help="derive table pairs with table_matcher")
+    parser.add_argument('--mssql-schema', default='dbo')
+    parser.add_argument('--pg-schema', default='public')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="relative estimate difference that triggers an exact count (default 0.02)")
+    parser.add_argument('--exact', action='store_true', help="exact counts for every pair")
+    parser.add_argument('--workers', type=int, default=COUNT_WORKERS)
+    parser.add_argument('--output', help="report path (.xlsx or .csv)")
+    args = parser.parse_args(argv)
+
+    if not (args.mapping or args.pairs or args.auto_pairs):
+        main()
+        return
+    df = run_reconciliation(args.mapping, args.pairs, args.mssql_schema, args.pg_schema,
+                            args.tolerance, args.exact, args.workers, args.output)
+    raise SystemExit(0 if df['STATUS'].isin(OK_STATUSES).all() else 1)
+
+
+if __name__ == '__main__':
+    cli()
@@ -4,10 +4,21 @@ run_comparison.py
 
 Easy-to-use script to compare tables between SQL Server and PostgreSQL.
 This script provides a menu to choose which comparison tool to run.
+
+    python run_comparison.py          # menu, runs one tool
+    python run_comparison.py shell    # interactive shell, runs tools repeatedly
+
+The shell keeps one process alive: pooled connections (db_session.py), imported
+modules and recently validated catalog snapshots are reused by every command, so
+only the first command pays the connect/import cost.
 """
 
+import cmd
+import shlex
 import sys
 import os
+import time
+import traceback
 
 # Add the current directory to path to ensure db_config can be imported
 sys.path.insert(0, os.path.dirname(__file__))
@@ -37,15 +48,32 @@ def main():
     print("  5) Table Details (table_details.py)")
     print("     - Get detailed information about a specific table")
     print()
+    print("  6) Data Diff (data_diff.py)")
+    print("     - Compare the actual rows of a MSSQL table and its PostgreSQL target")
+    print("     - Reports missing, extra and changed rows by key")
+    print()
+    print("  7) Checksum Compare (checksum_diff.py)")
+    print("     - Compares per key-range checksums computed inside each database")
+    print("     - Pulls rows only where checksums differ (daily verification)")
+    print()
+    print("  8) Row-Count Reconciliation (row_counts.py)")
+    print("     - Source vs target row counts for every mapped table pair")
+    print("     - Catalog estimates first, exact COUNT(*) only where they disagree")
+    print()
+    print("  9) Interactive Shell")
+    print("     - Run compare/details/export/... commands repeatedly in one session")
+    print("     - Connections and catalog caches stay warm between commands")
+    print()
     print("  0) Exit")
     
-    choice = input("\nEnter your choice (0-5): ").strip()
+    choice = input("\nEnter your choice (0-9): ").strip()
     
     if choice == "1":
         print("\n" + "=" * 80)
         print("Running: Simple Side-by-Side Comparison")
         print("=" * 80)
         import comparetable
+        comparetable.main()
     elif choice == "2":
         print("\n" + "=" * 80)
         print("Running: Powerful Auto-Mapping Comparison")
@@ -63,11 +91,33 @@ def main():
         print("Running: List All Tables")
         print("=" * 80)
         import list_all_tables
+        list_all_tables.main()
     elif choice == "5":
         print("\n" + "=" * 80)
         print("Running: Table Details")
         print("=" * 80)
         import table_details
+        table_details.main()
+    elif choice == "6":
+        print("\n" + "=" * 80)
+        print("Running: Data Diff")
+        print("=" * 80)
+        import data_diff
+        data_diff.main()
+    elif choice == "7":
+        print("\n" + "=" * 80)
+        print("Running: Checksum Compare")
+        print("=" * 80)
+        import checksum_diff
+        checksum_diff.main()
+    elif choice == "8":
+        print("\n" + "=" * 80)
+        print("Running: Row-Count Reconciliation")
+        print("=" * 80)
+        import row_counts
+        row_counts.main()
+    elif choice == "9":
+        ComparisonShell().cmdloop()
     elif choice == "0":
         print("\nExiting...")
         return
@@ -75,13 +125,239 @@ def main():
         print("\n✗ Invalid choice. Please run the script again.")
         return
 
+
+# -------------------------
+# Interactive shell
+# -------------------------
+SHELL_CATALOG_MAX_AGE = 60   # seconds a validated catalog table is reused without re-checking
+
+
+def _parser(prog: str, description: str):
+    import argparse
+    return argparse.ArgumentParser(prog=prog, description=description, add_help=True)
+
+
+class ComparisonShell(cmd.Cmd):
+    """Long-running session over the comparison tools; type 'help' for commands."""
+
+    intro = ("\nInteractive shell - type 'help' for commands, 'quit' to leave.\n"
+             "Connections and catalog snapshots are reused between commands.")
+    prompt = "compare> "
+
+    def __init__(self):
+        super().__init__()
+        self._started = None
+        # partial catalog requests reuse tables validated in the last minute
+        os.environ.setdefault('CATALOG_CACHE_MAX_AGE', str(SHELL_CATALOG_MAX_AGE))
+
+    # --- session plumbing ---
+    def preloop(self):
+        print_header("Table Comparison Shell - SQL Server vs PostgreSQL")
+        from db_session import connection
+        for db_type, label in (('mssql', 'MSSQL'), ('postgres', 'PostgreSQL')):
+            started = time.perf_counter()
+            try:
+                with connection(db_type):
+                    pass
+                print(f"✓ {label} connected ({time.perf_counter() - started:.1f}s)")
+            except Exception as e:
+                print(f"✗ {label} connection failed: {e}")
+
+    def precmd(self, line):
+        self._started = time.perf_counter()
+        return line
+
+    def postcmd(self, stop, line):
+        if not stop and line.strip() and self._started is not None:
+            print(f"({time.perf_counter() - self._started:.2f}s)")
+        return stop
+
+    def onecmd(self, line):
+        try:
+            return super().onecmd(line)
+        except SystemExit:
+            # argparse errors and --help
+            return False
+        except KeyboardInterrupt:
+            print("\nInterrupted.")
+            return False
+        except Exception as e:
+            print(f"✗ Error: {e}")
+            traceback.print_exc()
+            return False
+
+    def emptyline(self):
+        return False
+
+    def _args(self, parser, line):
+        return parser.parse_args(shlex.split(line))
+
+    # --- tools ---
+    def do_compare(self, line):
+        """compare MSSQL_TABLE PG_TABLE - side-by-side column comparison"""
+        p = _parser('compare', 'Side-by-side column comparison')
+        p.add_argument('mssql_table')
+        p.add_argument('pg_table')
+        args = self._args(p, line)
+        import comparetable
+        comparetable.compare_tables(args.mssql_table, args.pg_table)
+
+    def do_automap(self, line):
+        """automap MSSQL_TABLE PG_TABLE [--threshold 0.35] [--values] - suggested column mappings"""
+        p = _parser('automap', 'Column auto-mapping for one table pair')
+        p.add_argument('mssql_table')
+        p.add_argument('pg_table')
+        p.add_argument('--threshold', type=float, default=0.35)
+        p.add_argument('--values', action='store_true', help="also match columns by sampled values")
+        args = self._args(p, line)
+        import compare_tables_powerful_auto_mapping
+        compare_tables_powerful_auto_mapping.run_single_pair(args.mssql_table, args.pg_table, args.threshold,
+                                                             values=args.values)
+
+    def do_tables(self, line):
+        """tables [MSSQL_SCHEMA] [PG_SCHEMA] - list and match all tables"""
+        p = _parser('tables', 'List all tables of both databases')
+        p.add_argument('mssql_schema', nargs='?', default='dbo')
+        p.add_argument('pg_schema', nargs='?', default='public')
+        args = self._args(p, line)
+        import list_all_tables
+        list_all_tables.list_all_tables(args.mssql_schema, args.pg_schema)
+
+    def do_details(self, line):
+        """details PG_TABLE [--schema public] [--profile] [--sample PERCENT] - PostgreSQL table details"""
+        p = _parser('details', 'PostgreSQL table details')
+        p.add_argument('table')
+        p.add_argument('--schema', default='public')
+        p.add_argument('--profile', action='store_true', help="also profile every column")
+        p.add_argument('--sample', type=float, metavar='PERCENT', help="profile a TABLESAMPLE of the table")
+        args = self._args(p, line)
+        import table_details
+        table_details.table_details(args.table, args.schema, args.profile, args.sample)
+
+    def do_profile(self, line):
+        """profile mssql|postgres [TABLE ...] [--schema S] [--sample PERCENT] [--format xlsx|parquet] - column profiles"""
+        p = _parser('profile', 'Column profiles, one aggregate scan per table')
+        p.add_argument('db', choices=['mssql', 'postgres'])
+        p.add_argument('tables', nargs='*')
+        p.add_argument('--schema')
+        p.add_argument('--sample', type=float, metavar='PERCENT')
+        p.add_argument('--format', choices=['xlsx', 'parquet'], default='xlsx')
+        p.add_argument('--output')
+        args = self._args(p, line)
+        import table_details
+        table_details.run_profile(args.tables, args.db, args.schema, args.sample, fmt=args.format,
+                                  output_file=args.output)
+
+    def do_export(self, line):
+        """export mssql|postgres [SCHEMA.]TABLE [--format xlsx|csv|parquet|arrow] [--output PATH]"""
+        import fetchdata
+        from export_writers import EXPORT_FORMATS
+        p = _parser('export', 'Export one table')
+        p.add_argument('db', choices=['mssql', 'postgres'])
+        p.add_argument('table')
+        p.add_argument('--format', choices=list(EXPORT_FORMATS), default='xlsx')
+        p.add_argument('--output')
+        args = self._args(p, line)
+        if not fetchdata.valid_identifier(args.table):
+            print("✗ Invalid table name (letters, digits and underscore, optionally schema.table).")
+            return
+        from db_session import connection
+        schema, table = fetchdata.parse_schema_table(args.table, 'dbo' if args.db == 'mssql' else 'public')
+        with connection(args.db) as conn:
+            exists = (fetchdata.table_exists_mssql if args.db == 'mssql' else fetchdata.table_exists_postgres)(conn, schema, table)
+            if not exists:
+                print(f"✗ Table '{schema}.{table}' not found in {args.db.upper()} (or not visible).")
+                return
+            row_count = fetchdata.get_row_count(conn, args.db, schema, table)
+            fetchdata.export_table(conn, args.db, schema, table, args.format, row_count, output_file=args.output)
+
+    def do_diff(self, line):
+        """diff MSSQL_TABLE PG_TABLE [--mapping FILE] [--key COL,...] [--output PATH] - row-level data diff"""
+        p = _parser('diff', 'Row-level data diff')
+        p.add_argument('mssql_table')
+        p.add_argument('pg_table')
+        p.add_argument('--mapping')
+        p.add_argument('--key')
+        p.add_argument('--output')
+        args = self._args(p, line)
+        import data_diff
+        key = [k.strip() for k in args.key.split(',') if k.strip()] if args.key else None
+        data_diff.run_diff(args.mssql_table, args.pg_table, args.mapping, key, args.output)
+
+    def do_checksum(self, line):
+        """checksum [MSSQL_TABLE PG_TABLE] [--mapping FILE] [--output PATH] - checksum compare"""
+        p = _parser('checksum', 'Checksum compare of one pair, or every pair of a batch report')
+        p.add_argument('tables', nargs='*')
+        p.add_argument('--mapping')
+        p.add_argument('--output')
+        args = self._args(p, line)
+        if len(args.tables) not in (0, 2) or (not args.tables and not args.mapping):
+            p.error("give MSSQL_TABLE PG_TABLE, or --mapping with a batch report")
+        import checksum_diff
+        m_table, p_table = args.tables if args.tables else (None, None)
+        checksum_diff.run_checksum_diff(m_table, p_table, args.mapping, output_file=args.output)
+
+    def do_counts(self, line):
+        """counts [MAPPING_OR_PAIRS_FILE] [--exact] [--tolerance 0.02] - row-count reconciliation"""
+        import row_counts
+        p = _parser('counts', 'Row-count reconciliation')
+        p.add_argument('source', nargs='?')
+        p.add_argument('--exact', action='store_true')
+        p.add_argument('--tolerance', type=float, default=row_counts.DEFAULT_TOLERANCE)
+        p.add_argument('--output')
+        args = self._args(p, line)
+        is_report = bool(args.source) and args.source.lower().endswith(('.xlsx', '.xls'))
+        row_counts.run_reconciliation(mapping_file=args.source if is_report else None,
+                                      pairs_file=None if is_report else args.source,
+                                      tolerance=args.tolerance, exact=args.exact, output_file=args.output)
+
+    def do_fks(self, line):
+        """fks mssql|postgres [--schemas dbo,sales] [--min-containment 0.95] [--confirm 200] - infer foreign keys"""
+        import fk_inference
+        p = _parser('fks', 'Foreign-key inference and migration order')
+        p.add_argument('db', choices=['mssql', 'postgres'])
+        p.add_argument('--schemas')
+        p.add_argument('--min-containment', type=float, default=fk_inference.MIN_CONTAINMENT)
+        p.add_argument('--confirm', type=int, default=fk_inference.CONFIRM_LIMIT)
+        p.add_argument('--output')
+        args = self._args(p, line)
+        schemas = [s.strip() for s in args.schemas.split(',') if s.strip()] if args.schemas else None
+        fk_inference.run_inference(args.db, schemas, args.min_containment, args.confirm, output_file=args.output)
+
+    # --- session ---
+    def do_pool(self, line):
+        """pool - connection pool usage"""
+        from db_session import get_pool
+        for db_type in ('mssql', 'postgres'):
+            stats = get_pool(db_type).stats()
+            print(f"  {db_type:<9} size {stats['size']}, open {stats['open']}, idle {stats['idle']}")
+
+    def do_menu(self, line):
+        """menu - the numbered tool menu"""
+        main()
+
+    def do_quit(self, line):
+        """quit - leave the shell"""
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, line):
+        print()
+        return True
+
+
 if __name__ == "__main__":
+    from name_matching import persisted_features
     try:
-        main()
+        with persisted_features():
+            if sys.argv[1:2] in (["shell"], ["--shell"]):
+                ComparisonShell().cmdloop()
+            else:
+                main()
     except KeyboardInterrupt:
         print("\n\nInterrupted by user.")
     except Exception as e:
         print(f"\n✗ Error: {e}")
-        import traceback
         traceback.print_exc()
         input("\nPress Enter to exit...")
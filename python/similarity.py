@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+similarity.py
+
+String-similarity kernels behind score_pair and column_scoring (the 0..1 "seq
+ratio" of two normalized names and of two tokens).
+
+ - 'difflib' (default): difflib.SequenceMatcher(None, a, b).ratio(), exactly what
+              the matcher always used, so thresholds such as 0.35 / 0.75 keep
+              their meaning. Memoized per string pair: the token pairs of a
+              schema repeat endlessly, so most calls are a dict lookup.
+ - 'indel'  : normalized Indel similarity 2 * LCS(a, b) / (len(a) + len(b)).
+              rapidfuzz computes it when installed; otherwise a bit-parallel LCS
+              (Hyyro) on Python ints, and on NumPy uint64 lanes for batches.
+
+Both are 2 * matches / total length; difflib's matches come from its
+longest-block heuristic and form a common subsequence, so 'indel' is never lower
+and equal whenever the heuristic finds a longest one (true for most column names).
+
+Select with set_kernel() or the SIMILARITY_KERNEL environment variable.
+"""
+
+import difflib
+import os
+from functools import lru_cache
+from typing import List, Sequence
+
+KERNELS = ('difflib', 'indel')
+CACHE_SIZE = 1 << 16
+
+try:
+    from rapidfuzz.distance import Indel as _rf_indel
+except ImportError:
+    _rf_indel = None
+
+
+# -------------------------
+# difflib (compatibility)
+# -------------------------
+@lru_cache(maxsize=CACHE_SIZE)
+def difflib_ratio(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+# -------------------------
+# Indel (bit-parallel LCS)
+# -------------------------
+def lcs_length(a: str, b: str) -> int:
+    """Length of the longest common subsequence, one bit per character of `b`."""
+    if not a or not b:
+        return 0
+    masks = {}
+    for k, ch in enumerate(b):
+        masks[ch] = masks.get(ch, 0) | (1 << k)
+    full = (1 << len(b)) - 1
+    v = full
+    for ch in a:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(b) - bin(v).count('1')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def indel_ratio(a: str, b: str) -> float:
+    total = len(a) + len(b)
+    if not total:
+        return 1.0
+    if _rf_indel is not None:
+        return _rf_indel.normalized_similarity(a, b)
+    return 2.0 * lcs_length(a, b) / total
+
+
+def _lcs_lengths_np(a_list: List[str], b_list: List[str]):
+    """LCS lengths of many pairs at once; every b must be at most 64 characters."""
+    import numpy as np
+
+    n = len(a_list)
+    la = np.array([len(a) for a in a_list], dtype=np.int64)
+    lb = np.array([len(b) for b in b_list], dtype=np.int64)
+    # padding never matches: -1 in a, -2 in b
+    a_codes = np.full((n, max(1, int(la.max(initial=0)))), -1, dtype=np.int64)
+    b_codes = np.full((n, 64), -2, dtype=np.int64)
+    for k, (a, b) in enumerate(zip(a_list, b_list)):
+        a_codes[k, :len(a)] = [ord(c) for c in a]
+        b_codes[k, :len(b)] = [ord(c) for c in b]
+
+    masks = np.array([(1 << m) - 1 for m in range(65)], dtype=np.uint64)
+    full = masks[lb]
+    v = full.copy()
+    for i in range(a_codes.shape[1]):
+        eq = b_codes == a_codes[:, i:i + 1]
+        pm = np.packbits(eq, axis=1, bitorder='little').view('<u8').ravel()
+        u = v & pm
+        v = ((v + u) | (v - u)) & full
+    if hasattr(np, 'bitwise_count'):
+        ones = np.bitwise_count(v)
+    else:
+        ones = np.unpackbits(v.view(np.uint8).reshape(n, 8), axis=1).sum(axis=1)
+    return lb - ones.astype(np.int64)
+
+
+def indel_ratios(a_list: Sequence[str], b_list: Sequence[str]):
+    """indel_ratio of every (a_list[k], b_list[k]) pair, as a float64 array."""
+    import numpy as np
+
+    a_list = list(a_list)
+    b_list = list(b_list)
+    out = np.ones(len(a_list), dtype=np.float64)
+    if not a_list:
+        return out
+    if _rf_indel is not None:
+        out[:] = [_rf_indel.normalized_similarity(a, b) for a, b in zip(a_list, b_list)]
+        return out
+
+    # the shorter string of each pair goes into the 64-bit lanes
+    lanes, rest = [], []
+    for k, (a, b) in enumerate(zip(a_list, b_list)):
+        (lanes if min(len(a), len(b)) <= 64 else rest).append(k)
+    if lanes:
+        swap = [len(b_list[k]) > len(a_list[k]) for k in lanes]
+        longer = [b_list[k] if s else a_list[k] for k, s in zip(lanes, swap)]
+        shorter = [a_list[k] if s else b_list[k] for k, s in zip(lanes, swap)]
+        lcs = _lcs_lengths_np(longer, shorter)
+        total = np.array([len(a_list[k]) + len(b_list[k]) for k in lanes], dtype=np.float64)
+        out[lanes] = np.divide(2.0 * lcs, total, out=np.ones_like(total), where=total > 0)
+    for k in rest:
+        out[k] = indel_ratio(a_list[k], b_list[k])
+    return out
+
+
+# -------------------------
+# Kernel selection
+# -------------------------
+_kernel = None
+_ratio = None
+
+
+def set_kernel(name: str):
+    global _kernel, _ratio
+    name = (name or 'difflib').strip().lower()
+    if name not in KERNELS:
+        raise ValueError(f"Unknown similarity kernel: {name!r} (expected one of {', '.join(KERNELS)})")
+    _kernel = name
+    _ratio = difflib_ratio if name == 'difflib' else indel_ratio
+
+
+def get_kernel() -> str:
+    return _kernel
+
+
+def ratio(a: str, b: str) -> float:
+    """Similarity of two strings with the current kernel."""
+    return _ratio(a, b)
+
+
+def ratios(a_list: Sequence[str], b_list: Sequence[str]):
+    """ratio() of every (a_list[k], b_list[k]) pair, as a float64 array (loads NumPy)."""
+    import numpy as np
+
+    if _kernel == 'indel':
+        return indel_ratios(a_list, b_list)
+    # grouped by b: SequenceMatcher caches its analysis of the second sequence
+    out = np.empty(len(a_list), dtype=np.float64)
+    matcher = difflib.SequenceMatcher(None)
+    current = None
+    for k in sorted(range(len(b_list)), key=b_list.__getitem__):
+        if b_list[k] != current:
+            current = b_list[k]
+            matcher.set_seq2(current)
+        matcher.set_seq1(a_list[k])
+        out[k] = matcher.ratio()
+    return out
+
+
+set_kernel(os.environ.get('SIMILARITY_KERNEL', 'difflib'))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+startup_benchmark.py
+
+Startup cost of the CLI tools: for every module, `import <module>` is timed in a
+fresh interpreter (several runs, median) and the heavy libraries it pulled in are
+listed. Tools should only load pandas/numpy/openpyxl/pyarrow on the code paths that
+use them, so e.g. importing fetchdata or run_comparison loads none of them.
+
+Usage:
+    python startup_benchmark.py                     # all tools, 5 runs each
+    python startup_benchmark.py --runs 10 fetchdata data_diff
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = [
+    'run_comparison',
+    'catalog_cache',
+    'table_matcher',
+    'fetchdata',
+    'row_counts',
+    'data_diff',
+    'checksum_diff',
+    'export_writers',
+    'excel_report',
+    'list_all_tables',
+    'comparetable',
+    'table_details',
+    'compare_tables_powerful_auto_mapping',
+]
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'pyarrow')
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"import_s": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    """Median in-process import time and interpreter wall time of `import module`."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    import_times, wall_times, heavy = [], [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', probe], cwd=here, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ['import failed'])[-1]
+            return {'module': module, 'error': error}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        import_times.append(result['import_s'])
+        wall_times.append(wall)
+        heavy = result['heavy']
+    return {
+        'module': module,
+        'import_s': statistics.median(import_times),
+        'wall_s': statistics.median(wall_times),
+        'heavy': heavy,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time benchmark for the CLI tools")
+    parser.add_argument('modules', nargs='*', help="modules to measure (default: all tools)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(m, max(1, args.runs)) for m in (args.modules or MODULES)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return results
+
+    print(f"{'module':<40} {'import':>9} {'process':>9}  heavy libraries loaded")
+    print("-" * 95)
+    for r in results:
+        if 'error' in r:
+            print(f"{r['module']:<40} {'':>9} {'':>9}  ✗ {r['error']}")
+            continue
+        print(f"{r['module']:<40} {r['import_s'] * 1000:>7.0f}ms {r['wall_s'] * 1000:>7.0f}ms  "
+              f"{', '.join(r['heavy']) or '-'}")
+    return results
+
+
+if __name__ == '__main__':
+    main()
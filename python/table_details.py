@@ -1,215 +1,262 @@
 import pandas as pd
 from datetime import datetime
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from db_config import (
-    get_postgres_connection,
     print_header,
     get_output_path
 )
+from db_session import get_postgres_connection
+from catalog_cache import cached_catalog
+from row_counts import estimate_row_count
+from column_profile import (
+    TOP_VALUES, PROFILE_WORKERS, format_top_values, profile_frame, profile_table, profile_tables,
+    write_profile, write_profile_sheet
+)
+from excel_report import ExcelReport
+
 
-print_header("PostgreSQL Table Details Viewer")
+def print_profile(profile):
+    """Console summary of a column_profile.TableProfile."""
+    print(f"\n{'Column Name':<30} {'Null %':>7} {'Distinct':>12} {'Max Len':>8}  Min / Max / Top values")
+    print("-" * 110)
+    for c in profile.columns:
+        distinct = f"{c.distinct:,}" if c.distinct is not None else ''
+        length = f"{c.max_length:,}" if c.max_length is not None else ''
+        bounds = f"{c.min[:20]} .. {c.max[:20]}" if c.min is not None else ''
+        print(f"{c.name[:30]:<30} {c.null_pct:>7.2f} {distinct:>12} {length:>8}  "
+              f"{bounds}  {format_top_values(c.top_values[:3])[:60]}")
 
-# Connect to PostgreSQL
-print("\nConnecting to PostgreSQL...")
-pg_conn = get_postgres_connection()
-print("✓ PostgreSQL Connected")
 
-# Get table name from user
-print("\n" + "=" * 80)
-table_name = input("Enter PostgreSQL table name (e.g., event_master): ")
-print("=" * 80)
+def table_details(table_name: str, schema: str = 'public', profile: bool = False,
+                  sample_percent: float = None, top: int = TOP_VALUES) -> str:
+    """
+    Column details and sample rows of one PostgreSQL table; returns the report path (None on failure).
+    With profile, every column is also profiled (column_profile.py) into a Column_Profile sheet.
+    """
+    # Connect to PostgreSQL
+    print("\nConnecting to PostgreSQL...")
+    pg_conn = get_postgres_connection()
+    print("✓ PostgreSQL Connected")
 
-try:
-    print(f"\nFetching details for table: {table_name}")
+    output_file = None
+    try:
+        print(f"\nFetching details for table: {table_name}")
     
-    cursor = pg_conn.cursor()
+        cursor = pg_conn.cursor()
     
-    # Get column details
-    query = f"""
-    SELECT 
-        column_name,
-        data_type,
-        character_maximum_length,
-        CASE 
-            WHEN is_nullable = 'YES' THEN 'NULL'
-            ELSE 'NOT NULL'
-        END as nullable,
-        column_default,
-        ordinal_position
-    FROM information_schema.columns
-    WHERE table_name = '{table_name}' 
-    AND table_schema = 'public'
-    ORDER BY ordinal_position
-    """
+        # Get column details (pg_catalog snapshot of just this table)
+        pg_catalog = cached_catalog(pg_conn, 'postgres', schema, tables=[table_name])
+        table_info = pg_catalog.table(table_name)
     
-    df = pd.read_sql(query, pg_conn)
+        df = pd.DataFrame(
+            [{
+                'column_name': col.name,
+                'data_type': col.data_type,
+                'character_maximum_length': col.max_length,
+                'nullable': 'NULL' if col.nullable else 'NOT NULL',
+                'column_default': col.default,
+                'ordinal_position': col.ordinal,
+            } for col in (table_info.columns if table_info else [])],
+            columns=['column_name', 'data_type', 'character_maximum_length', 'nullable', 'column_default', 'ordinal_position']
+        )
     
-    if len(df) == 0:
-        print(f"\n✗ Table '{table_name}' not found in PostgreSQL!")
+        if len(df) == 0:
+            print(f"\n✗ Table '{table_name}' not found in PostgreSQL!")
         
-        # Show available tables
-        print("\nAvailable tables:")
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public' 
-            AND table_type = 'BASE TABLE'
-            ORDER BY table_name
-        """)
-        tables = cursor.fetchall()
-        for idx, table in enumerate(tables[:20], 1):
-            print(f"  {idx}. {table[0]}")
+            # Show available tables
+            print("\nAvailable tables:")
+            tables = cached_catalog(pg_conn, 'postgres', schema).table_names()
+            for idx, table in enumerate(tables[:20], 1):
+                print(f"  {idx}. {table}")
         
-        if len(tables) > 20:
-            print(f"  ... and {len(tables) - 20} more tables")
+            if len(tables) > 20:
+                print(f"  ... and {len(tables) - 20} more tables")
         
-        pg_conn.close()
-        input("\nPress Enter to exit...")
-        exit()
+            return None
     
-    # Get row count
-    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-    row_count = cursor.fetchone()[0]
+        # Get row count (pg_class estimate, no table scan; -1 until the table is analyzed)
+        row_count = estimate_row_count(pg_conn, 'postgres', schema, table_info.name)
+        row_count_text = f"~{row_count:,}" if row_count >= 0 else "unknown (not analyzed)"
+
+        # Column profile: one aggregate scan; its COUNT(*) is exact unless sampled
+        column_profile = None
+        if profile:
+            print("Profiling columns" + (f" ({sample_percent}% sample)..." if sample_percent else "..."))
+            column_profile = profile_table(pg_conn, 'postgres', table_info, sample_percent, top)
+            if not sample_percent:
+                row_count_text = f"{column_profile.rows:,}"
     
-    # Print results to console
-    print("\n" + "=" * 80)
-    print(f"Table: {table_name}")
-    print("=" * 80)
-    print(f"\nTotal Columns: {len(df)}")
-    print(f"Total Rows: {row_count:,}")
-    print("\n" + "-" * 80)
-    print(f"{'#':<4} {'Column Name':<30} {'Data Type':<25} {'Nullable':<12}")
-    print("-" * 80)
+        # Print results to console
+        print("\n" + "=" * 80)
+        print(f"Table: {table_name}")
+        print("=" * 80)
+        print(f"\nTotal Columns: {len(df)}")
+        print(f"Total Rows: {row_count_text}")
+        print("\n" + "-" * 80)
+        print(f"{'#':<4} {'Column Name':<30} {'Data Type':<25} {'Nullable':<12}")
+        print("-" * 80)
     
-    for idx, row in df.iterrows():
-        col_name = row['column_name']
-        data_type = row['data_type']
+        for idx, row in df.iterrows():
+            col_name = row['column_name']
+            data_type = row['data_type']
         
-        # Add length for character types
-        if row['character_maximum_length'] and pd.notna(row['character_maximum_length']):
-            data_type = f"{data_type}({int(row['character_maximum_length'])})"
+            # Add length for character types
+            if row['character_maximum_length'] and pd.notna(row['character_maximum_length']):
+                data_type = f"{data_type}({int(row['character_maximum_length'])})"
         
-        nullable = row['nullable']
+            nullable = row['nullable']
         
-        print(f"{idx+1:<4} {col_name:<30} {data_type:<25} {nullable:<12}")
+            print(f"{idx+1:<4} {col_name:<30} {data_type:<25} {nullable:<12}")
+
+        if column_profile is not None:
+            print_profile(column_profile)
     
-    # Create formatted Excel output
-    print("\n" + "=" * 80)
-    print("Creating detailed Excel report...")
-    print("=" * 80)
+        # Create formatted Excel output
+        print("\n" + "=" * 80)
+        print("Creating detailed Excel report...")
+        print("=" * 80)
     
-    # Prepare data for Excel
-    excel_data = []
-    for idx, row in df.iterrows():
-        data_type = row['data_type']
-        if row['character_maximum_length'] and pd.notna(row['character_maximum_length']):
-            data_type = f"{data_type}({int(row['character_maximum_length'])})"
+        # Prepare data for Excel
+        excel_data = []
+        for idx, row in df.iterrows():
+            data_type = row['data_type']
+            if row['character_maximum_length'] and pd.notna(row['character_maximum_length']):
+                data_type = f"{data_type}({int(row['character_maximum_length'])})"
         
-        excel_data.append({
-            'Position': int(row['ordinal_position']),
-            'Column Name': row['column_name'],
-            'Data Type': data_type,
-            'Nullable': row['nullable'],
-            'Default Value': row['column_default'] if pd.notna(row['column_default']) else ''
-        })
+            excel_data.append({
+                'Position': int(row['ordinal_position']),
+                'Column Name': row['column_name'],
+                'Data Type': data_type,
+                'Nullable': row['nullable'],
+                'Default Value': row['column_default'] if pd.notna(row['column_default']) else ''
+            })
     
-    df_excel = pd.DataFrame(excel_data)
+        df_excel = pd.DataFrame(excel_data)
     
-    # Save to Excel with formatting
-    output_file = get_output_path(f"PG_{table_name}_details_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        # Save to Excel with formatting
+        output_file = get_output_path(f"PG_{table_name}_details_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
     
-    with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-        # Write table details
-        df_excel.to_excel(writer, sheet_name='Table_Details', index=False, startrow=3)
-        
-        workbook = writer.book
-        worksheet = writer.sheets['Table_Details']
-        
-        # Add table info at top
-        worksheet['A1'] = f'PostgreSQL Table: {table_name}'
-        worksheet['A2'] = f'Total Columns: {len(df)}'
-        worksheet['C2'] = f'Total Rows: {row_count:,}'
-        
-        # Style header
-        header_font = Font(bold=True, size=14, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        worksheet['A1'].font = header_font
-        worksheet['A1'].fill = header_fill
-        
-        # Merge title cell
-        worksheet.merge_cells('A1:E1')
-        worksheet['A1'].alignment = Alignment(horizontal='center', vertical='center')
-        
-        # Style info row
-        info_font = Font(bold=True, size=11)
-        for cell in ['A2', 'C2']:
-            worksheet[cell].font = info_font
-        
-        # Style column headers
-        col_header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        col_header_font = Font(bold=True, size=11)
-        center_align = Alignment(horizontal='center', vertical='center')
-        
-        for cell in ['A4', 'B4', 'C4', 'D4', 'E4']:
-            worksheet[cell].fill = col_header_fill
-            worksheet[cell].font = col_header_font
-            worksheet[cell].alignment = center_align
-        
-        # Set column widths
-        worksheet.column_dimensions['A'].width = 10
-        worksheet.column_dimensions['B'].width = 35
-        worksheet.column_dimensions['C'].width = 30
-        worksheet.column_dimensions['D'].width = 15
-        worksheet.column_dimensions['E'].width = 30
+        with ExcelReport(output_file) as report:
+            # Table info at the top, column details from row 4
+            sheet = report.sheet('Table_Details', widths=[10, 35, 30, 15, 30])
+            sheet.append([f'PostgreSQL Table: {table_name}', None, None, None, None], 'title_large')
+            sheet.merge('A1:E1')
+            sheet.append([f'Total Columns: {len(df)}', None, f'Total Rows: {row_count_text}'], 'info')
+            sheet.append([])
+            # Position and Nullable centered
+            sheet.frame(df_excel, styles=['cell_center', 'cell', 'cell', 'cell_center', 'cell'])
         
-        # Add borders
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        for row in worksheet.iter_rows(min_row=4, max_row=len(df)+4, min_col=1, max_col=5):
-            for cell in row:
-                cell.border = thin_border
-                if cell.column == 1 or cell.column == 4:  # Position and Nullable columns
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                else:
-                    cell.alignment = Alignment(vertical='center')
-        
-        # Add sample data sheet
-        print("Fetching sample data (first 10 rows)...")
-        cursor.execute(f"SELECT * FROM {table_name} LIMIT 10")
-        sample_data = cursor.fetchall()
+            # Add sample data sheet
+            print("Fetching sample data (first 10 rows)...")
+            cursor.execute(f'SELECT * FROM "{schema}"."{table_info.name}" LIMIT 10')
+            sample_data = cursor.fetchall()
         
-        if sample_data:
-            column_names = [desc[0] for desc in cursor.description]
-            df_sample = pd.DataFrame(sample_data, columns=column_names)
-            df_sample.to_excel(writer, sheet_name='Sample_Data', index=False)
-            
-            # Format sample data sheet
-            sample_sheet = writer.sheets['Sample_Data']
-            for cell in sample_sheet[1]:
-                cell.fill = col_header_fill
-                cell.font = col_header_font
-                cell.alignment = center_align
+            if sample_data:
+                column_names = [desc[0] for desc in cursor.description]
+                df_sample = pd.DataFrame(sample_data, columns=column_names)
+                report.frame_sheet('Sample_Data', df_sample, freeze=None, header='header')
+
+            if column_profile is not None:
+                write_profile_sheet(report, profile_frame([column_profile]))
     
-    print(f"\n✓ Excel report saved to: {output_file}")
-    print(f"\nSheets created:")
-    print(f"  1. Table_Details - Column information")
-    print(f"  2. Sample_Data - First 10 rows of data")
-
-except Exception as e:
-    print(f"\n✗ Error fetching table details!")
-    print(f"Error: {str(e)}")
-    import traceback
-    traceback.print_exc()
-
-finally:
-    pg_conn.close()
+        print(f"\n✓ Excel report saved to: {output_file}")
+        print(f"\nSheets created:")
+        print(f"  1. Table_Details - Column information")
+        print(f"  2. Sample_Data - First 10 rows of data")
+        if column_profile is not None:
+            print(f"  3. Column_Profile - Nulls, distinct values, min/max, length, top values")
+
+    except Exception as e:
+        print(f"\n✗ Error fetching table details!")
+        print(f"Error: {str(e)}")
+        output_file = None
+        import traceback
+        traceback.print_exc()
+
+    finally:
+        pg_conn.close()
+        print("\n" + "=" * 80)
+        print("Connection closed")
+        print("=" * 80)
+
+    return output_file
+
+
+def run_profile(tables=None, db_type: str = 'postgres', schema: str = None, sample_percent: float = None,
+                top: int = TOP_VALUES, workers: int = PROFILE_WORKERS, fmt: str = 'xlsx',
+                output_file: str = None) -> 'pd.DataFrame':
+    """Profile many tables (all of the schema when tables is empty) into one .xlsx / .parquet report."""
+    from db_session import connection
+
+    schema = schema or ('dbo' if db_type == 'mssql' else 'public')
+    print_header(f"Column Profile ({db_type.upper()} {schema})")
+    with connection(db_type) as conn:
+        catalog = cached_catalog(conn, db_type, schema, tables=list(tables) if tables else None)
+    requested = list(tables) if tables else catalog.table_names()
+    infos = []
+    for name in requested:
+        info = catalog.table(name)
+        if info is None:
+            print(f"✗ Table '{schema}.{name}' not found in {db_type.upper()}")
+        else:
+            infos.append(info)
+    if not infos:
+        return None
+
+    print(f"Profiling {len(infos)} tables" + (f" ({sample_percent}% sample)" if sample_percent else "") + "...")
+    started = datetime.now()
+    profiles = profile_tables([(db_type, info) for info in infos], sample_percent, top, workers)
+    elapsed = (datetime.now() - started).total_seconds()
+    failed = [p for p in profiles if p.error]
+    print(f"\n{len(profiles) - len(failed)} tables profiled, {len(failed)} failed, {elapsed:.1f}s")
+
+    df = profile_frame(profiles)
+    if not output_file:
+        output_file = get_output_path(f"Profile_{db_type}_{schema}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}")
+    write_profile(df, output_file)
+    print(f"✓ Profile saved to: {output_file}")
+    return df
+
+
+def main():
+    print_header("PostgreSQL Table Details Viewer")
+
+    # Get table name from user
     print("\n" + "=" * 80)
-    print("Connection closed")
+    table_name = input("Enter PostgreSQL table name (e.g., event_master): ")
+    profile = input("Profile columns too (nulls, distinct, min/max, top values)? (y/N) ").strip().lower() == 'y'
     print("=" * 80)
 
-input("\nPress Enter to exit...")
\ No newline at end of file
+    table_details(table_name.strip(), profile=profile)
+
+
+def cli(argv=None):
+    """Interactive without arguments."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Table details and column profiles")
+    parser.add_argument('tables', nargs='*', help="table name(s); with --profile and none given, the whole schema")
+    parser.add_argument('--profile', action='store_true', help="profile every column (one aggregate scan per table)")
+    parser.add_argument('--db', choices=['mssql', 'postgres'], default='postgres')
+    parser.add_argument('--schema', help="default dbo / public")
+    parser.add_argument('--sample', type=float, metavar='PERCENT', help="profile a TABLESAMPLE of PERCENT %% of the pages")
+    parser.add_argument('--top', type=int, default=TOP_VALUES, help="most frequent values per column (0 = none)")
+    parser.add_argument('--workers', type=int, default=PROFILE_WORKERS)
+    parser.add_argument('--format', choices=['xlsx', 'parquet'], default='xlsx')
+    parser.add_argument('--output', help="profile report path")
+    args = parser.parse_args(argv)
+
+    if not args.tables and not args.profile:
+        main()
+        input("\nPress Enter to exit...")
+        return
+    if args.profile and (args.db == 'mssql' or len(args.tables) != 1 or args.format != 'xlsx' or args.output):
+        df = run_profile(args.tables, args.db, args.schema, args.sample, args.top, args.workers,
+                         args.format, args.output)
+        raise SystemExit(0 if df is not None else 1)
+    if args.db == 'mssql':
+        parser.error("table details are PostgreSQL only; use --profile for MSSQL tables")
+    for table in args.tables:
+        table_details(table, args.schema or 'public', args.profile, args.sample, args.top)
+
+
+if __name__ == "__main__":
+    cli()
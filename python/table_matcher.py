@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+table_matcher.py
+
+Table-level matcher: finds which PostgreSQL table corresponds to which MSSQL table.
+
+Each candidate pair gets a blended score:
+ - name score   : score_pair on the table names after dropping legacy prefixes (TBL_...)
+ - column score : IDF-weighted jaccard of the two column-name sets (normalized with
+                  split_tokens, so TOKEN_EQUIV synonyms line up)
+
+Nothing is compared all-pairs. Candidates come from inverted indexes over the
+name tokens, the underscore-free name and the (non-ubiquitous) column keys, and
+only the best-overlapping few per table are scored. That keeps it usable on
+schemas with thousands of tables.
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from name_matching import normalize, remove_underscores, split_tokens, score_pair
+
+LEGACY_TABLE_PREFIXES = ('tbl_', 'tb_', 'tbl')
+
+NAME_WEIGHT = 0.6
+COLUMN_WEIGHT = 0.4
+
+# column keys present in more tables than this share of the schema (CREATED_BY, ...)
+# are too common to generate candidates; they still count in the column score
+MAX_KEY_DF_SHARE = 0.05
+MIN_KEY_DF_CAP = 25
+# at most this many token/column-overlap candidates are fully scored per MSSQL table
+MAX_CANDIDATES = 25
+
+
+def strip_table_prefix(name: str) -> str:
+    """Normalized table name without a legacy prefix such as TBL_."""
+    s = normalize(name)
+    for prefix in LEGACY_TABLE_PREFIXES:
+        if s.startswith(prefix) and len(s) > len(prefix):
+            return s[len(prefix):].strip('_')
+    return s
+
+
+def column_key(column: str) -> str:
+    return ''.join(split_tokens(column))
+
+
+def _column_keys(columns: Sequence[str]) -> frozenset:
+    return frozenset(k for k in (column_key(c) for c in columns) if k)
+
+
+class TableMatcher:
+    """Index the PostgreSQL side once, then match any number of MSSQL tables against it."""
+
+    def __init__(self, m_tables: Dict[str, Sequence[str]], p_tables: Dict[str, Sequence[str]]):
+        self.m_names = list(m_tables)
+        self.p_names = list(p_tables)
+        self.m_keys = {t: _column_keys(cols) for t, cols in m_tables.items()}
+        self.p_keys = {t: _column_keys(cols) for t, cols in p_tables.items()}
+        self.m_stripped = {t: strip_table_prefix(t) for t in self.m_names}
+        self.p_stripped = {t: strip_table_prefix(t) for t in self.p_names}
+
+        # IDF weights over both schemas
+        df = Counter()
+        for keys in self.m_keys.values():
+            df.update(keys)
+        for keys in self.p_keys.values():
+            df.update(keys)
+        n_tables = max(1, len(self.m_names) + len(self.p_names))
+        self.idf = {k: math.log(1.0 + n_tables / c) for k, c in df.items()}
+
+        # inverted indexes over the PG side
+        self.by_column = defaultdict(list)
+        for t, keys in self.p_keys.items():
+            for k in keys:
+                self.by_column[k].append(t)
+        self.by_token = defaultdict(set)
+        self.by_compact = defaultdict(set)
+        for t, s in self.p_stripped.items():
+            for tok in split_tokens(s):
+                self.by_token[tok].add(t)
+            self.by_compact[remove_underscores(s)].add(t)
+        self.token_idf = {tok: math.log(1.0 + len(self.p_names) / len(ts)) for tok, ts in self.by_token.items()}
+        self.max_key_df = max(MIN_KEY_DF_CAP, int(len(self.p_names) * MAX_KEY_DF_SHARE))
+
+    def column_score(self, m_table: str, p_table: str) -> float:
+        a = self.m_keys[m_table]
+        b = self.p_keys[p_table]
+        if not a or not b:
+            return 0.0
+        union = sum(self.idf[k] for k in a | b)
+        inter = sum(self.idf[k] for k in a & b)
+        return inter / union if union > 0 else 0.0
+
+    def candidates(self, m_table: str) -> set:
+        """PG tables sharing the underscore-free name, or the best overlaps on name tokens / rare column keys."""
+        stripped = self.m_stripped[m_table]
+        cands = set(self.by_compact.get(remove_underscores(stripped), ()))
+
+        # cheap pre-score: idf mass of shared name tokens and shared rare column keys
+        shared = Counter()
+        for tok in set(split_tokens(stripped)):
+            postings = self.by_token.get(tok)
+            if postings:
+                w = self.token_idf[tok]
+                for t in postings:
+                    shared[t] += w
+        for k in self.m_keys[m_table]:
+            postings = self.by_column.get(k)
+            if postings and len(postings) <= self.max_key_df:
+                w = self.idf[k]
+                for t in postings:
+                    shared[t] += w
+        cands.update(t for t, _ in shared.most_common(MAX_CANDIDATES))
+        return cands
+
+    def match(self, m_table: str, top_k: int = 3) -> List[dict]:
+        rows = []
+        for p_table in self.candidates(m_table):
+            name_sc, _ = score_pair(self.p_stripped[p_table], self.m_stripped[m_table])
+            col_sc = self.column_score(m_table, p_table)
+            rows.append({
+                'MSSQL_TABLE': m_table,
+                'PG_TABLE': p_table,
+                'NAME_SCORE': round(name_sc, 4),
+                'COLUMN_SCORE': round(col_sc, 4),
+                'SCORE': round(NAME_WEIGHT * name_sc + COLUMN_WEIGHT * col_sc, 4),
+            })
+        rows.sort(key=lambda r: (-r['SCORE'], r['PG_TABLE']))
+        for rank, r in enumerate(rows[:top_k], start=1):
+            r['RANK'] = rank
+        return rows[:top_k]
+
+
+def match_tables(m_tables: Dict[str, Sequence[str]], p_tables: Dict[str, Sequence[str]],
+                 top_k: int = 3, min_score: float = 0.0) -> List[dict]:
+    """
+    Ranked table correspondences, `top_k` PG candidates per MSSQL table.
+
+    m_tables / p_tables map table name -> list of column names.
+    """
+    matcher = TableMatcher(m_tables, p_tables)
+    out = []
+    for m_table in matcher.m_names:
+        out.extend(r for r in matcher.match(m_table, top_k=top_k) if r['SCORE'] >= min_score)
+    return out
+
+
+def best_table_pairs(matches: List[dict], min_score: float = 0.5) -> List[Tuple[str, str]]:
+    """One-to-one pairs from ranked matches: best score first, each table used once."""
+    used_m = set()
+    used_p = set()
+    pairs = []
+    for r in sorted(matches, key=lambda r: -r['SCORE']):
+        if r['SCORE'] < min_score:
+            break
+        if r['MSSQL_TABLE'] in used_m or r['PG_TABLE'] in used_p:
+            continue
+        used_m.add(r['MSSQL_TABLE'])
+        used_p.add(r['PG_TABLE'])
+        pairs.append((r['MSSQL_TABLE'], r['PG_TABLE']))
+    return pairs
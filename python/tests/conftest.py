@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+# the tools are plain modules in python/, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def catalog_cache_path(tmp_path, monkeypatch):
+    """Point the on-disk catalog cache at a per-test file, never ~/.cache."""
+    path = tmp_path / 'catalog_cache.sqlite3'
+    monkeypatch.setenv('CATALOG_CACHE_PATH', str(path))
+    return path
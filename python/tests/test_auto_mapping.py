@@ -0,0 +1,36 @@
+import pytest
+
+# the tool modules read connection settings from the local, untracked db_config.py
+pytest.importorskip('db_config')
+
+import compare_tables_powerful_auto_mapping as mapper
+from type_compat import compatibility_matrix
+from value_sketches import build_sketch, similarity_matrix
+
+THRESHOLD = 0.35
+PG = [('customer_id', 'integer'), ('order_date', 'date')]
+MSSQL = [('customer_id', 'int'), ('order_date', 'datetime')]
+
+
+def pair_inputs():
+    pg_cols = [c for c, _ in PG]
+    m_cols = [c for c, _ in MSSQL]
+    compat = compatibility_matrix([t for _, t in PG], [t for _, t in MSSQL])
+    # PG customer_id holds exactly the values of MSSQL order_date, an incompatible type
+    same = build_sketch([str(v) for v in range(1, 201)])
+    other = build_sketch([f"2024-01-{d:02d}" for d in range(1, 29)])
+    value_sim = similarity_matrix([same, other], [build_sketch([str(v) for v in range(500, 700)]), same])
+    return pg_cols, m_cols, compat, value_sim
+
+
+@pytest.mark.parametrize('engine', ['python', 'vectorized'])
+def test_value_overlap_does_not_revive_incompatible_non_candidates(engine):
+    pg_cols, m_cols, compat, value_sim = pair_inputs()
+    assert value_sim[0, 1] == pytest.approx(1.0, abs=0.1)
+    assert compat[0, 1] == 0
+
+    scores, detail_of = mapper._pair_scores(pg_cols, m_cols, engine, blocking=True, compat=compat,
+                                            value_sim=value_sim)
+
+    assert scores[0, 1] < THRESHOLD
+    assert scores[0, 0] >= THRESHOLD and scores[1, 1] >= THRESHOLD
@@ -0,0 +1,40 @@
+import random
+
+import pytest
+
+from column_scoring import score_matrix
+from name_matching import score_pair
+
+NAMES = [
+    'customer_id', 'CustomerID', 'CUSTOMER_ID', 'cust_id', 'CustID', 'order_no', 'OrderNumber',
+    'ORDER_NO2', 'order_no_2', 'addr_line1', 'AddressLine1', 'address_line_2', 'created_at',
+    'CreatedDate', 'CRT_DT', 'is_active', 'IsActive', 'FLD1', 'FLD12', 'remark2', 'Remarks',
+    'total_amount', 'TotAmt', 'amount', 'id', 'ID', 'x', '', 'updated_by_user', 'UpdUser',
+]
+
+
+def sample_names(seed, count):
+    rng = random.Random(seed)
+    tokens = ['cust', 'customer', 'order', 'no', 'id', 'amt', 'amount', 'date', 'dt', 'user', 'line', 'addr']
+    names = []
+    for _ in range(count):
+        parts = [rng.choice(tokens) for _ in range(rng.randint(1, 3))]
+        name = rng.choice(['_', '']).join(p.capitalize() if rng.random() < 0.5 else p for p in parts)
+        names.append(name + (str(rng.randint(1, 3)) if rng.random() < 0.3 else ''))
+    return names
+
+
+def assert_matches_score_pair(pg_names, m_names, matrix):
+    for i, pg in enumerate(pg_names):
+        for j, m in enumerate(m_names):
+            score, detail = score_pair(pg, m)
+            assert matrix.scores[i, j] == pytest.approx(score, abs=1e-9), (pg, m)
+            assert matrix.detail(i, j) == detail, (pg, m)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_score_matrix_equals_score_pair(seed):
+    pg_names = NAMES + sample_names(seed, 20)
+    m_names = random.Random(seed).sample(NAMES, len(NAMES)) + sample_names(seed + 10, 20)
+    assert_matches_score_pair(pg_names, m_names, score_matrix(pg_names, m_names))
+
@@ -0,0 +1,53 @@
+import sys
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from mapping_assignment import _hungarian_min, assign
+
+
+def brute_min_cost(cost):
+    n, m = cost.shape
+    return min(sum(cost[i, cols[i]] for i in range(n)) for cols in permutations(range(m), n))
+
+
+def brute_max_total(scores, threshold):
+    n, m = scores.shape
+    size = max(n, m)
+    kept = np.where((scores >= threshold) & (scores > 0), scores, 0.0)
+    padded = np.zeros((size, size))
+    padded[:n, :m] = kept
+    return max(sum(padded[i, perm[i]] for i in range(size)) for perm in permutations(range(size)))
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_hungarian_min_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 6))
+    m = int(rng.integers(n, 7))
+    cost = rng.random((n, m))
+    cols = _hungarian_min(cost)
+    assert len(set(cols.tolist())) == n
+    assert cost[np.arange(n), cols].sum() == pytest.approx(brute_min_cost(cost))
+
+
+@pytest.mark.parametrize('scipy', [True, False])
+@pytest.mark.parametrize('seed', range(20))
+def test_optimal_assignment_total_matches_brute_force(seed, scipy, monkeypatch):
+    if not scipy:
+        # None in sys.modules makes the import fail, forcing the NumPy Hungarian fallback
+        monkeypatch.setitem(sys.modules, 'scipy.optimize', None)
+    else:
+        pytest.importorskip('scipy.optimize')
+    rng = np.random.default_rng(100 + seed)
+    shape = tuple(int(x) for x in rng.integers(1, 7, size=2))
+    scores = np.round(rng.random(shape), 2)
+    threshold = 0.35
+
+    chosen = assign(scores, threshold, method='optimal')
+
+    assert len(set(chosen.values())) == len(chosen)
+    assert all(scores[i, j] >= threshold for i, j in chosen.items())
+    total = sum(scores[i, j] for i, j in chosen.items())
+    assert total == pytest.approx(brute_max_total(scores, threshold))
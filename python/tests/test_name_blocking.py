@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from column_scoring import score_matrix
+from name_blocking import candidate_pairs
+from name_matching import name_features, score_pair
+
+NAMES = [
+    'customer_id', 'CustomerID', 'CUSTOMER_ID', 'cust_id', 'CustID', 'order_no', 'OrderNumber',
+    'ORDER_NO2', 'order_no_2', 'addr_line1', 'AddressLine1', 'address_line_2', 'created_at',
+    'CreatedDate', 'CRT_DT', 'is_active', 'IsActive', 'FLD1', 'FLD12', 'remark2', 'Remarks',
+    'total_amount', 'TotAmt', 'amount', 'id', 'ID', 'x', 'updated_by_user', 'UpdUser',
+]
+
+
+def shuffled(seed):
+    names = list(NAMES)
+    random.Random(seed).shuffle(names)
+    return names
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_name_keys_make_candidates(seed):
+    pg_names, m_names = NAMES, shuffled(seed)
+    candidates = candidate_pairs(pg_names, m_names)
+    pairs = set(candidates)
+    for i, pg in enumerate(pg_names):
+        assert candidates.rows[i], pg
+        a = name_features(pg)
+        for j, m in enumerate(m_names):
+            b = name_features(m)
+            if a.norm == b.norm or a.compact == b.compact or set(a.tokens) & set(b.tokens):
+                assert (i, j) in pairs, (pg, m)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_blocked_score_matrix_scores_only_candidates(seed):
+    pg_names, m_names = NAMES, shuffled(seed)
+    candidates = candidate_pairs(pg_names, m_names)
+    pairs = set(candidates)
+    matrix = score_matrix(pg_names, m_names, candidates=candidates)
+    for i, pg in enumerate(pg_names):
+        for j, m in enumerate(m_names):
+            expected = score_pair(pg, m)[0] if (i, j) in pairs else 0.0
+            assert matrix.scores[i, j] == pytest.approx(expected, abs=1e-9), (pg, m)
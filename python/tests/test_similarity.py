@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+import similarity
+from similarity import indel_ratios, lcs_length
+
+
+def dp_lcs(a, b):
+    prev = [0] * (len(b) + 1)
+    for ch in a:
+        cur = [0]
+        for k, other in enumerate(b):
+            cur.append(prev[k] + 1 if ch == other else max(prev[k + 1], cur[k]))
+        prev = cur
+    return prev[-1]
+
+
+def random_pairs(seed, count, max_len):
+    rng = random.Random(seed)
+    alphabet = 'abcde_12'
+    word = lambda: ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+    return [(word(), word()) for _ in range(count)]
+
+
+@pytest.fixture
+def pure_python(monkeypatch):
+    """Exercise the bit-parallel code even when rapidfuzz is installed."""
+    monkeypatch.setattr(similarity, '_rf_indel', None)
+    similarity.indel_ratio.cache_clear()
+    yield
+    similarity.indel_ratio.cache_clear()
+
+
+def test_lcs_length_matches_dp():
+    for a, b in random_pairs(1, 500, 20) + random_pairs(2, 50, 90):
+        assert lcs_length(a, b) == dp_lcs(a, b), (a, b)
+
+
+def test_indel_ratios_match_dp(pure_python):
+    # up to 90 characters: pairs longer than one 64-bit lane take the per-pair path
+    pairs = random_pairs(3, 400, 20) + random_pairs(4, 60, 90) + [('', ''), ('abc', '')]
+    got = indel_ratios([a for a, _ in pairs], [b for _, b in pairs])
+    for (a, b), value in zip(pairs, got.tolist()):
+        total = len(a) + len(b)
+        expected = 2.0 * dp_lcs(a, b) / total if total else 1.0
+        assert value == pytest.approx(expected), (a, b)
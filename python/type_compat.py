@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+type_compat.py
+
+MSSQL -> PostgreSQL data-type compatibility for the auto-mapper.
+
+Both sides' DATA_TYPE spellings (as reported by catalog.py / INFORMATION_SCHEMA)
+are reduced to a family, and every (MSSQL family, PG family) pair has a
+precomputed compatibility in 0..1:
+
+    1.0  same family                    int -> integer, bit -> boolean, nvarchar -> text,
+                                        datetime -> timestamp, money -> numeric,
+                                        uniqueidentifier -> uuid, ...
+    0.7  widening / narrowing           int <-> numeric, datetime <-> date
+    0.6  anything stored as text        ToString() in the migrations
+    0.5  flags kept as numbers          bit <-> int
+    0.4  text parsed into a type        int.TryParse / DateTime.TryParse / Guid in the migrations
+    0.0  never valid                    datetime -> boolean, uuid -> numeric, bytea <- int, ...
+
+Types outside the table (USER-DEFINED, ARRAY, sql_variant, geography, ...) are
+'unknown' and get a neutral 0.5 - they are never pruned.
+
+suggest_mappings drops pairs with compatibility 0 before scoring (except columns
+whose names are identical, so a changed type stays visible) and scales the name
+score of the rest by type_weight().
+"""
+
+from typing import Optional
+
+# weight of the type feature: a pair's score is multiplied by 1 - W_TYPE * (1 - compatibility)
+W_TYPE = 0.3
+UNKNOWN_COMPAT = 0.5
+
+MSSQL_FAMILIES = {
+    'tinyint': 'integer', 'smallint': 'integer', 'int': 'integer', 'bigint': 'integer',
+    'decimal': 'decimal', 'numeric': 'decimal', 'money': 'decimal', 'smallmoney': 'decimal',
+    'float': 'decimal', 'real': 'decimal',
+    'bit': 'boolean',
+    'char': 'string', 'varchar': 'string', 'nchar': 'string', 'nvarchar': 'string',
+    'text': 'string', 'ntext': 'string', 'sysname': 'string', 'xml': 'string',
+    'datetime': 'datetime', 'datetime2': 'datetime', 'smalldatetime': 'datetime', 'datetimeoffset': 'datetime',
+    'date': 'date',
+    'time': 'time',
+    'uniqueidentifier': 'uuid',
+    'binary': 'binary', 'varbinary': 'binary', 'image': 'binary', 'timestamp': 'binary', 'rowversion': 'binary',
+}
+
+PG_FAMILIES = {
+    'smallint': 'integer', 'integer': 'integer', 'bigint': 'integer',
+    'numeric': 'decimal', 'real': 'decimal', 'double precision': 'decimal', 'money': 'decimal',
+    'boolean': 'boolean',
+    'character varying': 'string', 'character': 'string', 'text': 'string', 'name': 'string',
+    'xml': 'string', 'json': 'string', 'jsonb': 'string',
+    'timestamp without time zone': 'datetime', 'timestamp with time zone': 'datetime',
+    'date': 'date',
+    'time without time zone': 'time', 'time with time zone': 'time', 'interval': 'time',
+    'uuid': 'uuid',
+    'bytea': 'binary',
+}
+
+FAMILIES = ('integer', 'decimal', 'boolean', 'string', 'datetime', 'date', 'time', 'uuid', 'binary')
+
+# (MSSQL family, PG family) -> compatibility; missing pairs are incompatible
+_RULES = {
+    ('integer', 'decimal'): 0.7,
+    ('decimal', 'integer'): 0.7,
+    ('datetime', 'date'): 0.7,
+    ('date', 'datetime'): 0.7,
+    ('boolean', 'integer'): 0.5,
+    ('integer', 'boolean'): 0.5,
+}
+for _family in FAMILIES:
+    _RULES[(_family, _family)] = 1.0
+    if _family != 'string':
+        _RULES.setdefault((_family, 'string'), 0.6)
+        if _family != 'binary':
+            _RULES.setdefault(('string', _family), 0.4)
+
+COMPATIBILITY = {(m, p): _RULES.get((m, p), 0.0) for m in FAMILIES for p in FAMILIES}
+
+
+def type_family(db_type: str, data_type: Optional[str]) -> Optional[str]:
+    """Family of a DATA_TYPE spelling ('mssql' or 'postgres'); None if not in the table."""
+    if not data_type:
+        return None
+    families = MSSQL_FAMILIES if db_type == 'mssql' else PG_FAMILIES
+    return families.get(str(data_type).strip().lower())
+
+
+def compatibility(m_type: Optional[str], pg_type: Optional[str]) -> float:
+    """Compatibility of migrating an MSSQL column of m_type into a PostgreSQL column of pg_type."""
+    m_family = type_family('mssql', m_type)
+    p_family = type_family('postgres', pg_type)
+    if m_family is None or p_family is None:
+        return UNKNOWN_COMPAT
+    return COMPATIBILITY[(m_family, p_family)]
+
+
+def compatibility_matrix(pg_types, m_types):
+    """compatibility() of every (pg, mssql) column pair as a NumPy array (rows = PG columns)."""
+    import numpy as np
+
+    index = {f: k for k, f in enumerate(FAMILIES)}
+    unknown = len(FAMILIES)
+    table = np.full((unknown + 1, unknown + 1), UNKNOWN_COMPAT, dtype=np.float64)
+    for (m, p), value in COMPATIBILITY.items():
+        table[index[p], index[m]] = value
+    pg_ids = np.array([index.get(type_family('postgres', t), unknown) for t in pg_types], dtype=np.int64)
+    m_ids = np.array([index.get(type_family('mssql', t), unknown) for t in m_types], dtype=np.int64)
+    return table[pg_ids[:, None], m_ids[None, :]]
+
+
+def type_weight(compat):
+    """Factor applied to a pair's name score (works on floats and NumPy arrays)."""
+    return 1.0 - W_TYPE * (1.0 - compat)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+value_sketches.py
+
+Content-based column matching for the auto-mapper: compact per-column sketches
+of sampled values, compared across MSSQL and PostgreSQL.
+
+Legacy columns with cryptic names (FLD1, REMARK2) cannot be matched by name. For
+those, each table is sampled server-side with one query per table:
+
+ - MSSQL      : SELECT TOP (n) ... FROM t TABLESAMPLE (p PERCENT) REPEATABLE (seed)
+ - PostgreSQL : SELECT ... FROM t TABLESAMPLE SYSTEM (p) REPEATABLE (seed) LIMIT n
+
+The percentage comes from the catalog row estimate (row_counts.py), and small or
+never-analyzed tables are read with a plain TOP / LIMIT. Values are reduced to
+the canonical text data_diff compares (so 1 / True / 1.00 agree across drivers)
+and every column becomes a ColumnSketch:
+
+ - MinHash signature (MINHASH_SIZE 64-bit minima)  -> Jaccard of the value sets
+ - HyperLogLog registers (2^HLL_BITS)              -> distinct values in the sample
+
+value_similarity() turns the two into a containment estimate - the share of the
+smaller column's values found in the other - which stays meaningful when a
+lookup column is compared with a wider one. Every {0,1} or {Y,N} column contains
+every other one, so the estimate is scaled by min(1, distinct / MIN_DISTINCT) of
+the smaller column: low-cardinality overlap alone cannot make a match.
+
+Sketches are stored in the catalog cache file (catalog_cache.py) keyed by table
+stamp, so repeat runs do not scan the tables again until the table changes or
+VALUE_SKETCH_MAX_AGE (seconds, default one week) passes.
+"""
+
+import base64
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from catalog import ColumnInfo, TableInfo
+from catalog_cache import CatalogCache, cache_enabled, connection_identity, fetch_stamps
+from data_diff import select_expr, canonical_value
+from db_utils import fetchall, sampled_table
+from row_counts import estimate_row_count, estimate_row_counts, lookup_estimate
+from type_compat import type_family
+
+SAMPLE_ROWS = 2000
+OVERSAMPLE = 2.0          # page-level sampling returns an uneven number of rows
+SAMPLE_SEED = 42
+MINHASH_SIZE = 128
+HLL_BITS = 10
+MIN_DISTINCT = 20         # overlap of columns with fewer distinct values (flags, statuses) is discounted
+MAX_AGE = float(os.environ.get('VALUE_SKETCH_MAX_AGE', str(7 * 24 * 3600)))
+
+# blobs are never sampled: they are expensive to transfer and never match by value
+SKIPPED_FAMILIES = {'binary'}
+
+_MASK64 = (1 << 64) - 1
+
+
+def _seeds():
+    import numpy as np
+    rng = np.random.default_rng(SAMPLE_SEED)
+    return rng.integers(0, 2 ** 63 - 1, size=MINHASH_SIZE, dtype=np.int64).astype(np.uint64)
+
+
+def _mix(x):
+    """splitmix64 finalizer on a uint64 array (wrapping arithmetic)."""
+    import numpy as np
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# -------------------------
+# Sketches
+# -------------------------
+@dataclass
+class ColumnSketch:
+    rows: int                 # sampled rows
+    nulls: int
+    minhash: 'np.ndarray'     # uint64[MINHASH_SIZE]; all ones when the column had no values
+    hll: bytes                # 2^HLL_BITS registers
+
+    @property
+    def empty(self) -> bool:
+        return self.rows - self.nulls <= 0
+
+    @property
+    def distinct(self) -> float:
+        """HyperLogLog estimate of the distinct values in the sample."""
+        import numpy as np
+        registers = np.frombuffer(self.hll, dtype=np.uint8).astype(np.float64)
+        m = registers.size
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / np.sum(2.0 ** -registers)
+        zeros = int(np.count_nonzero(registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+    def to_dict(self) -> dict:
+        return {'rows': self.rows, 'nulls': self.nulls,
+                'minhash': base64.b64encode(self.minhash.tobytes()).decode('ascii'),
+                'hll': base64.b64encode(self.hll).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ColumnSketch':
+        import numpy as np
+        return cls(rows=data['rows'], nulls=data['nulls'],
+                   minhash=np.frombuffer(base64.b64decode(data['minhash']), dtype=np.uint64).copy(),
+                   hll=base64.b64decode(data['hll']))
+
+
+def build_sketch(values: Sequence[Optional[str]]) -> ColumnSketch:
+    """Sketch of one column's canonical values (None = NULL)."""
+    import numpy as np
+    present = {v for v in values if v is not None}
+    hashes = np.array([int.from_bytes(hashlib.blake2b(v.encode('utf-8'), digest_size=8).digest(), 'little')
+                       for v in present], dtype=np.uint64)
+    minhash = np.full(MINHASH_SIZE, _MASK64, dtype=np.uint64)
+    registers = np.zeros(1 << HLL_BITS, dtype=np.uint8)
+    if hashes.size:
+        minhash = _mix(hashes[:, None] ^ _seeds()[None, :]).min(axis=0)
+        shift = np.uint64(64 - HLL_BITS)
+        index = (hashes >> shift).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - HLL_BITS)) - 1)
+        _, exponent = np.frexp(rest.astype(np.float64))      # bit length of rest (0 for 0)
+        rank = (64 - HLL_BITS - exponent + 1).astype(np.uint8)
+        np.maximum.at(registers, index, rank)
+    return ColumnSketch(rows=len(values), nulls=sum(v is None for v in values), minhash=minhash,
+                        hll=registers.tobytes())
+
+
+def value_similarity(a: Optional[ColumnSketch], b: Optional[ColumnSketch]) -> float:
+    """
+    Estimated share of the smaller column's distinct values present in the other (0 if unknown),
+    discounted when the smaller column has fewer than MIN_DISTINCT distinct values.
+    """
+    if a is None or b is None or a.empty or b.empty:
+        return 0.0
+    jaccard = float((a.minhash == b.minhash).mean())
+    if jaccard <= 0:
+        return 0.0
+    n_a, n_b = a.distinct, b.distinct
+    smaller = max(1.0, min(n_a, n_b))
+    shared = jaccard / (1.0 + jaccard) * (n_a + n_b)
+    return min(1.0, shared / smaller) * min(1.0, smaller / MIN_DISTINCT)
+
+
+def similarity_matrix(pg_sketches: List[Optional[ColumnSketch]], m_sketches: List[Optional[ColumnSketch]]):
+    """value_similarity for every (pg, mssql) column pair (rows = PG columns)."""
+    import numpy as np
+    out = np.zeros((len(pg_sketches), len(m_sketches)), dtype=np.float64)
+    pg_rows = [i for i, s in enumerate(pg_sketches) if s is not None and not s.empty]
+    m_rows = [j for j, s in enumerate(m_sketches) if s is not None and not s.empty]
+    if not pg_rows or not m_rows:
+        return out
+    pg_sig = np.stack([pg_sketches[i].minhash for i in pg_rows])
+    m_sig = np.stack([m_sketches[j].minhash for j in m_rows])
+    pg_n = np.array([pg_sketches[i].distinct for i in pg_rows])
+    m_n = np.array([m_sketches[j].distinct for j in m_rows])
+    jaccard = np.empty((len(pg_rows), len(m_rows)), dtype=np.float64)
+    for start in range(0, len(pg_rows), 64):         # bounded (64 x M x MINHASH_SIZE) temporaries
+        block = pg_sig[start:start + 64]
+        jaccard[start:start + 64] = (block[:, None, :] == m_sig[None, :, :]).mean(axis=2)
+    shared = jaccard / (1.0 + jaccard) * (pg_n[:, None] + m_n[None, :])
+    smaller = np.maximum(1.0, np.minimum(pg_n[:, None], m_n[None, :]))
+    out[np.ix_(pg_rows, m_rows)] = np.minimum(1.0, shared / smaller) * np.minimum(1.0, smaller / MIN_DISTINCT)
+    return out
+
+
+# -------------------------
+# Sampling
+# -------------------------
+def sampled_columns(db_type: str, table: TableInfo) -> List[ColumnInfo]:
+    return [c for c in table.columns if type_family(db_type, c.data_type) not in SKIPPED_FAMILIES]
+
+
+def sample_query(db_type: str, table: TableInfo, columns: List[ColumnInfo], sample_rows: int,
+                 estimated_rows: int) -> str:
+    exprs = ', '.join(select_expr(db_type, c) for c in columns)
+    percent = None if estimated_rows <= 0 else 100.0 * sample_rows * OVERSAMPLE / estimated_rows
+    source = sampled_table(db_type, table.schema, table.name, percent, SAMPLE_SEED)
+    if db_type == 'mssql':
+        return f"SELECT TOP ({sample_rows}) {exprs} FROM {source}"
+    return f"SELECT {exprs} FROM {source} LIMIT {sample_rows}"
+
+
+def sample_table(conn, db_type: str, table: TableInfo, sample_rows: int = SAMPLE_ROWS,
+                 estimated: Optional[int] = None) -> Dict[str, ColumnSketch]:
+    """
+    Sample a table with one query and sketch every (non-binary) column. `estimated`
+    is the table's row estimate when the caller already has it (-1 if unknown).
+    """
+    columns = sampled_columns(db_type, table)
+    if not columns:
+        return {}
+    if estimated is None:
+        estimated = estimate_row_count(conn, db_type, table.schema, table.name)
+    rows = fetchall(conn, sample_query(db_type, table, columns, sample_rows, estimated))
+    if not rows and estimated != 0:
+        # page sampling can miss every page of a small or badly estimated table
+        rows = fetchall(conn, sample_query(db_type, table, columns, sample_rows, -1))
+    sketches = {}
+    for k, col in enumerate(columns):
+        single = col.data_type == 'real'
+        sketches[col.name] = build_sketch([canonical_value(r[k], trim=True, lower=True, single=single) for r in rows])
+    return sketches
+
+
+def table_sketches(conn, db_type: str, table: TableInfo, sample_rows: int = SAMPLE_ROWS,
+                   max_age: Optional[float] = None, cache: Optional[CatalogCache] = None,
+                   estimated: Optional[int] = None) -> Dict[str, ColumnSketch]:
+    """
+    Column sketches of one table, from the on-disk cache when the table is unchanged
+    (same catalog stamp, sampled recently enough with at least `sample_rows` rows).
+    """
+    if not cache_enabled():
+        return sample_table(conn, db_type, table, sample_rows, estimated)
+    max_age = MAX_AGE if max_age is None else max_age
+
+    own_cache = cache is None
+    cache = cache or CatalogCache()
+    try:
+        cache_key = f"{db_type}|{connection_identity(conn, db_type)}|{table.schema}"
+        stamp = fetch_stamps(conn, db_type, table.schema, [table.name]).get(table.name, '')
+        cached = cache.load_sketches(cache_key, table.name)
+        if cached is not None:
+            cached_stamp, sampled_at, payload = cached
+            if (cached_stamp == stamp and time.time() - sampled_at < max_age
+                    and payload.get('sample_rows', 0) >= sample_rows):
+                return {name: ColumnSketch.from_dict(d) for name, d in payload['columns'].items()}
+        sketches = sample_table(conn, db_type, table, sample_rows, estimated)
+        cache.store_sketches(cache_key, table.name, stamp, {
+            'sample_rows': sample_rows,
+            'columns': {name: s.to_dict() for name, s in sketches.items()},
+        })
+        return sketches
+    finally:
+        if own_cache:
+            cache.close()
+
+
+def fetch_sketches(requests: List[Tuple[str, TableInfo]], sample_rows: int = SAMPLE_ROWS,
+                   workers: int = 4) -> List[Dict[str, ColumnSketch]]:
+    """Sketches for (db_type, TableInfo) requests, sampled concurrently; same order as `requests`."""
+    from db_session import connection, pool_size
+
+    # one whole-schema estimate query per (database, schema), not one per table
+    estimates = {}
+    for db_type, schema in sorted({(db_type, table.schema) for db_type, table in requests}):
+        with connection(db_type) as conn:
+            estimates[db_type, schema] = estimate_row_counts(conn, db_type, schema)
+
+    def load(request):
+        db_type, table = request
+        estimated = lookup_estimate(estimates[db_type, table.schema], table.name)
+        with connection(db_type) as conn:
+            return table_sketches(conn, db_type, table, sample_rows, estimated=estimated)
+
+    # one worker per database at most pool_size; both databases share the executor
+    workers = max(1, min(workers, len(requests) or 1, pool_size('mssql'), pool_size('postgres')))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(load, requests))
+    print(f"✓ Value sketches for {len(requests)} tables ({time.perf_counter() - started:.1f}s)")
+    return results